@@ -7,25 +7,80 @@ Features
 * Parses a transcript file for a specified 18xx game (e.g. 1830, 1889).
 * Optionally runs full verification of the final game state based on a ground
 truth file.
+* Parses all transcripts of a directory or glob pattern on a process pool,
+inferring the game from the file name, and writes a report of the results.
+* Distributes a batch over several hosts mounting the same transcripts by a
+shared queue directory.
+* Runs a daemon parsing transcripts on request over a Unix socket, and a
+client sending the requests, to avoid the startup costs of each invocation.
 
 Usage
 -----
-$ python main.py G1830 transcript.txt [--skip-verify]
+$ python main.py G1830 transcript.txt [--skip-verify] [--export-changes]
+  [--compression {gzip,xz,zstd}] [--pipelined]
+$ python main.py batch transcripts/ [--workers N] [--report report.csv]
+  [--force] [--unprocessed-only] [--stage-cache DIR] [--journal FILE]
+  [--timeout SECONDS] [--retry-failed] [--queue DIR] [--worker-id ID]
+  [--lease SECONDS] [--export-changes] [--compression {gzip,xz,zstd}]
+$ python main.py daemon [--socket PATH] [--workers N]
+$ python main.py client G1830 transcript.txt [--socket PATH]
+  [--export-changes] [--compression {gzip,xz,zstd}] [--shutdown]
 
 Args
 ----
 * game              The game identifier used to select game rules.
-* transcript        Path to the text file containing the transcript.
+* transcript        Path to the text file containing the transcript, which
+                    can be compressed, e.g. transcript.txt.gz.
 * --skip-verify     Skips final game state verification.
+* --export-changes  Saves the state changes of each step as long table.
+* --compression     Compresses the outputs with gzip, xz or zstd.
+* --pipelined       Runs the stages of the pipeline concurrently, for large
+                    transcripts on a machine with spare processors.
 * --debug           Enable debug output in logger.
+
+Batch args
+----------
+* source            Directory of the transcripts or glob pattern, e.g.
+                    "transcripts/1830_*.txt".
+* --workers         Number of worker processes, defaults to the processors.
+* --report          Path of the report, defaults to batch_report.csv.
+* --force           Parses transcripts with up-to-date outputs as well.
+* --unprocessed-only
+                    Parses transcripts of an older engine only if they have
+                    unprocessed lines or failed.
+* --stage-cache     Directory to cache the parsed and processed transcripts,
+                    such that parsing again resumes from the latest stage.
+* --journal         File to record the progress in, such that an interrupted
+                    batch resumes without parsing finished transcripts again.
+* --timeout         Maximum seconds to parse a transcript, after which its
+                    worker is killed.
+* --retry-failed    Parses transcripts recorded as failed in the journal again.
+* --queue           Shared queue directory, such that the batch commands of
+                    several hosts claim the transcripts cooperatively.
+* --worker-id       Prefix of the worker identifiers in the queue, defaults
+                    to the host name and process identifier.
+* --lease           Seconds after which the lease of a crashed worker expires,
+                    defaults to 60.
+
+Daemon and client args
+----------------------
+* --socket          Path of the Unix socket of the daemon, defaults to
+                    trx-<uid>.sock in the temporary directory.
+* --workers         Number of worker processes of the daemon, defaults to the
+                    processors.
+* --shutdown        Stops the daemon instead of parsing.
 """
 import argparse
 import json
 import logging
+import sys
 
 from pathlib import Path
 
 import transcripts18xx as trx
+from transcripts18xx import batch as batch_module
+from transcripts18xx import daemon as daemon_module
+from transcripts18xx import lease
 
 
 def parse_arguments():
@@ -48,6 +103,23 @@ def parse_arguments():
         action='store_true',
         help='Skip the verification of the final state'
     )
+    parser.add_argument(
+        '--export-changes',
+        action='store_true',
+        help='Save the state changes of each step as long table'
+    )
+    parser.add_argument(
+        '--compression',
+        type=lambda x: trx.Compression[x.upper()],
+        choices=list(trx.Compression),
+        metavar='{gzip,xz,zstd}',
+        help='Compress the outputs'
+    )
+    parser.add_argument(
+        '--pipelined',
+        action='store_true',
+        help='Run the stages of the pipeline concurrently'
+    )
     parser.add_argument(
         '--debug',
         action='store_true',
@@ -56,11 +128,110 @@ def parse_arguments():
     return parser.parse_args()
 
 
-def main():
-    args = parse_arguments()
+def parse_batch_arguments(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog='trx batch',
+        description='Process all game transcripts of a directory or pattern'
+    )
+    parser.add_argument(
+        'source',
+        type=str,
+        help='Directory of the game transcripts or glob pattern'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes'
+    )
+    parser.add_argument(
+        '--report',
+        type=Path,
+        default=Path('batch_report.csv'),
+        help='Path of the report of the parse results'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Parse transcripts with up-to-date outputs as well'
+    )
+    parser.add_argument(
+        '--unprocessed-only',
+        action='store_true',
+        help='Parse transcripts of an older engine only if they have '
+             'unprocessed lines or failed'
+    )
+    parser.add_argument(
+        '--stage-cache',
+        type=Path,
+        default=None,
+        help='Directory to cache the parsed and processed transcripts'
+    )
+    parser.add_argument(
+        '--journal',
+        type=Path,
+        default=None,
+        help='File to record the progress in and resume from'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=None,
+        help='Maximum seconds to parse a transcript'
+    )
+    parser.add_argument(
+        '--retry-failed',
+        action='store_true',
+        help='Parse transcripts recorded as failed in the journal again'
+    )
+    parser.add_argument(
+        '--queue',
+        type=Path,
+        default=None,
+        help='Shared queue directory to distribute the batch over hosts'
+    )
+    parser.add_argument(
+        '--worker-id',
+        type=str,
+        default=None,
+        help='Prefix of the worker identifiers in the queue'
+    )
+    parser.add_argument(
+        '--lease',
+        type=float,
+        default=lease.DEFAULT_LEASE_SECONDS,
+        help='Seconds after which the lease of a crashed worker expires'
+    )
+    parser.add_argument(
+        '--export-changes',
+        action='store_true',
+        help='Save the state changes of each step as long table'
+    )
+    parser.add_argument(
+        '--compression',
+        type=lambda x: trx.Compression[x.upper()],
+        choices=list(trx.Compression),
+        metavar='{gzip,xz,zstd}',
+        help='Compress the outputs'
+    )
+    parser.add_argument(
+        '--debug',
+        action='store_true',
+        help='Enable debug output of logger'
+    )
+    args = parser.parse_args(argv)
+    if args.queue is not None and (
+            args.journal is not None or args.retry_failed
+    ):
+        parser.error(
+            '--queue cannot be combined with --journal or --retry-failed'
+        )
+    return args
+
 
+def setup_logging(debug: bool):
     level = logging.INFO
-    if args.debug:
+    if debug:
         level = logging.DEBUG
     logging.basicConfig(
         level=level,
@@ -71,8 +242,159 @@ def main():
         ]
     )
 
+
+def batch(argv: list[str]):
+    args = parse_batch_arguments(argv)
+    setup_logging(args.debug)
+
+    transcripts = batch_module.discover(args.source)
+    stage_cache = (
+        None if args.stage_cache is None else trx.StageCache(args.stage_cache)
+    )
+    if args.queue is not None:
+        try:
+            results = lease.run_workers(
+                transcripts, args.queue, num_workers=args.workers or 1,
+                worker=args.worker_id, lease_seconds=args.lease,
+                options={
+                    'export_changes': args.export_changes,
+                    'output_compression': args.compression,
+                    'stage_cache': stage_cache
+                },
+                force=args.force, unprocessed_only=args.unprocessed_only,
+                timeout=args.timeout
+            )
+        except RuntimeError as e:
+            sys.exit(f'Batch failed: {e}')
+        print(json.dumps(lease.summarize_workers(args.queue), indent=2))
+    else:
+        results = batch_module.parse_batch(
+            transcripts, max_workers=args.workers,
+            export_changes=args.export_changes,
+            output_compression=args.compression, force=args.force,
+            unprocessed_only=args.unprocessed_only, stage_cache=stage_cache,
+            journal=args.journal, timeout=args.timeout,
+            retry_failed=args.retry_failed
+        )
+    batch_module.write_report(results, args.report)
+    print(json.dumps(batch_module.summarize(results), indent=2))
+
+
+def parse_daemon_arguments(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog='trx daemon',
+        description='Serve parse requests on a Unix socket'
+    )
+    parser.add_argument(
+        '--socket',
+        type=Path,
+        default=daemon_module.DEFAULT_SOCKET,
+        help='Path of the Unix socket'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes'
+    )
+    parser.add_argument(
+        '--debug',
+        action='store_true',
+        help='Enable debug output of logger'
+    )
+    return parser.parse_args(argv)
+
+
+def parse_client_arguments(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog='trx client',
+        description='Process a game transcript by the daemon'
+    )
+    parser.add_argument(
+        'game',
+        type=str,
+        nargs='?',
+        help='Game type of transcript, e.g. G1830'
+    )
+    parser.add_argument(
+        'transcript',
+        type=Path,
+        nargs='?',
+        help='Path to the game transcript'
+    )
+    parser.add_argument(
+        '--socket',
+        type=Path,
+        default=daemon_module.DEFAULT_SOCKET,
+        help='Path of the Unix socket of the daemon'
+    )
+    parser.add_argument(
+        '--export-changes',
+        action='store_true',
+        help='Save the state changes of each step as long table'
+    )
+    parser.add_argument(
+        '--compression',
+        type=str,
+        choices=['gzip', 'xz', 'zstd'],
+        help='Compress the outputs'
+    )
+    parser.add_argument(
+        '--shutdown',
+        action='store_true',
+        help='Stop the daemon'
+    )
+    args = parser.parse_args(argv)
+    if not args.shutdown and args.transcript is None:
+        parser.error('game and transcript are required')
+    return args
+
+
+def daemon(argv: list[str]):
+    args = parse_daemon_arguments(argv)
+    setup_logging(args.debug)
+    try:
+        daemon_module.serve(args.socket, max_workers=args.workers)
+    except FileExistsError as e:
+        sys.exit(str(e))
+
+
+def client(argv: list[str]):
+    args = parse_client_arguments(argv)
+    with daemon_module.Client(args.socket) as cl:
+        if args.shutdown:
+            cl.shutdown()
+            return
+        try:
+            result = cl.parse(
+                args.transcript, args.game,
+                export_changes=args.export_changes,
+                output_compression=args.compression
+            )
+        except RuntimeError as e:
+            sys.exit(f'Parsing failed: {e}')
+    print(json.dumps(result, indent=2))
+
+
+def main():
+    if sys.argv[1:2] == ['batch']:
+        batch(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['daemon']:
+        daemon(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['client']:
+        client(sys.argv[2:])
+        return
+
+    args = parse_arguments()
+    setup_logging(args.debug)
+
     game = args.game.select()
-    parser = trx.TranscriptParser(args.transcript, game)
+    parser = trx.TranscriptParser(
+        args.transcript, game, export_changes=args.export_changes,
+        output_compression=args.compression, pipelined=args.pipelined
+    )
     result = parser.parse()
     print(json.dumps(result, indent=2))
     if not args.skip_verify:
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from transcripts18xx import batch, compression, games, storage, transcript
+
+from tests import context
+
+
+class TestDiscover(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = context.transcript_1830().parent
+
+    def test_directory(self):
+        self.assertEqual(
+            [context.transcript_1830(), context.transcript_1889()],
+            batch.discover(self.directory)
+        )
+        self.assertEqual(
+            [context.transcript_1889()],
+            batch.discover(self.directory, game='1889')
+        )
+
+    def test_glob(self):
+        self.assertEqual(
+            [context.transcript_1830()],
+            batch.discover(str(self.directory.joinpath('1830_*')))
+        )
+
+    def test_infer_game(self):
+        self.assertEqual(
+            games.Games.G1830, batch.infer_game(context.transcript_1830())
+        )
+        self.assertEqual(
+            games.Games.G1889, batch.infer_game(Path('1889_1.txt.gz'))
+        )
+        with self.assertRaises(ValueError):
+            batch.infer_game(Path('1999_1.txt'))
+
+
+class TestParseBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.directory = Path(cls.tmp.name)
+        for raw in [context.transcript_1830(), context.transcript_1889()]:
+            shutil.copy(raw, cls.directory)
+        cls.directory.joinpath('1999_1.txt').write_text('unknown game')
+        cls.transcripts = batch.discover(cls.directory)
+        cls.results = batch.parse_batch(cls.transcripts, max_workers=2)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def test_results(self):
+        self.assertEqual(
+            [str(t) for t in self.transcripts],
+            [r.transcript for r in self.results]
+        )
+        first, second, third = self.results
+        self.assertEqual('SUCCESS', first.parse_result)
+        self.assertTrue(first.valid)
+        self.assertEqual(201210, first.game_id)
+        self.assertEqual('SUCCESS', second.parse_result)
+        self.assertFalse(second.valid)
+        self.assertEqual('1889', second.game_type)
+        self.assertEqual('ValueError: Unknown game: 1999', third.parse_result)
+        self.assertIsNone(third.verification_result)
+        self.assertTrue(
+            self.directory.joinpath('1830_201210_metadata.json').exists()
+        )
+
+    def test_summarize(self):
+        summary = batch.summarize(self.results)
+        self.assertEqual(3, summary['transcripts'])
+        self.assertEqual(2, summary['parsed'])
+        self.assertEqual(1, summary['failed'])
+        self.assertEqual(1, summary['valid'])
+        self.assertEqual(0, summary['skipped'])
+
+    def test_skip_up_to_date(self):
+        results = batch.parse_batch(self.transcripts, max_workers=2)
+        self.assertEqual([True, True, False], [r.skipped for r in results])
+        self.assertEqual(
+            [r.parse_result for r in self.results],
+            [r.parse_result for r in results]
+        )
+        self.assertTrue(results[0].valid)
+        results = batch.parse_batch(
+            self.transcripts[:1], max_workers=1, force=True
+        )
+        self.assertFalse(results[0].skipped)
+
+    def test_write_report(self):
+        file = self.directory.joinpath('report.csv')
+        batch.write_report(self.results, file)
+        df = pd.read_csv(file)
+        self.assertEqual(3, df.shape[0])
+        self.assertEqual(
+            ['transcript', 'game_type', 'game_id', 'parse_result',
+             'verification_result', 'valid', 'num_unprocessed_lines',
+             'seconds', 'skipped'],
+            list(df.columns)
+        )
+
+
+class TestUpToDate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.raw = Path(shutil.copy(context.transcript_1830(), cls.tmp.name))
+        cls.game = games.Game1830()
+        batch.parse_one(cls.raw)
+        cls.meta_path = transcript._metadata_path(cls.raw)
+        cls.metadata = transcript._read_json(cls.meta_path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def tearDown(self) -> None:
+        transcript._write_json(self.meta_path, self.metadata)
+
+    def _update_metadata(self, **kwargs):
+        transcript._write_json(self.meta_path, self.metadata | kwargs)
+
+    def test_up_to_date(self):
+        self.assertTrue(batch.is_up_to_date(self.raw, self.game))
+        self.assertFalse(batch.is_up_to_date(self.raw, games.Game1889()))
+
+    def test_transcript_changed(self):
+        self._update_metadata(transcript_hash='0')
+        self.assertFalse(batch.is_up_to_date(self.raw, self.game))
+        self.assertFalse(batch.is_up_to_date(self.raw, self.game, True))
+
+    def test_engine_changed(self):
+        self._update_metadata(engine_fingerprint='0')
+        self.assertFalse(batch.is_up_to_date(self.raw, self.game))
+        self.assertTrue(batch.is_up_to_date(self.raw, self.game, True))
+
+        self._update_metadata(
+            engine_fingerprint='0', unprocessed_lines=['unknown line']
+        )
+        self.assertFalse(batch.is_up_to_date(self.raw, self.game, True))
+
+    def test_options_changed(self):
+        self.assertFalse(batch.is_up_to_date(
+            self.raw, self.game, options={'export_changes': True}
+        ))
+        self.assertFalse(batch.is_up_to_date(
+            self.raw, self.game,
+            options={'storage_format': storage.StorageFormat.FEATHER}
+        ))
+        self.assertFalse(batch.is_up_to_date(
+            self.raw, self.game,
+            options={'output_compression': compression.Compression.GZIP}
+        ))
+
+        self._update_metadata(outputs=self.metadata['outputs'] | {
+            'export_changes': True
+        })
+        self.assertTrue(batch.is_up_to_date(self.raw, self.game))
+        self.assertFalse(batch.is_up_to_date(
+            self.raw, self.game, options={'export_changes': True}
+        ))
+
+        self._update_metadata(outputs=None)
+        self.assertFalse(batch.is_up_to_date(self.raw, self.game))
+
+    def test_missing_metadata(self):
+        raw = Path(self.tmp.name).joinpath('1830_1.txt')
+        self.assertFalse(batch.is_up_to_date(raw, self.game))
+
+
+def _exit_worker(*args, **kwargs):
+    os._exit(3)
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.file = self.directory.joinpath('journal.jsonl')
+        self.raw = Path(shutil.copy(context.transcript_1830(), self.directory))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _events(self) -> list[str]:
+        with open(self.file, 'r', encoding='utf-8') as f:
+            return [json.loads(line)['event'] for line in f]
+
+    def test_states(self):
+        journal = batch.Journal(self.file)
+        result = batch._failure(self.raw, ValueError('error'), 1.0)
+        journal.record('started', self.raw)
+        journal.record('failed', self.raw, result)
+        journal.record('started', self.raw)
+        state = journal.states()[str(self.raw)]
+        self.assertEqual('started', state['event'])
+        self.assertEqual(2, state['attempts'])
+
+    def test_truncated_line(self):
+        journal = batch.Journal(self.file)
+        journal.record('started', self.raw)
+        with open(self.file, 'a', encoding='utf-8') as f:
+            f.write('{"event": "comp')
+        journal = batch.Journal(self.file)
+        journal.record('started', self.raw)
+        self.assertEqual(2, journal.states()[str(self.raw)]['attempts'])
+
+    def test_resume(self):
+        results = batch.parse_batch(
+            [self.raw], max_workers=1, journal=self.file
+        )
+        self.assertEqual(['started', 'completed'], self._events())
+        resumed = batch.parse_batch(
+            [self.raw], max_workers=1, force=True, journal=self.file
+        )
+        self.assertEqual(results, resumed)
+        self.assertEqual(['started', 'completed'], self._events())
+
+    def test_retry_failed(self):
+        raw = self.directory.joinpath('1999_1.txt')
+        raw.write_text('unknown game')
+        batch.parse_batch([raw], max_workers=1, journal=self.file)
+        batch.parse_batch([raw], max_workers=1, journal=self.file)
+        self.assertEqual(['started', 'failed'], self._events())
+        batch.parse_batch(
+            [raw], max_workers=1, journal=self.file, retry_failed=True
+        )
+        self.assertEqual(
+            ['started', 'failed', 'started', 'failed'], self._events()
+        )
+
+    def test_max_attempts(self):
+        journal = batch.Journal(self.file)
+        for _ in range(batch.MAX_ATTEMPTS):
+            journal.record('started', self.raw)
+        result, = batch.parse_batch(
+            [self.raw], max_workers=1, journal=self.file
+        )
+        self.assertEqual(
+            'RuntimeError: Interrupted 3 times', result.parse_result
+        )
+        self.assertEqual('failed', self._events()[-1])
+
+    def test_timeout(self):
+        raw = self.directory.joinpath('1830_2.txt')
+        os.mkfifo(raw)
+        unknown = self.directory.joinpath('1999_1.txt')
+        unknown.write_text('unknown game')
+        results = batch.parse_batch(
+            [raw, unknown], max_workers=1, journal=self.file, timeout=1.0
+        )
+        self.assertEqual(
+            'TimeoutError: Parsing exceeded 1.0 seconds',
+            results[0].parse_result
+        )
+        self.assertEqual(
+            'ValueError: Unknown game: 1999', results[1].parse_result
+        )
+        self.assertEqual(
+            ['started', 'failed', 'started', 'failed'], self._events()
+        )
+
+    @unittest.skipUnless(
+        multiprocessing.get_start_method() == 'fork',
+        'Patching the worker requires fork'
+    )
+    def test_worker_died(self):
+        with mock.patch.object(batch, 'parse_one', _exit_worker):
+            result, = batch.parse_batch(
+                [self.raw], max_workers=1, journal=self.file
+            )
+        self.assertEqual(
+            'RuntimeError: Worker exited with code 3', result.parse_result
+        )
+        self.assertEqual(['started', 'failed'], self._events())
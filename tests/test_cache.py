@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+import os
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import pandas as pd
+
+from transcripts18xx import cache
+
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.file = Path(self.tmp.name).joinpath('file.txt')
+        self.file.write_text('abc')
+        self.cache = cache.FileCache(max_bytes=10)
+        self.calls = 0
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _loader(self, file: Path):
+        def load():
+            self.calls += 1
+            return file.read_text()
+        return load
+
+    def test_load(self):
+        for _ in range(2):
+            self.assertEqual(
+                'abc', self.cache.load(self.file, self._loader(self.file))
+            )
+        self.assertEqual(1, self.calls)
+        self.assertEqual(1, len(self.cache))
+        self.assertEqual(3, self.cache.nbytes)
+
+    def test_key(self):
+        self.cache.load(self.file, self._loader(self.file), key='a')
+        self.cache.load(self.file, self._loader(self.file), key='b')
+        self.assertEqual(2, self.calls)
+        self.assertEqual(2, len(self.cache))
+
+    def test_invalidation(self):
+        self.cache.load(self.file, self._loader(self.file))
+        self.file.write_text('abcd')
+        self.assertEqual(
+            'abcd', self.cache.load(self.file, self._loader(self.file))
+        )
+        self.assertEqual(2, self.calls)
+        self.assertEqual(4, self.cache.nbytes)
+
+    def test_invalidation_mtime(self):
+        self.cache.load(self.file, self._loader(self.file))
+        self.file.write_text('xyz')
+        stat = self.file.stat()
+        os.utime(self.file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+        self.assertEqual(
+            'xyz', self.cache.load(self.file, self._loader(self.file))
+        )
+        self.assertEqual(2, self.calls)
+
+    def test_eviction(self):
+        files = []
+        for i in range(4):
+            file = Path(self.tmp.name).joinpath(f'{i}.txt')
+            file.write_text('abc')
+            files.append(file)
+        for file in files[:3]:
+            self.cache.load(file, self._loader(file))
+        self.cache.load(files[0], self._loader(files[0]))
+        self.cache.load(files[3], self._loader(files[3]))
+        self.assertEqual(4, self.calls)
+        self.assertEqual(9, self.cache.nbytes)
+        self.cache.load(files[0], self._loader(files[0]))
+        self.assertEqual(4, self.calls)
+        self.cache.load(files[1], self._loader(files[1]))
+        self.assertEqual(5, self.calls)
+
+    def test_too_large(self):
+        self.file.write_text('a' * 11)
+        self.cache.load(self.file, self._loader(self.file))
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(0, self.cache.nbytes)
+
+    def test_resize(self):
+        self.cache.load(self.file, self._loader(self.file))
+        self.cache.resize(2)
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(0, self.cache.nbytes)
+
+    def test_missing(self):
+        self.cache.load(self.file, self._loader(self.file))
+        self.file.unlink()
+        with self.assertRaises(FileNotFoundError):
+            self.cache.load(self.file, self._loader(self.file))
+        self.assertEqual(0, len(self.cache))
+
+    def test_dataframe_size(self):
+        self.cache.resize(10 ** 6)
+        df = pd.DataFrame({'a': range(100)})
+        self.cache.load(self.file, lambda: df)
+        self.assertEqual(
+            df.memory_usage(index=True, deep=True).sum(), self.cache.nbytes
+        )
+
+    def test_clear(self):
+        self.cache.load(self.file, self._loader(self.file))
+        self.cache.clear()
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(0, self.cache.nbytes)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import shutil
+import sqlite3
+import tempfile
+import unittest.mock
+
+from pathlib import Path
+
+from transcripts18xx import catalog, transcript
+
+from tests import context
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.catalog = catalog.Catalog(Path(self.tmp.name).joinpath('db'))
+        self.catalog.add_directory(context.transcript_1830().parent)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_add_directory(self):
+        self.assertEqual(2, len(self.catalog))
+        self.catalog.add(context.transcript_1830())
+        self.assertEqual(2, len(self.catalog))
+
+        with self.assertRaises(FileNotFoundError):
+            self.catalog.add(Path(self.tmp.name).joinpath('1830_1.txt'))
+
+    def test_query(self):
+        self.assertEqual(
+            [192767, 201210], [c.game_id for c in self.catalog.query()]
+        )
+        result = self.catalog.query(
+            game_type='1889', valid=False, num_players=6,
+            game_ending='BankBroke'
+        )
+        self.assertEqual([192767], [c.game_id for c in result])
+        self.assertEqual([], self.catalog.query(num_players=5))
+        self.assertEqual(
+            [201210], [c.game_id for c in self.catalog.query(winner='player1')]
+        )
+        self.assertEqual(
+            [201210], [c.game_id for c in self.catalog.query(
+                parse_success=True, verified=True, max_unprocessed_lines=0
+            )]
+        )
+        self.assertEqual([], self.catalog.query(parse_success=False))
+
+    def test_query_context(self):
+        raw = context.transcript_1830()
+        expected = transcript.TranscriptContext.from_raw(raw.resolve())
+        self.assertEqual(
+            [expected], self.catalog.query(game_type='1830')
+        )
+
+    def test_query_no_stat_calls(self):
+        with unittest.mock.patch.object(
+                Path, 'exists', side_effect=AssertionError
+        ), unittest.mock.patch.object(
+            transcript.os, 'stat', side_effect=AssertionError
+        ):
+            result = self.catalog.query(game_type='1830')
+        self.assertEqual(
+            '1830_201210_summary.csv', result[0].summary_path.name
+        )
+
+    def test_remove(self):
+        self.catalog.remove(context.transcript_1889())
+        self.assertEqual(
+            [201210], [c.game_id for c in self.catalog.query()]
+        )
+
+    def test_parser_update(self):
+        raw = Path(self.tmp.name).joinpath(context.transcript_1830().name)
+        shutil.copy(context.transcript_1830(), raw)
+        tp = transcript.TranscriptParser(
+            raw, transcript.games.Game1830(), catalog=self.catalog
+        )
+        tp.parse()
+        self.assertEqual(3, len(self.catalog))
+        result = self.catalog.query(game_type='1830')
+        self.assertEqual([201210, 201210], [c.game_id for c in result])
+        self.assertIn(
+            transcript.TranscriptContext.from_raw(raw.resolve()), result
+        )
+
+    def test_parser_update_failure(self):
+        raw = Path(self.tmp.name).joinpath(context.transcript_1830().name)
+        shutil.copy(context.transcript_1830(), raw)
+        tp = transcript.TranscriptParser(
+            raw, transcript.games.Game1830(), catalog=self.catalog
+        )
+        with unittest.mock.patch.object(
+                catalog.Catalog, 'update',
+                side_effect=sqlite3.OperationalError('database is locked')
+        ), self.assertLogs(transcript.logger, 'WARNING') as logs:
+            metadata = tp.parse()
+        self.assertEqual('SUCCESS', metadata['parse_result'])
+        self.assertIn('database is locked', logs.output[0])
+        self.assertEqual(
+            metadata, transcript._read_json(transcript._metadata_path(raw))
+        )
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import pandas as pd
+
+from transcripts18xx import compression, transcript
+
+from tests import context
+
+try:
+    compression._import_zstd()
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_detect(self):
+        self.assertEqual(
+            compression.Compression.GZIP,
+            compression.detect(Path('1830_123.txt.gz'))
+        )
+        self.assertEqual(
+            compression.Compression.ZSTD,
+            compression.detect(Path('1830_123_final.csv.zst'))
+        )
+        self.assertIsNone(compression.detect(Path('1830_123.txt')))
+
+    def test_strip(self):
+        self.assertEqual(
+            Path('1830_123.txt'), compression.strip(Path('1830_123.txt.xz'))
+        )
+        self.assertEqual(
+            Path('1830_123.txt'), compression.strip(Path('1830_123.txt'))
+        )
+        self.assertEqual(
+            Path('1830_123_final.csv.gz'),
+            compression.compress(
+                Path('1830_123_final.csv'), compression.Compression.GZIP
+            )
+        )
+
+    def roundtrip(self, file: Path):
+        with compression.open_file(file, 'w') as f:
+            f.write('Stock Round 1\n¥100\n')
+        with compression.open_file(file) as f:
+            self.assertEqual(['Stock Round 1\n', '¥100\n'], list(f))
+
+    def test_open_file(self):
+        self.roundtrip(self.path.joinpath('plain.txt'))
+        self.roundtrip(self.path.joinpath('gzip.txt.gz'))
+        self.roundtrip(self.path.joinpath('xz.txt.xz'))
+
+    @unittest.skipUnless(HAS_ZSTD, 'requires zstd')
+    def test_open_file_zstd(self):
+        self.roundtrip(self.path.joinpath('zstd.txt.zst'))
+
+    def test_resolve(self):
+        file = self.path.joinpath('1830_123_metadata.json')
+        self.assertEqual(file, compression.resolve(file))
+
+        compressed = compression.compress(file, compression.Compression.XZ)
+        compressed.touch()
+        self.assertEqual(compressed, compression.resolve(file))
+
+        file.touch()
+        os.utime(compressed, ns=(0, 0))
+        self.assertEqual(file, compression.resolve(file))
+
+
+class TestCompressedTranscript(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        name = context.transcript_1830().name + '.gz'
+        cls.raw = Path(cls.tmp.name).joinpath(name)
+        with open(context.transcript_1830(), 'rb') as src:
+            with gzip.open(cls.raw, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        tp = transcript.TranscriptParser(
+            cls.raw, transcript.games.Game1830(),
+            output_compression=compression.Compression.GZIP
+        )
+        cls.metadata = tp.parse()
+        cls.cnt = transcript.TranscriptContext.from_raw(cls.raw)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def test_metadata(self):
+        self.assertEqual('SUCCESS', self.metadata['parse_result'])
+        self.assertEqual('1830', self.metadata['game'])
+        self.assertEqual('201210', self.metadata['id'])
+
+    def test_paths(self):
+        self.assertEqual(201210, self.cnt.game_id)
+        self.assertEqual('1830', self.cnt.game_type)
+        self.assertEqual(
+            '1830_201210_metadata.json.gz', self.cnt.meta_path.name
+        )
+        self.assertEqual('1830_201210_final.csv.gz', self.cnt.result_path.name)
+        self.assertEqual(
+            '1830_201210_summary.csv.gz', self.cnt.summary_path.name
+        )
+
+    def test_context(self):
+        self.assertTrue(self.cnt.valid)
+        self.assertEqual(self.metadata, self.cnt.metadata())
+        expected = transcript.TranscriptContext.from_raw(
+            context.transcript_1830()
+        )
+        pd.testing.assert_frame_equal(expected.result(), self.cnt.result())
+        pd.testing.assert_frame_equal(
+            expected.rows_for_round('OR 2.1'), self.cnt.rows_for_round('OR 2.1')
+        )
+
+    def test_load_directory(self):
+        contexts = transcript.TranscriptContext.load_directory(
+            Path(self.tmp.name)
+        )
+        self.assertEqual([self.cnt], contexts)
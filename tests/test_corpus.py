@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from transcripts18xx import corpus, transcript
+
+from tests import context
+
+
+class TestCorpus(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.contexts = [
+            transcript.TranscriptContext.from_raw(context.transcript_1830()),
+            transcript.TranscriptContext.from_raw(context.transcript_1889())
+        ]
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name).joinpath('corpus')
+        with corpus.CorpusWriter(self.path) as writer:
+            for cnt in self.contexts:
+                writer.append_context(cnt)
+        self.corpus = corpus.Corpus(self.path)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_games(self):
+        games = self.corpus.games()
+        self.assertEqual([201210, 192767], games.id.tolist())
+        self.assertEqual(['1830', '1889'], games.game.tolist())
+        self.assertEqual([0, 1346], games.start.tolist())
+        self.assertEqual([1346, 1346 + 1053], games.end.tolist())
+        self.assertEqual(1346 + 1053, len(self.corpus))
+
+    def test_game(self):
+        for cnt in self.contexts:
+            pd.testing.assert_frame_equal(
+                cnt.result(), self.corpus.game(cnt.game_id)
+            )
+        df = self.corpus.game(201210, ['id', 'phase'])
+        self.assertEqual(['id', 'phase'], list(df.columns))
+
+        with self.assertRaises(KeyError):
+            self.corpus.game(123)
+
+    def test_column(self):
+        cash = self.corpus.column('player1_cash')
+        self.assertIsInstance(cash, np.memmap)
+        self.assertEqual(len(self.corpus), len(cash))
+        view = self.corpus.column('player1_cash', 192767)
+        self.assertTrue(np.shares_memory(cash, view))
+
+        # Columns of games without the column are filled.
+        player5 = self.corpus.column('player5_cash')
+        self.assertTrue(np.isnan(player5[:1346]).all())
+        self.assertFalse(np.isnan(player5[1346:]).any())
+
+    def test_dictionary(self):
+        self.assertIsNone(self.corpus.dictionary('id'))
+        codes = self.corpus.column('type')
+        dictionary = self.corpus.dictionary('type')
+        self.assertEqual('int32', codes.dtype)
+        types = self.contexts[0].result().type
+        self.assertEqual(types[10], dictionary[codes[10]])
+        self.assertIn('player5', self.corpus.dictionary('player'))
+
+    def test_append(self):
+        with corpus.CorpusWriter(self.path) as writer:
+            with self.assertRaises(ValueError):
+                writer.append_context(self.contexts[0])
+            df = pd.DataFrame({'id': [0, 1], 'phase': ['2', None]})
+            writer.append(1, '1830', df)
+            with self.assertRaises(ValueError):
+                writer.append(2, '1830', pd.DataFrame({'id': ['0']}))
+        extended = corpus.Corpus(self.path)
+        self.assertEqual(len(self.corpus) + 2, len(extended))
+        pd.testing.assert_frame_equal(
+            df.astype({'phase': object}).fillna(np.nan), extended.game(1)
+        )
+        pd.testing.assert_frame_equal(
+            self.contexts[1].result(), extended.game(192767)
+        )
+
+    def test_column_sets(self):
+        path = Path(self.tmp.name).joinpath('column_sets')
+        df = pd.DataFrame({'id': [0, 1], 'phase': ['2', '3']})
+        with corpus.CorpusWriter(path) as writer:
+            writer.append(1, '1830', df)
+            writer.append(2, '1830', df)
+            writer.append(3, '1830', df[['id']])
+        with open(path.joinpath(corpus.META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        self.assertEqual([['id', 'phase'], ['id']], meta['column_sets'])
+        self.assertEqual([0, 0, 1], [g['column_set'] for g in meta['games']])
+        self.assertEqual(['id'], list(corpus.Corpus(path).game(3).columns))
+
+    def test_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            corpus.Corpus(Path(self.tmp.name).joinpath('missing'))
+
+    def test_interrupted_column(self):
+        path = Path(self.tmp.name).joinpath('interrupted')
+        with corpus.CorpusWriter(path) as writer:
+            writer.append(1, '1830', pd.DataFrame({'a': [1.0]}))
+        # Not closed, the new column is not recorded in the metadata.
+        corpus.CorpusWriter(path).append(
+            2, '1830', pd.DataFrame({'a': [2.0], 'b': [7.0]})
+        )
+        with corpus.CorpusWriter(path) as writer:
+            writer.append(3, '1830', pd.DataFrame({'a': [3.0], 'b': [9.0]}))
+        result = corpus.Corpus(path)
+        np.testing.assert_array_equal([1.0, 3.0], result.column('a'))
+        np.testing.assert_array_equal([np.nan, 9.0], result.column('b'))
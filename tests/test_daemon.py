@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import unittest
+
+from pathlib import Path
+
+from transcripts18xx import daemon, games, storage, transcript
+from transcripts18xx.engine import engine
+
+from tests import context
+
+
+class TestDaemon(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.directory = Path(cls.tmp.name)
+        cls.raw = Path(shutil.copy(context.transcript_1830(), cls.directory))
+        cls.socket = cls.directory.joinpath('trx.sock')
+        cls.server = daemon.ParseServer(cls.socket, max_workers=1)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        with daemon.Client(cls.socket) as client:
+            client.shutdown()
+        cls.thread.join()
+        cls.server.server_close()
+        cls.tmp.cleanup()
+
+    def test_ping(self):
+        with daemon.Client(self.socket) as client:
+            self.assertIsInstance(client.ping(), str)
+
+    def test_parse(self):
+        with daemon.Client(self.socket) as client:
+            metadata = client.parse(self.raw, games.Games.G1830)
+        self.assertEqual('SUCCESS', metadata['parse_result'])
+        self.assertEqual(
+            metadata, transcript._read_json(transcript._metadata_path(self.raw))
+        )
+
+    def test_options(self):
+        directory = self.directory.joinpath('options')
+        directory.mkdir()
+        raw = Path(shutil.copy(self.raw, directory))
+        with daemon.Client(self.socket) as client:
+            client.parse(
+                raw, 'G1830', export_changes=True,
+                storage_format=storage.StorageFormat.PARQUET
+            )
+        self.assertTrue(
+            raw.parent.joinpath('1830_201210_changes.parquet').exists()
+        )
+
+    def test_errors(self):
+        with daemon.Client(self.socket) as client:
+            with self.assertRaisesRegex(RuntimeError, 'Unknown game: G1999'):
+                client.parse(self.raw, 'G1999')
+            metadata = client.parse(
+                self.directory.joinpath('1830_1.txt'), 'G1830'
+            )
+            self.assertNotEqual('SUCCESS', metadata['parse_result'])
+            with self.assertRaisesRegex(RuntimeError, 'Unknown options'):
+                client.parse(self.raw, 'G1830', catalog='catalog')
+            with self.assertRaisesRegex(RuntimeError, 'Unknown command'):
+                client._request({'command': 'unknown'})
+            self.assertIsInstance(client.ping(), str)
+
+    def test_socket(self):
+        self.assertEqual(0o600, stat.S_IMODE(self.socket.stat().st_mode))
+        with self.assertRaisesRegex(FileExistsError, 'already running'):
+            daemon.ParseServer(self.socket, max_workers=1)
+        with daemon.Client(self.socket) as client:
+            self.assertIsInstance(client.ping(), str)
+
+    def test_stale_socket(self):
+        path = self.directory.joinpath('stale.sock')
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(str(path))
+        server = daemon.ParseServer(path, max_workers=1)
+        try:
+            self.assertEqual(0o600, stat.S_IMODE(path.stat().st_mode))
+        finally:
+            server.server_close()
+        self.assertFalse(path.exists())
+
+    def test_warm(self):
+        engine._engine_steps.cache_clear()
+        daemon._warm()
+        self.assertEqual(1, engine._engine_steps.cache_info().currsize)
+        self.assertIs(
+            engine._engine_steps(), engine.LineParser()._steps
+        )
+
+    def test_connections(self):
+        clients = [daemon.Client(self.socket) for _ in range(2)]
+        try:
+            self.assertEqual(clients[0].ping(), clients[1].ping())
+        finally:
+            for client in clients:
+                client.close()
@@ -91,6 +91,9 @@ class TestLineParser(unittest.TestCase):
         result = self.matcher.run(line)
         self.assertEqual(expected, result)
 
+    def test_shared_steps(self):
+        self.assertIs(self.matcher._steps, engine.LineParser()._steps)
+
 
 class TestStepMapper(unittest.TestCase):
 
@@ -141,6 +144,12 @@ class TestStepMapper(unittest.TestCase):
         result = self.mapper.run(step)
         self.assertEqual(result, engine.actions.Withhold)
 
+    def test_engine(self):
+        step = engine.step.StepType.Pass
+        result = self.mapper.engine(step)
+        self.assertIsInstance(result, engine.actions.Pass)
+        self.assertIs(result, engine.StepMapper().engine(step))
+
     def test_map_type(self):
         name = 'Withhold'
         result = self.mapper.map_type(name)
@@ -179,7 +188,7 @@ class TestGameState(unittest.TestCase):
         self.assertEqual(7 * 3 + 11 * 3, view.shape[0])
 
         self.assertEqual(300, view.p1_cash)
-        self.assertEqual('{}', view.p1_privates)
+        self.assertEqual(0, view.p1_privates)
         self.assertEqual(300, view.p1_value)
         self.assertEqual(0, view.p1_shares_c1)
         self.assertEqual(0, view.p1_shares_c2)
@@ -187,7 +196,7 @@ class TestGameState(unittest.TestCase):
         self.assertFalse(view.p1_priority_deal)
 
         self.assertEqual(0, view.c1_cash)
-        self.assertEqual('{}', view.c1_privates)
+        self.assertEqual(0, view.c1_privates)
         self.assertEqual(0, view.c1_trains_2)
         self.assertEqual(0, view.c1_trains_3)
         self.assertEqual(0, view.c1_trains_4)
@@ -197,3 +206,9 @@ class TestGameState(unittest.TestCase):
         self.assertEqual(0, view.c1_market)
         self.assertIsNone(view.c1_president)
         self.assertEqual(0, view.c1_share_price)
+
+    def test_view_entities(self):
+        view = self.gs.view({'p2', 'c3'})
+        self.assertEqual(7 + 11, view.shape[0])
+        self.assertEqual(300, view.p2_cash)
+        self.assertEqual(10, view.c3_ipo)
@@ -40,10 +40,10 @@ class TestCompanyState(unittest.TestCase):
         self.assertEqual(75, st.share_price)
 
     def test_flatten(self):
-        flatten = self.company.flatten()
+        flatten = self.company.flatten(['private1'])
         self.assertIsInstance(flatten, pd.Series)
         self.assertEqual(0, flatten['company1_cash'])
-        self.assertEqual('{}', flatten['company1_privates'])
+        self.assertEqual(0, flatten['company1_privates'])
         self.assertEqual(0, flatten['company1_trains_2'])
         self.assertEqual(0, flatten['company1_trains_4'])
         self.assertEqual(0, flatten['company1_trains_D'])
@@ -38,10 +38,10 @@ class TestPlayerState(unittest.TestCase):
         self.assertTrue(st.priority_deal)
 
     def test_flatten(self):
-        flatten = self.player.flatten()
+        flatten = self.player.flatten(['private1'])
         self.assertIsInstance(flatten, pd.Series)
         self.assertEqual(100, flatten['player1_cash'])
-        self.assertEqual('{}', flatten['player1_privates'])
+        self.assertEqual(0, flatten['player1_privates'])
         self.assertEqual(100, flatten['player1_value'])
         self.assertEqual(0, flatten['player1_shares_company1'])
         self.assertEqual(0, flatten['player1_shares_company2'])
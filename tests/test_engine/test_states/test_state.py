@@ -32,10 +32,17 @@ class TestState(unittest.TestCase):
     def test_flatten(self):
         self.state.cash = 100
         self.state.privates['private1'] = 50
-        flatten = self.state.flatten()
+        flatten = self.state.flatten(['private2', 'private1'])
         self.assertIsInstance(flatten, pd.Series)
         self.assertEqual(100, flatten['state1_cash'])
-        self.assertEqual('{"private1": 50}', flatten['state1_privates'])
+        self.assertEqual(2, flatten['state1_privates'])
+
+    def test_privates_mask(self):
+        self.state.privates['private1'] = 50
+        self.state.privates['private3'] = 20
+        privates = ['private1', 'private2', 'private3']
+        self.assertEqual(5, self.state.privates_mask(privates))
+        self.assertEqual(0, state.State('state2').privates_mask(privates))
 
     def test_collects(self):
         self.state.collects(40)
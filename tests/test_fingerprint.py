@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from transcripts18xx import fingerprint, games
+
+from tests import context
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_transcript_hash(self):
+        expected = fingerprint.transcript_hash(context.transcript_1830())
+        self.assertEqual(64, len(expected))
+        with tempfile.TemporaryDirectory() as tmp:
+            file = Path(tmp).joinpath('1830_1.txt')
+            file.write_bytes(context.transcript_1830().read_bytes())
+            self.assertEqual(expected, fingerprint.transcript_hash(file))
+            file.write_bytes(file.read_bytes() + b'\n')
+            self.assertNotEqual(expected, fingerprint.transcript_hash(file))
+
+    def test_engine_fingerprint(self):
+        expected = fingerprint.engine_fingerprint(games.Game1830())
+        self.assertEqual(
+            expected, fingerprint.engine_fingerprint(games.Game1830())
+        )
+        self.assertNotEqual(
+            expected, fingerprint.engine_fingerprint(games.Game1889())
+        )
+        game = games.Game1830()
+        game.trains.add('7')
+        self.assertNotEqual(expected, fingerprint.engine_fingerprint(game))
+
+    def test_engine_sources(self):
+        sources = fingerprint._engine_sources()
+        self.assertTrue(any(
+            'class GameStateProcessor' in source for source in sources
+        ))
+        self.assertTrue(any('def state_update' in source for source in sources))
+
+    def test_steps(self):
+        steps = fingerprint._steps()
+        names = [step[0] for step in steps]
+        self.assertIn('transcripts18xx.engine.steps.actions.Bid', names)
+        self.assertEqual(len(names), len(set(names)))
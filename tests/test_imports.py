@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import subprocess
+import sys
+import unittest
+
+from pathlib import Path
+
+import transcripts18xx as trx
+
+from tests import context
+
+# Cumulative import time of the package in microseconds. Generous, as the
+# package imports in about 40ms without pandas and in about 300ms with it.
+IMPORT_BUDGET = 150_000
+
+_ROOT = Path(__file__).parents[1]
+
+_HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'transcripts18xx.engine')
+
+
+def _run(code: str, *options: str) -> subprocess.CompletedProcess:
+    # Runs the code in a fresh interpreter from the repository root.
+    return subprocess.run(
+        [sys.executable, *options, '-c', code], cwd=_ROOT,
+        capture_output=True, text=True, check=True
+    )
+
+
+def _heavy_modules(modules: list[str]) -> list[str]:
+    # Filters the modules which are imported lazily.
+    return [
+        m for m in modules
+        if any(m == h or m.startswith(f'{h}.') for h in _HEAVY_MODULES)
+    ]
+
+
+class TestImports(unittest.TestCase):
+
+    def test_import_time(self):
+        result = _run('import transcripts18xx', '-X', 'importtime')
+        timings = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, module = line.split('|')
+            timings[module.strip()] = int(cumulative)
+        self.assertEqual([], _heavy_modules(list(timings)))
+        self.assertLess(timings['transcripts18xx'], IMPORT_BUDGET)
+
+    def test_metadata_only(self):
+        raw = context.transcript_1830().relative_to(_ROOT)
+        result = _run(
+            'import sys\n'
+            'from pathlib import Path\n'
+            'import transcripts18xx as trx\n'
+            f'raw = Path({str(raw)!r})\n'
+            'cnt = trx.TranscriptContext.from_raw(raw)\n'
+            'assert cnt.valid and cnt.winner == "player1"\n'
+            'assert trx.LazyTranscriptContext(raw).game_id == 201210\n'
+            'assert trx.full_verification(raw)\n'
+            'print("\\n".join(sys.modules))'
+        )
+        self.assertEqual([], _heavy_modules(result.stdout.splitlines()))
+
+    def test_lazy_members(self):
+        self.assertEqual('GameOver', trx.StepType.GameOver.name)
+        self.assertIn('Corpus', dir(trx))
+        for name in trx.__all__:
+            self.assertIsNotNone(getattr(trx, name))
+        result = _run('from transcripts18xx import *\nprint(CorpusWriter)')
+        self.assertIn('CorpusWriter', result.stdout)
+        with self.assertRaises(AttributeError):
+            getattr(trx, 'Unknown')
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import time
+import unittest.mock
+
+from pathlib import Path
+
+from transcripts18xx import batch, lease
+
+from tests import context
+
+
+class TestLeaseQueue(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        self.raw = Path('1830_1.txt')
+        self.first = lease.LeaseQueue(self.path, 'first', lease_seconds=60)
+        self.second = lease.LeaseQueue(self.path, 'second', lease_seconds=60)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _expire(self, transcript: Path):
+        file = self.path.joinpath('leases', f'{transcript.name}.lease')
+        os.utime(file, (time.time() - 120, time.time() - 120))
+
+    def test_claim(self):
+        self.assertTrue(self.first.claim(self.raw))
+        self.assertFalse(self.second.claim(self.raw))
+        self.assertTrue(self.first.owns(self.raw))
+        self.assertFalse(self.second.owns(self.raw))
+
+    def test_release(self):
+        self.first.claim(self.raw)
+        self.second.release(self.raw)
+        self.assertFalse(self.second.claim(self.raw))
+        self.first.release(self.raw)
+        self.assertTrue(self.second.claim(self.raw))
+
+    def test_expired(self):
+        self.first.claim(self.raw)
+        self._expire(self.raw)
+        self.assertTrue(self.second.claim(self.raw))
+        self.assertTrue(self.second.owns(self.raw))
+        self.assertFalse(self.first.owns(self.raw))
+        self.assertEqual(
+            ['1830_1.txt.lease'],
+            [f.name for f in self.path.joinpath('leases').iterdir()]
+        )
+
+    def test_renew(self):
+        self.first.claim(self.raw)
+        self._expire(self.raw)
+        self.first.renew(self.raw)
+        self.assertFalse(self.second.claim(self.raw))
+
+    def test_heartbeat(self):
+        queue = lease.LeaseQueue(self.path, 'first', lease_seconds=0.3)
+        queue.claim(self.raw)
+        with queue.heartbeat(self.raw):
+            time.sleep(0.6)
+            self.assertFalse(self.second.claim(self.raw))
+
+    def test_complete(self):
+        result = batch._failure(self.raw, ValueError('error'), 1.0)
+        self.first.claim(self.raw)
+        self.first.complete(self.raw, result)
+        self.assertTrue(self.second.is_done(self.raw))
+        self.assertFalse(self.first.owns(self.raw))
+        self.assertEqual([result], lease.merge(self.path))
+
+
+class TestRunWorkers(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.directory = Path(cls.tmp.name).joinpath('transcripts')
+        cls.directory.mkdir()
+        for raw in [context.transcript_1830(), context.transcript_1889()]:
+            shutil.copy(raw, cls.directory)
+        cls.directory.joinpath('1999_1.txt').write_text('unknown game')
+        cls.transcripts = batch.discover(cls.directory)
+        cls.queue = Path(cls.tmp.name).joinpath('queue')
+        cls.results = lease.run_workers(
+            cls.transcripts, cls.queue, num_workers=2, worker='host',
+            lease_seconds=3
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def test_results(self):
+        self.assertEqual(
+            [str(t) for t in self.transcripts],
+            [r.transcript for r in self.results]
+        )
+        self.assertEqual(
+            ['SUCCESS', 'SUCCESS', 'ValueError: Unknown game: 1999'],
+            [r.parse_result for r in self.results]
+        )
+        self.assertEqual([], list(self.queue.joinpath('leases').iterdir()))
+
+    def test_summarize_workers(self):
+        summaries = lease.summarize_workers(self.queue)
+        self.assertLessEqual(set(summaries), {'host-0', 'host-1'})
+        self.assertEqual(
+            3, sum(s['transcripts'] for s in summaries.values())
+        )
+
+    def test_done(self):
+        results = lease.run_worker(self.transcripts, self.queue, 'late')
+        self.assertEqual([], results)
+
+    def test_expired_worker(self):
+        queue = Path(self.tmp.name).joinpath('expired')
+        crashed = lease.LeaseQueue(queue, 'crashed', lease_seconds=0.5)
+        crashed.claim(self.transcripts[2])
+        results = lease.run_worker(
+            self.transcripts[2:], queue, 'other', lease_seconds=0.5
+        )
+        self.assertEqual(1, len(results))
+        self.assertTrue(crashed.is_done(self.transcripts[2]))
+
+    def test_timeout(self):
+        queue = Path(self.tmp.name).joinpath('timeout')
+        fifo = self.directory.parent.joinpath('1830_2.txt')
+        os.mkfifo(fifo)
+        results = lease.run_worker(
+            [fifo, self.transcripts[2]], queue, 'timeout', timeout=1.0
+        )
+        self.assertEqual(
+            ['TimeoutError: Parsing exceeded 1.0 seconds',
+             'ValueError: Unknown game: 1999'],
+            [r.parse_result for r in results]
+        )
+        self.assertEqual([], list(queue.joinpath('leases').iterdir()))
+
+    def test_failed_worker(self):
+        with unittest.mock.patch.object(
+                lease, 'run_worker', side_effect=lambda *args: os._exit(3)
+        ):
+            with self.assertRaisesRegex(RuntimeError, r'crashed-0 \(3\)'):
+                lease.run_workers(
+                    self.transcripts, Path(self.tmp.name).joinpath('failed'),
+                    worker='crashed'
+                )
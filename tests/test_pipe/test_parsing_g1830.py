@@ -3,6 +3,9 @@
 import unittest
 import pandas as pd
 
+from concurrent.futures import ThreadPoolExecutor
+
+from transcripts18xx.engine import engine
 from transcripts18xx.pipe import parsing
 from transcripts18xx.games import Game1830
 from transcripts18xx.engine.states.player import PlayerState
@@ -32,6 +35,13 @@ class TestGameTranscriptProcessor1830(unittest.TestCase):
         self.assertEqual(1346, self.df.shape[0])
         self.assertEqual(24, self.df.shape[1])
 
+    def test_parse_str(self):
+        gtp = parsing.GameTranscriptProcessor(Game1830())
+        chunks = gtp.parse_chunks(str(context.transcript_1830()), 10)
+        self.assertEqual(
+            self.df.id[:10].tolist(), [r['id'] for r in next(chunks)]
+        )
+
     def test_columns(self):
         expected = [
             'phase', 'type', 'parent', 'id', 'line', 'player', 'amount',
@@ -201,8 +211,10 @@ class TestTranscriptPostProcessor1830(unittest.TestCase):
         gtp = parsing.GameTranscriptProcessor(Game1830())
         df = gtp.parse_transcript(raw_transcript)
         tpp = parsing.TranscriptPostProcessor(df, Game1830())
+        cls.columns = tpp.columns()
         df = tpp.process()
         cls.df = df
+        cls.index = tpp.index()
 
     @classmethod
     def tearDownClass(cls) -> None:
@@ -223,6 +235,10 @@ class TestTranscriptPostProcessor1830(unittest.TestCase):
             'tile', 'train', 'type', 'result', 'major_round'
         ]
         self.assertEqual(sorted(expected), sorted(list(self.df.columns)))
+        self.assertEqual(self.columns, list(self.df.columns))
+
+    def test_row_index(self):
+        self.assertEqual(self.index, parsing.row_index(self.df))
 
     def test_phase(self):
         expected = {'2', '3', '4', '5', '6', 'D'}
@@ -293,10 +309,15 @@ class TestGameStateProcessor1830(unittest.TestCase):
         parsed = gtp.parse_transcript(raw_transcript)
         tpp = parsing.TranscriptPostProcessor(parsed, Game1830())
         processed = tpp.process()
-        gsp = parsing.GameStateProcessor(processed, Game1830())
+        gsp = parsing.GameStateProcessor(
+            processed, Game1830(), collect_changes=True
+        )
         df = gsp.generate()
         cls.df = df
         cls.final_state = gsp.final_state()
+        cls.summary = gsp.summary()
+        cls.changes = gsp.changes()
+        cls.privates = list(Game1830().privates)
 
     @classmethod
     def tearDownClass(cls) -> None:
@@ -315,6 +336,91 @@ class TestGameStateProcessor1830(unittest.TestCase):
         self.assertEqual(1346, self.df.shape[0])
         self.assertEqual(167, self.df.shape[1])
 
+    def test_generate_partial(self):
+        raw_transcript = context.transcript_1830()
+        gtp = parsing.GameTranscriptProcessor(Game1830())
+        parsed = gtp.parse_transcript(raw_transcript)
+        tpp = parsing.TranscriptPostProcessor(parsed, Game1830())
+        processed = tpp.process()
+        requests = [
+            ({'mpcoyne'}, {'value'}),
+            ({'leesin'}, {'cash', 'shares'}),
+            ({'B&O'}, {'cash', 'trains'}),
+            ({'PRR', 'mpakfm'}, None)
+        ]
+        for entities, fields in requests:
+            gsp = parsing.GameStateProcessor(processed.copy(), Game1830())
+            result = gsp.generate_partial(entities, fields)
+            expected = self.df[result.columns]
+            self.assertTrue(expected.astype(str).equals(result.astype(str)))
+        self.assertEqual(['mpcoyne_value'], list(
+            gsp.generate_partial({'mpcoyne'}, {'value'}).columns
+        ))
+        with self.assertRaises(ValueError):
+            gsp.generate_partial({'unknown'})
+
+    def test_summary(self):
+        self.assertEqual(31, self.summary.shape[0])
+        self.assertEqual(
+            ['id', 'sequence', 'major_round', 'phase', 'type'],
+            list(self.summary.columns[:5])
+        )
+        new_phases = self.summary[self.summary.type == 'NewPhase']
+        self.assertEqual(
+            ['2', '3', '4', '5', '6', 'D'], new_phases.phase.tolist()
+        )
+        self.assertEqual(
+            self.df.sequence.unique().tolist(),
+            self.summary.sequence.unique().tolist()
+        )
+        expected = self.df.loc[
+            self.summary.id.astype(int), self.summary.columns
+        ]
+        self.assertTrue(
+            expected.reset_index(drop=True).astype(str).equals(
+                self.summary.astype(str)
+            )
+        )
+
+    def test_changes(self):
+        self.assertEqual(['id', 'entity', 'field', 'value'],
+                         list(self.changes.columns))
+        self.assertTrue(self.changes.id.is_monotonic_increasing)
+        initial = self.changes[self.changes.id == 0]
+        self.assertEqual(4 * 12 + 8 * 12, initial.shape[0])
+        self.assertEqual(
+            ['cash', 'privates', 'value', 'priority_deal', 'shares_B&M'],
+            initial[initial.entity == 'leesin'].field.tolist()[:5]
+        )
+        self.assertFalse(any(
+            isinstance(v, float) and v.is_integer() for v in self.changes.value
+        ))
+
+        # The state of each step is the last change of each cell before.
+        state = {}
+        changes = self.changes.groupby('id')
+        columns = (self.changes.entity + '_' + self.changes.field).unique()
+        expected = self.df.set_index('id')[columns]
+        for line_id, row in zip(expected.index, expected.values.tolist()):
+            if line_id in changes.groups:
+                group = changes.get_group(line_id)
+                state.update(zip(
+                    group.entity + '_' + group.field, group.value
+                ))
+            self.assertEqual(row, [state[col] for col in columns])
+
+    def test_changes_disabled(self):
+        raw_transcript = context.transcript_1830()
+        gtp = parsing.GameTranscriptProcessor(Game1830())
+        parsed = gtp.parse_transcript(raw_transcript)
+        tpp = parsing.TranscriptPostProcessor(parsed, Game1830())
+        gsp = parsing.GameStateProcessor(tpp.process(), Game1830())
+        pd.testing.assert_frame_equal(self.df, gsp.generate())
+        self.assertTrue(gsp.changes().empty)
+        self.assertEqual(
+            ['id', 'entity', 'field', 'value'], list(gsp.changes().columns)
+        )
+
     def test_final_state(self):
         self.assertIsInstance(self.final_state, dict)
         self.assertEqual(
@@ -333,7 +439,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         }
         player.priority_deal = False
         player.privates = {'Schuylkill Valley': 20, 'Baltimore & Ohio': 220}
-        expected = player.flatten().to_dict()
+        expected = player.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(player.name)]
         ].to_dict()
@@ -349,7 +455,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         }
         player.priority_deal = True
         player.privates = {'Delaware & Hudson': 70}
-        expected = player.flatten().to_dict()
+        expected = player.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(player.name)]
         ].to_dict()
@@ -365,7 +471,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         }
         player.priority_deal = False
         player.privates = {'Mohawk & Hudson': 110, 'Camden & Amboy': 160}
-        expected = player.flatten().to_dict()
+        expected = player.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(player.name)]
         ].to_dict()
@@ -381,7 +487,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         }
         player.priority_deal = False
         player.privates = {'Champlain & St.Lawrence': 40}
-        expected = player.flatten().to_dict()
+        expected = player.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(player.name)]
         ].to_dict()
@@ -396,7 +502,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = None
         company.share_price = 0
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(company.name)]
         ].to_dict()
@@ -411,7 +517,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = 'mpcoyne'
         company.share_price = 90
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(company.name)]
         ].to_dict()
@@ -426,7 +532,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = None
         company.share_price = 0
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(company.name)]
         ].to_dict()
@@ -441,7 +547,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = None
         company.share_price = 0
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(company.name)]
         ].to_dict()
@@ -456,7 +562,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = None
         company.share_price = 0
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(company.name)]
         ].to_dict()
@@ -471,7 +577,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = None
         company.share_price = 0
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(company.name)]
         ].to_dict()
@@ -486,7 +592,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = None
         company.share_price = 0
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(company.name)]
         ].to_dict()
@@ -501,7 +607,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = None
         company.share_price = 0
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.isr_1().loc[
             [col for col in self.isr_1().index if col.startswith(company.name)]
         ].to_dict()
@@ -517,7 +623,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         }
         player.priority_deal = False
         player.privates = dict()
-        expected = player.flatten().to_dict()
+        expected = player.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(player.name)]
@@ -534,7 +640,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         }
         player.priority_deal = False
         player.privates = dict()
-        expected = player.flatten().to_dict()
+        expected = player.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(player.name)]
@@ -551,7 +657,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         }
         player.priority_deal = False
         player.privates = dict()
-        expected = player.flatten().to_dict()
+        expected = player.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(player.name)]
@@ -568,7 +674,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         }
         player.priority_deal = True
         player.privates = dict()
-        expected = player.flatten().to_dict()
+        expected = player.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(player.name)]
@@ -584,7 +690,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = 'mpcoyne'
         company.share_price = 100
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(company.name)]
@@ -600,7 +706,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = 'mpcoyne'
         company.share_price = 350
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(company.name)]
@@ -616,7 +722,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 2
         company.president = 'riverfiend'
         company.share_price = 90
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(company.name)]
@@ -632,7 +738,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 1
         company.president = 'leesin'
         company.share_price = 125
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(company.name)]
@@ -648,7 +754,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = 'riverfiend'
         company.share_price = 111
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(company.name)]
@@ -664,7 +770,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = 'mpakfm'
         company.share_price = 130
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(company.name)]
@@ -680,7 +786,7 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 2
         company.president = 'leesin'
         company.share_price = 130
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(company.name)]
@@ -696,9 +802,49 @@ class TestGameStateProcessor1830(unittest.TestCase):
         company.market = 0
         company.president = 'leesin'
         company.share_price = 67
-        expected = company.flatten().to_dict()
+        expected = company.flatten(self.privates).to_dict()
         result = self.game_over().loc[
             [col for col in self.game_over().index
              if col.startswith(company.name)]
         ].to_dict()
         self.assertEqual(expected, result)
+
+
+class TestThreadSafety1830(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.gtp = parsing.GameTranscriptProcessor(Game1830())
+        cls.df = cls.gtp.parse_transcript(context.transcript_1830())
+
+    def test_concurrent_parsing(self):
+        steps = [vars(st).copy() for st in engine._engine_steps()]
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(
+                lambda raw: (
+                    self.gtp.parse_transcript(raw),
+                    self.gtp.unprocessed_lines()
+                ),
+                [context.transcript_1830()] * 4
+            ))
+        for df, unprocessed in results:
+            pd.testing.assert_frame_equal(self.df, df)
+            self.assertEqual([], unprocessed)
+        self.assertEqual(
+            steps, [vars(st) for st in engine._engine_steps()]
+        )
+
+    def test_skipped_lines(self):
+        skipped = list(self.gtp.skipped_lines())
+        self.gtp.parse_transcript(context.transcript_1830())
+        self.assertEqual(skipped, self.gtp.skipped_lines())
+
+    def test_generate_again(self):
+        df = parsing.TranscriptPostProcessor(self.df, Game1830()).process()
+        gsp = parsing.GameStateProcessor(df, Game1830(), collect_changes=True)
+        expected = gsp.generate()
+        summary = gsp.summary()
+        changes = gsp.changes()
+        pd.testing.assert_frame_equal(expected, gsp.generate())
+        pd.testing.assert_frame_equal(summary, gsp.summary())
+        pd.testing.assert_frame_equal(changes, gsp.changes())
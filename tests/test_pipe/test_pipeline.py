@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest.mock
+import pandas as pd
+
+from transcripts18xx.pipe import parsing, pipeline
+from transcripts18xx.games import Game1830, Game1889
+
+from tests import context
+
+
+def _sequential(raw, game) -> tuple:
+    # Runs the stages one after the other.
+    parsed = parsing.GameTranscriptProcessor(game).parse_transcript(raw)
+    processed = parsing.TranscriptPostProcessor(parsed, game).process()
+    gsp = parsing.GameStateProcessor(
+        processed, game, collect_changes=True
+    )
+    return parsed, processed, gsp.generate(), gsp
+
+
+class TestPipelinedProcessor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.expected = {
+            '1830': _sequential(context.transcript_1830(), Game1830()),
+            '1889': _sequential(context.transcript_1889(), Game1889())
+        }
+
+    def _assert_same(self, game: str, pp: pipeline.PipelinedProcessor,
+                     df: pd.DataFrame):
+        parsed, processed, expected, gsp = self.expected[game]
+        pd.testing.assert_frame_equal(parsed, pp.parsed()['df'])
+        pd.testing.assert_frame_equal(processed, pp.processed()['df'])
+        pd.testing.assert_frame_equal(expected, df)
+        pd.testing.assert_frame_equal(
+            gsp.summary(), pp.state_processor().summary()
+        )
+        pd.testing.assert_frame_equal(
+            gsp.changes(), pp.state_processor().changes()
+        )
+
+    def test_generate_1830(self):
+        pp = pipeline.PipelinedProcessor(
+            context.transcript_1830(), Game1830(), collect_changes=True
+        )
+        self._assert_same('1830', pp, pp.generate())
+
+    def test_generate_1889(self):
+        pp = pipeline.PipelinedProcessor(
+            context.transcript_1889(), Game1889(), collect_changes=True
+        )
+        self._assert_same('1889', pp, pp.generate())
+
+    def test_small_chunks(self):
+        pp = pipeline.PipelinedProcessor(
+            context.transcript_1830(), Game1830(), chunk_size=7, queue_size=1,
+            collect_changes=True
+        )
+        self._assert_same('1830', pp, pp.generate())
+
+    def test_fallback(self):
+        pp = pipeline.PipelinedProcessor(
+            context.transcript_1889(), Game1889(), collect_changes=True
+        )
+        with unittest.mock.patch.object(
+                parsing.GameStateProcessor, 'replay',
+                side_effect=ValueError('replay failed')
+        ):
+            df = pp.generate()
+        self._assert_same('1889', pp, df)
+
+    def test_parse_error(self):
+        pp = pipeline.PipelinedProcessor(
+            context.transcript_1830().with_name('1830_0.txt'), Game1830()
+        )
+        with self.assertRaises(FileNotFoundError):
+            pp.generate()
+
+
+class TestParseChunks(unittest.TestCase):
+
+    def test_parse_chunks(self):
+        gtp = parsing.GameTranscriptProcessor(Game1830())
+        chunks = list(gtp.parse_chunks(context.transcript_1830(), 500))
+        self.assertEqual([500, 500, 346], [len(c) for c in chunks])
+        self.assertEqual([], gtp.unprocessed_lines())
+        parsed = pd.DataFrame([r for c in chunks for r in c])
+        pd.testing.assert_frame_equal(
+            gtp.parse_transcript(context.transcript_1830()), parsed
+        )
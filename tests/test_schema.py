@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from transcripts18xx import schema, transcript
+from transcripts18xx.games import Game1830, Game1889
+
+from tests import context
+
+
+class TestSchema(unittest.TestCase):
+
+    def test_state_schema(self):
+        state = schema.state_schema(Game1830(), 4)
+        self.assertEqual(4 * 12 + 8 * 12, len(state))
+        self.assertEqual('player1_cash', list(state)[0])
+        self.assertEqual('PRR_trains_D', list(state)[-1])
+        self.assertEqual('bool', state['player2_priority_deal'])
+        self.assertEqual('object', state['NYC_president'])
+        self.assertEqual('int64', state['B&O_trains_3'])
+
+    def test_final_schema(self):
+        for raw, game in [
+            (context.transcript_1830(), Game1830()),
+            (context.transcript_1889(), Game1889())
+        ]:
+            cnt = transcript.TranscriptContext.from_raw(raw)
+            final = schema.final_schema(game, cnt.num_players)
+            df = cnt.result()
+            self.assertEqual(final, df.dtypes.astype(str).to_dict())
+
+    def test_summary_schema(self):
+        summary = schema.summary_schema(Game1889(), 6)
+        self.assertEqual(
+            ['id', 'sequence', 'major_round', 'phase', 'type'],
+            list(summary)[:5]
+        )
+        self.assertEqual(5 + 6 * 11 + 7 * 12, len(summary))
+
+    def test_conform(self):
+        df = pd.DataFrame({
+            'rotation': ['1', np.nan],
+            'phase': [2, 'D'],
+            'id': [1.0, 2.0],
+        })
+        dtypes = {'id': 'int64', 'phase': 'object', 'rotation': 'float64'}
+        ret = schema.conform(df, dtypes)
+        self.assertEqual(['rotation', 'phase', 'id'], list(ret.columns))
+        self.assertEqual([1, 2], ret.id.tolist())
+        self.assertEqual(['2', 'D'], ret.phase.tolist())
+        self.assertTrue(np.isnan(ret.rotation[1]))
+
+        with self.assertLogs(schema.logger, 'WARNING'):
+            ret = schema.conform(df, {'id': 'int64'})
+        self.assertEqual([1, 2], ret.id.tolist())
+        self.assertEqual('1', ret.rotation[0])
+        with self.assertRaises(ValueError):
+            schema.conform(df, dtypes | {'tile': 'object'})
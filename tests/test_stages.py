@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import shutil
+import tempfile
+import unittest.mock
+
+from pathlib import Path
+
+import pandas as pd
+
+from transcripts18xx import fingerprint, games, stages, transcript
+from transcripts18xx.pipe import parsing, pipeline
+
+from tests import context
+
+
+class TestStageCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = stages.StageCache(Path(self.tmp.name).joinpath('cache'))
+        self.data = {'df': pd.DataFrame({'a': [1, 2]}), 'lines': ['x']}
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_save_load(self):
+        self.assertIsNone(self.cache.load('1830_1', 'parsed', 'key'))
+        self.cache.save('1830_1', 'parsed', 'key', self.data)
+        data = self.cache.load('1830_1', 'parsed', 'key')
+        pd.testing.assert_frame_equal(self.data['df'], data['df'])
+        self.assertEqual(['x'], data['lines'])
+        self.assertEqual(
+            ['1830_1_parsed.pkl'],
+            [f.name for f in self.cache.path.iterdir()]
+        )
+
+    def test_key_mismatch(self):
+        self.cache.save('1830_1', 'parsed', 'key', self.data)
+        self.assertIsNone(self.cache.load('1830_1', 'parsed', 'other'))
+        self.assertIsNone(self.cache.load('1830_1', 'processed', 'key'))
+
+    def test_unreadable(self):
+        self.cache.path.joinpath('1830_1_parsed.pkl').write_bytes(b'broken')
+        self.assertIsNone(self.cache.load('1830_1', 'parsed', 'key'))
+
+    def test_stage_key(self):
+        game = games.Game1830()
+        parsed = stages.stage_key('parsed', game, 'abc')
+        processed = stages.stage_key('processed', game, 'abc')
+        self.assertTrue(parsed.startswith('abc:'))
+        self.assertNotEqual(parsed, processed)
+        self.assertNotEqual(
+            processed, stages.stage_key('processed', games.Game1889(), 'abc')
+        )
+        with self.assertRaises(ValueError):
+            fingerprint.stage_fingerprint('replayed', game)
+
+
+class TestResume(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.raw = Path(shutil.copy(context.transcript_1830(), cls.tmp.name))
+        cls.cache = stages.StageCache(Path(cls.tmp.name).joinpath('cache'))
+        cls.metadata = cls._parse()
+        cls.result = transcript.TranscriptContext.from_raw(cls.raw).result()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    @classmethod
+    def _parse(cls) -> dict:
+        return transcript.TranscriptParser(
+            cls.raw, games.Game1830(), stage_cache=cls.cache
+        ).parse()
+
+    def test_resume_processed(self):
+        with unittest.mock.patch.object(
+                parsing.GameTranscriptProcessor, 'parse_transcript'
+        ) as parse, unittest.mock.patch.object(
+            parsing.TranscriptPostProcessor, 'process'
+        ) as process:
+            metadata = self._parse()
+        parse.assert_not_called()
+        process.assert_not_called()
+        self.assertEqual(self.metadata, metadata)
+        pd.testing.assert_frame_equal(
+            self.result,
+            transcript.TranscriptContext.from_raw(self.raw).result()
+        )
+
+    def test_resume_parsed(self):
+        self.cache.path.joinpath('1830_201210_processed.pkl').unlink()
+        with unittest.mock.patch.object(
+                parsing.GameTranscriptProcessor, 'parse_transcript'
+        ) as parse:
+            metadata = self._parse()
+        parse.assert_not_called()
+        self.assertEqual(self.metadata, metadata)
+        self.assertTrue(
+            self.cache.path.joinpath('1830_201210_processed.pkl').exists()
+        )
+
+    def test_pipelined(self):
+        cache = stages.StageCache(Path(self.tmp.name).joinpath('pipelined'))
+        metadata = transcript.TranscriptParser(
+            self.raw, games.Game1830(), stage_cache=cache, pipelined=True
+        ).parse()
+        self.assertEqual(self.metadata, metadata)
+        pd.testing.assert_frame_equal(
+            self.result,
+            transcript.TranscriptContext.from_raw(self.raw).result()
+        )
+        for stage in stages.STAGES:
+            self.assertTrue(
+                cache.path.joinpath(f'1830_201210_{stage}.pkl').exists()
+            )
+        with unittest.mock.patch.object(
+                pipeline.PipelinedProcessor, 'generate'
+        ) as generate:
+            metadata = transcript.TranscriptParser(
+                self.raw, games.Game1830(), stage_cache=cache, pipelined=True
+            ).parse()
+        generate.assert_not_called()
+        self.assertEqual(self.metadata, metadata)
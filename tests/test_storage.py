@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import importlib.util
+import os
+import shutil
+import stat
+import tempfile
+import unittest.mock
+
+from pathlib import Path
+
+import pandas as pd
+
+from transcripts18xx import storage, transcript
+
+from tests import context
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+class TestAtomicFile(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.file = Path(self.tmp.name).joinpath('file.txt')
+        self.file.write_text('old')
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_replace(self):
+        with storage.atomic_file(self.file) as tmp:
+            tmp.write_text('new')
+            self.assertEqual('old', self.file.read_text())
+        self.assertEqual('new', self.file.read_text())
+        self.assertEqual([self.file], list(self.file.parent.iterdir()))
+
+    def test_failure(self):
+        with self.assertRaises(RuntimeError):
+            with storage.atomic_file(self.file) as tmp:
+                tmp.write_text('new')
+                raise RuntimeError('crash')
+        self.assertEqual('old', self.file.read_text())
+        self.assertEqual([self.file], list(self.file.parent.iterdir()))
+
+    def test_mode(self):
+        umask = os.umask(0o022)
+        try:
+            file = self.file.with_name('new.txt')
+            with storage.atomic_file(file) as tmp:
+                tmp.write_text('new')
+            self.assertEqual(0o644, stat.S_IMODE(file.stat().st_mode))
+            os.chmod(self.file, 0o640)
+            with storage.atomic_file(self.file) as tmp:
+                tmp.write_text('new')
+            self.assertEqual(0o640, stat.S_IMODE(self.file.stat().st_mode))
+        finally:
+            os.umask(umask)
+
+    def test_mode_umask_unchanged(self):
+        file = self.file.with_name('new.txt')
+        with unittest.mock.patch('os.umask') as mock_umask:
+            with storage.atomic_file(file) as tmp:
+                tmp.write_text('new')
+        mock_umask.assert_not_called()
+        umask = storage._read_umask()
+        if umask is not None:
+            self.assertEqual(
+                0o666 & ~umask, stat.S_IMODE(file.stat().st_mode)
+            )
+
+
+class TestStorageFormat(unittest.TestCase):
+
+    def test_backend(self):
+        self.assertIsInstance(
+            storage.StorageFormat.CSV.backend(), storage.CsvBackend
+        )
+        self.assertIsInstance(
+            storage.StorageFormat.PARQUET.backend(), storage.ParquetBackend
+        )
+        self.assertIsInstance(
+            storage.StorageFormat.FEATHER.backend(), storage.FeatherBackend
+        )
+
+    def test_backend_from_file(self):
+        backend = storage.backend(Path('1830_123_final.parquet'))
+        self.assertIsInstance(backend, storage.ParquetBackend)
+
+        with self.assertRaises(ValueError):
+            storage.backend(Path('1830_123_final.xlsx'))
+
+    def test_default_format(self):
+        self.assertEqual(storage.StorageFormat.CSV, storage.default_format())
+        storage.set_default_format(storage.StorageFormat.FEATHER)
+        self.assertEqual(
+            storage.StorageFormat.FEATHER, storage.default_format()
+        )
+        storage.set_default_format(storage.StorageFormat.CSV)
+
+
+class TestStorageBackends(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({
+            'sequence': ['SR 1'] * 3 + ['OR 1.1'] * 4 + ['SR 2'] * 2,
+            'cash': [float(i) for i in range(9)],
+            'president': ['p0', 'p1', 'p2'] * 3
+        })
+        self.row_groups = [[0, 3], [3, 7], [7, 9]]
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def roundtrip(self, storage_format: storage.StorageFormat):
+        file = Path(self.tmp.name).joinpath('result' + storage_format.value)
+        backend = storage_format.backend()
+        backend.write(file, self.df, self.row_groups)
+        pd.testing.assert_frame_equal(self.df, backend.read(file))
+        rows = backend.read_rows(file, 3, 7)
+        self.assertEqual(list(range(3, 7)), list(rows.index))
+        self.assertEqual({'OR 1.1'}, set(rows.sequence))
+        self.assertEqual([3.0, 4.0, 5.0, 6.0], rows.cash.tolist())
+        self.assertEqual(list(self.df.columns), backend.columns(file))
+        pd.testing.assert_frame_equal(
+            self.df[['president', 'cash']],
+            backend.read(file, ['president', 'cash'])
+        )
+        return file
+
+    def test_csv(self):
+        self.roundtrip(storage.StorageFormat.CSV)
+
+    @unittest.skipUnless(HAS_PYARROW, 'requires pyarrow')
+    def test_parquet(self):
+        file = self.roundtrip(storage.StorageFormat.PARQUET)
+        pq = importlib.import_module('pyarrow.parquet')
+        self.assertEqual(3, pq.ParquetFile(file).num_row_groups)
+
+    @unittest.skipUnless(HAS_PYARROW, 'requires pyarrow')
+    def test_feather(self):
+        self.roundtrip(storage.StorageFormat.FEATHER)
+
+    def test_resolve(self):
+        file = Path(self.tmp.name).joinpath('result.csv')
+        self.assertEqual(file, storage.resolve(file))
+
+        feather = file.with_suffix('.feather')
+        feather.touch()
+        self.assertEqual(feather, storage.resolve(file))
+
+        file.touch()
+        self.assertEqual(file, storage.resolve(feather))
+
+        with unittest.mock.patch.object(
+                storage.os, 'stat', side_effect=AssertionError
+        ):
+            self.assertEqual(feather, storage.resolve(file, {feather.name}))
+
+        # The most recent format is used, an older one does not shadow it.
+        os.utime(file, ns=(1_000_000_000, 1_000_000_000))
+        self.assertEqual(feather, storage.resolve(file))
+        self.assertEqual(
+            feather, storage.resolve(file, {file.name, feather.name})
+        )
+
+
+@unittest.skipUnless(HAS_PYARROW, 'requires pyarrow')
+class TestTranscriptStorage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.raw = Path(cls.tmp.name).joinpath(context.transcript_1830().name)
+        shutil.copy(context.transcript_1830(), cls.raw)
+        tp = transcript.TranscriptParser(
+            cls.raw, transcript.games.Game1830(),
+            storage_format=storage.StorageFormat.PARQUET
+        )
+        tp.parse()
+        cls.cnt = transcript.TranscriptContext.from_raw(cls.raw)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def test_result_path(self):
+        self.assertEqual('1830_201210_final.parquet', self.cnt.result_path.name)
+        self.assertEqual(
+            '1830_201210_summary.parquet', self.cnt.summary_path.name
+        )
+
+    def test_format_switch(self):
+        raw = Path(self.tmp.name).joinpath('switch', self.raw.name)
+        raw.parent.mkdir()
+        shutil.copy(self.raw, raw)
+        for storage_format in [
+            storage.StorageFormat.CSV, storage.StorageFormat.PARQUET
+        ]:
+            transcript.TranscriptParser(
+                raw, transcript.games.Game1830(),
+                storage_format=storage_format
+            ).parse()
+        cnt = transcript.TranscriptContext.from_raw(raw)
+        self.assertEqual('1830_201210_final.parquet', cnt.result_path.name)
+        pd.testing.assert_frame_equal(self.cnt.result(), cnt.result())
+
+    def test_result(self):
+        df = self.cnt.result()
+        self.assertEqual((1346, 166), df.shape)
+        self.assertEqual(31, self.cnt.summary().shape[0])
+
+    def test_row_groups(self):
+        pq = importlib.import_module('pyarrow.parquet')
+        num_row_groups = pq.ParquetFile(self.cnt.result_path).num_row_groups
+        self.assertEqual(len(self.cnt.index['sequence']), num_row_groups)
+
+    def test_rows_for_round(self):
+        df = self.cnt.rows_for_round('OR 4.2')
+        self.assertEqual(list(range(355, 403)), list(df.index))
+        self.assertEqual({'OR 4.2'}, set(df.sequence))
@@ -1,10 +1,14 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import io
+import shutil
+import tempfile
 import unittest.mock
 import pandas as pd
 
-from transcripts18xx import transcript
+from pathlib import Path
+
+from transcripts18xx import cache, fingerprint, transcript
 
 from tests import context
 
@@ -15,11 +19,12 @@ class TestTranscriptParserG1830(unittest.TestCase):
     def setUpClass(cls) -> None:
         raw_transcript = context.transcript_1830()
         tp = transcript.TranscriptParser(
-            raw_transcript, transcript.games.Game1830()
+            raw_transcript, transcript.games.Game1830(), export_changes=True
         )
         tp.parse()
         cls.df = tp._df
         cls.metadata = tp._metadata
+        cls.changes = tp._changes
 
     def test_player_mapping(self):
         expected = {
@@ -37,6 +42,13 @@ class TestTranscriptParserG1830(unittest.TestCase):
         self.assertFalse('mpakfm' in df.values)
         self.assertFalse('riverfiend' in df.values)
 
+        changes = self.changes.astype(str)
+        self.assertFalse('leesin' in changes.values)
+        self.assertEqual(
+            {'player1', 'player2', 'player3', 'player4'},
+            set(changes.entity) - transcript.games.Game1830().companies
+        )
+
     def test_last_state_evaluation(self):
         expected_finish = 'BankBroke'
         self.assertEqual(expected_finish, self.metadata['finished'])
@@ -55,6 +67,14 @@ class TestTranscriptParserG1830(unittest.TestCase):
         self.assertEqual('1830', self.metadata['game'])
         self.assertEqual('201210', self.metadata['id'])
         self.assertEqual(4, self.metadata['num_players'])
+        self.assertEqual(
+            fingerprint.transcript_hash(context.transcript_1830()),
+            self.metadata['transcript_hash']
+        )
+        self.assertEqual(
+            fingerprint.engine_fingerprint(transcript.games.Game1830()),
+            self.metadata['engine_fingerprint']
+        )
 
 
 class TestTranscriptParserG1889(unittest.TestCase):
@@ -124,6 +144,57 @@ class TestTranscriptParserG1889(unittest.TestCase):
     #     self.assertTrue(transcript.full_verification(context.transcript_1889()))
 
 
+class TestAnonymization(unittest.TestCase):
+
+    def test_anonymize_dataframe(self):
+        df = pd.DataFrame({
+            'player': ['Al', 'Alice', None],
+            'result': ["{'Al': 1}", None, None],
+            'PRR_president': [None, 'Alice', 'Al'],
+            'Al_cash': [1, 2, 3],
+            'Alice_cash': [4, 5, 6],
+            'Alice_shares_PRR': [0, 1, 2]
+        })
+        mapping = {'Alice': 'player1', 'Al': 'player2'}
+        transcript._anonymize_dataframe(df, mapping)
+        self.assertEqual(
+            ['player', 'result', 'PRR_president', 'player2_cash',
+             'player1_cash', 'player1_shares_PRR'],
+            list(df.columns)
+        )
+        self.assertEqual(['player2', 'player1', None], df.player.tolist())
+        self.assertEqual(
+            [None, 'player1', 'player2'], df.PRR_president.tolist()
+        )
+        self.assertEqual("{'Al': 1}", df.result.iloc[0])
+
+    def test_replace(self):
+        obj = {
+            'Al': {'cash': 1, 'name': 'Al and Alice'},
+            'Alice': ['Al', 'Alice', 2],
+            3: None
+        }
+        mapping = {'Al': 'player2', 'Alice': 'player1'}
+        self.assertEqual(
+            {
+                'player2': {'cash': 1, 'name': 'player2 and player1'},
+                'player1': ['player2', 'player1', 2],
+                3: None
+            },
+            transcript._replace(obj, mapping)
+        )
+
+    def test_replace_once(self):
+        mapping = {'player1': 'player10', 'player10': 'player1'}
+        self.assertEqual(
+            ['player10', 'player1', 'player10 player1'],
+            transcript._replace(
+                ['player1', 'player10', 'player1 player10'], mapping
+            )
+        )
+        self.assertEqual({'a': 1}, transcript._replace({'a': 1}, {}))
+
+
 class TestTranscriptContext(unittest.TestCase):
 
     def setUp(self) -> None:
@@ -135,6 +206,12 @@ class TestTranscriptContext(unittest.TestCase):
         self.assertEqual('1830_201210.txt', self.cnt.raw.name)
         self.assertEqual('1830_201210_metadata.json', self.cnt.meta_path.name)
         self.assertEqual('1830_201210_final.csv', self.cnt.result_path.name)
+        self.assertEqual(
+            '1830_201210_summary.csv', self.cnt.summary_path.name
+        )
+        self.assertEqual(
+            '1830_201210_changes.csv', self.cnt.changes_path.name
+        )
         self.assertEqual(201210, self.cnt.game_id)
         self.assertEqual('1830', self.cnt.game_type)
         self.assertTrue(self.cnt.valid)
@@ -148,13 +225,242 @@ class TestTranscriptContext(unittest.TestCase):
     def test_metadata(self):
         metadata = self.cnt.metadata()
         self.assertIsInstance(metadata, dict)
-        self.assertEqual(11, len(metadata.keys()))
+        self.assertEqual(17, len(metadata.keys()))
+
+    def test_read_metadata(self):
+        self.assertEqual(
+            self.cnt.metadata(),
+            transcript.read_metadata(context.transcript_1830())
+        )
+        with self.assertRaises(FileNotFoundError):
+            transcript.read_metadata(
+                context.transcript_1830().with_name('1830_1.txt')
+            )
 
     def test_result(self):
         df = self.cnt.result()
         self.assertIsInstance(df, pd.DataFrame)
         self.assertEqual(1346, df.shape[0])
         self.assertEqual(166, df.shape[1])
+        self.assertEqual('int64', df.player1_privates.dtype)
+
+    def test_result_legacy(self):
+        # Outputs written before the schema are read with inferred types.
+        cnt = transcript.TranscriptContext.from_raw(
+            context.transcript_1830().parent.joinpath(
+                'legacy', '1830_201210.txt'
+            )
+        )
+        self.assertIsNone(cnt.schema_version)
+        df = cnt.result()
+        self.assertEqual(1346, df.shape[0])
+        self.assertEqual('{}', df.player1_privates.iloc[0])
+        self.assertFalse(cnt.rows_for_phase('2').empty)
+
+    def test_result_columns(self):
+        df = self.cnt.result(columns=['id', 'sequence'])
+        self.assertEqual(['id', 'sequence'], list(df.columns))
+        self.assertEqual(1346, df.shape[0])
+
+        df = self.cnt.result(fields=['cash'])
+        self.assertEqual(12, df.shape[1])
+        self.assertTrue(all(col.endswith('_cash') for col in df.columns))
+
+        df = self.cnt.result(players=['player1'])
+        self.assertEqual(12, df.shape[1])
+        self.assertIn('player1_shares_B&O', df.columns)
+
+        df = self.cnt.result(
+            columns=['id'], companies=['PRR'], fields=['trains', 'president']
+        )
+        self.assertEqual(
+            ['id', 'PRR_president', 'PRR_trains_2', 'PRR_trains_3',
+             'PRR_trains_4', 'PRR_trains_5', 'PRR_trains_6', 'PRR_trains_D'],
+            list(df.columns)
+        )
+        result = self.cnt.result()
+        pd.testing.assert_series_equal(result.PRR_trains_D, df.PRR_trains_D)
+
+    def test_index(self):
+        self.assertEqual(
+            ['phase', 'sequence', 'major_round'], list(self.cnt.index.keys())
+        )
+        self.assertEqual([355, 403], self.cnt.index['sequence']['OR 4.2'])
+        self.assertEqual([835, 1346], self.cnt.index['phase']['D'])
+
+    def test_rows_for_round(self):
+        df = self.cnt.rows_for_round('OR 4.2')
+        result = self.cnt.result()
+        expected = result[result.sequence == 'OR 4.2']
+        pd.testing.assert_frame_equal(expected, df)
+
+    def test_rows_for_major_round(self):
+        df = self.cnt.rows_for_major_round('OR 6')
+        self.assertEqual({'OR 6'}, set(df.major_round))
+        self.assertEqual(
+            {'OR 6.1', 'OR 6.2', 'OR 6.3'}, set(df.sequence.unique())
+        )
+
+    def test_rows_for_phase(self):
+        df = self.cnt.rows_for_phase('3')
+        self.assertEqual(116, df.shape[0])
+        self.assertEqual(210, df.index[0])
+        self.assertEqual({'3'}, set(df.phase.astype(str)))
+
+    def test_changes(self):
+        df = self.cnt.changes()
+        self.assertEqual(['id', 'entity', 'field', 'value'], list(df.columns))
+        self.assertEqual(1733, df.shape[0])
+        self.assertEqual('600', df.value.iloc[0])
+        self.assertFalse(df.value.fillna('').str.endswith('.0').any())
+        president = df[(df.entity == 'PRR') & (df.field == 'president')]
+        self.assertEqual('player3', president.value.iloc[-1])
+
+    def test_summary(self):
+        df = self.cnt.summary()
+        self.assertIsInstance(df, pd.DataFrame)
+        self.assertEqual(31, df.shape[0])
+        self.assertEqual(149, df.shape[1])
+        self.assertEqual('GameOver', df.type.iloc[-1])
+        self.assertIn('player1_value', df.columns)
+
+
+class TestLazyTranscriptContext(unittest.TestCase):
+
+    def setUp(self) -> None:
+        cache.default_cache().clear()
+        self.cnt = transcript.LazyTranscriptContext(context.transcript_1830())
+        self.expected = transcript.TranscriptContext.from_raw(
+            context.transcript_1830()
+        )
+
+    def tearDown(self) -> None:
+        cache.default_cache().clear()
+
+    def test_fields(self):
+        self.assertEqual(0, len(cache.default_cache()))
+        self.assertEqual(self.expected.game_id, self.cnt.game_id)
+        self.assertEqual(self.expected.winner, self.cnt.winner)
+        self.assertEqual(self.expected.index, self.cnt.index)
+        self.assertEqual(self.expected, self.cnt.context())
+        self.assertIs(self.cnt.context(), self.cnt.context())
+
+    def test_result(self):
+        pd.testing.assert_frame_equal(
+            self.expected.result(), self.cnt.result()
+        )
+        pd.testing.assert_frame_equal(
+            self.expected.rows_for_round('OR 4.2'),
+            self.cnt.rows_for_round('OR 4.2')
+        )
+        pd.testing.assert_frame_equal(
+            self.expected.result(fields=['cash']),
+            self.cnt.result(fields=['cash'])
+        )
+        self.assertEqual(self.expected.metadata(), self.cnt.metadata())
+
+    def test_cached(self):
+        df = self.cnt.result()
+        entries = len(cache.default_cache())
+        df.drop(columns=['id'], inplace=True)
+        with unittest.mock.patch.object(
+                transcript.storage.CsvBackend, 'read'
+        ) as read:
+            result = self.cnt.result()
+        read.assert_not_called()
+        self.assertIn('id', result.columns)
+        self.assertEqual(entries, len(cache.default_cache()))
+
+    def test_invalidation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            raw = Path(tmp).joinpath(context.transcript_1830().name)
+            shutil.copy(context.transcript_1830(), raw)
+            meta = transcript._metadata_path(raw)
+            shutil.copy(self.expected.meta_path, meta)
+            cnt = transcript.LazyTranscriptContext(raw)
+            self.assertEqual('player1', cnt.winner)
+
+            metadata = self.expected.metadata()
+            metadata['winner'] = 'player2'
+            transcript._write_json(meta, metadata)
+            # Fields are read from the current context until revalidated.
+            self.assertEqual('player1', cnt.winner)
+            self.assertEqual('player2', cnt.context().winner)
+            self.assertEqual('player2', cnt.winner)
+            self.assertEqual('player2', cnt.metadata()['winner'])
+
+    def test_field_reads(self):
+        self.cnt.context()
+        with unittest.mock.patch.object(
+                transcript.os, 'stat', side_effect=AssertionError
+        ), unittest.mock.patch.object(
+            Path, 'exists', side_effect=AssertionError
+        ):
+            self.assertEqual(self.expected.game_id, self.cnt.game_id)
+            self.assertEqual(self.expected.winner, self.cnt.winner)
+
+
+class TestLoadDirectory(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = context.transcript_1830().parent
+
+    def test_load_directory(self):
+        contexts = transcript.TranscriptContext.load_directory(self.directory)
+        self.assertEqual(2, len(contexts))
+        self.assertEqual(
+            transcript.TranscriptContext.from_raw(context.transcript_1830()),
+            contexts[0]
+        )
+        self.assertEqual(
+            transcript.TranscriptContext.from_raw(context.transcript_1889()),
+            contexts[1]
+        )
+
+    def test_no_stat_calls(self):
+        with unittest.mock.patch.object(
+                Path, 'exists', side_effect=AssertionError
+        ), unittest.mock.patch.object(
+            transcript.os, 'stat', side_effect=AssertionError
+        ):
+            contexts = transcript.TranscriptContext.load_directory(
+                self.directory
+            )
+        self.assertEqual(
+            ['1830_201210_truth.json', '1889_192767_truth.json'],
+            [cnt.truth_path.name for cnt in contexts]
+        )
+
+    def test_group_files(self):
+        groups = transcript._group_files({
+            '1830_1.txt.gz', '1830_1_metadata.json', '1830_1_final.csv',
+            '1830_1_truth.json', '1830_12.txt'
+        })
+        self.assertEqual(
+            {'1830_1.txt.gz', '1830_1_metadata.json', '1830_1_final.csv',
+             '1830_1_truth.json'},
+            groups['1830_1']
+        )
+        self.assertEqual({'1830_12.txt'}, groups['1830_12'])
+
+    def test_game(self):
+        contexts = transcript.TranscriptContext.load_directory(
+            self.directory, game='1889'
+        )
+        self.assertEqual([192767], [cnt.game_id for cnt in contexts])
+
+    def test_valid_only(self):
+        contexts = transcript.TranscriptContext.load_directory(
+            self.directory, valid_only=True
+        )
+        self.assertEqual([201210], [cnt.game_id for cnt in contexts])
+
+    def test_lazy(self):
+        contexts = transcript.TranscriptContext.load_directory(
+            self.directory, lazy=True
+        )
+        self.assertNotIsInstance(contexts, list)
+        self.assertEqual(2, len(list(contexts)))
 
 
 class TestTranscriptVerification(unittest.TestCase):
@@ -1,14 +1,61 @@
+"""Preprocessing of game transcripts from 18xx.games
+
+The package imports pandas and the engine on first use, such that reading the
+metadata of parsed transcripts does not pay their import time. The members
+depending on them are imported when accessed, see `_LAZY_MEMBERS`.
+"""
+import importlib
+
 from .games import Games, Game18xx, Game1830, Game1889
-from .transcript import TranscriptParser, TranscriptContext, full_verification
-from .engine.steps.step import StepType
+from .transcript import (
+    TranscriptParser, TranscriptContext, LazyTranscriptContext,
+    full_verification
+)
+from .storage import StorageFormat
+from .compression import Compression
+from .catalog import Catalog
+from .stages import StageCache
 
+# Members imported on first access, by the module defining them.
+_LAZY_MEMBERS = {
+    'StepType': '.engine.steps.step',
+    'Corpus': '.corpus',
+    'CorpusWriter': '.corpus'
+}
+
+# The lazy members are defined by `__getattr__` on access, also on star
+# imports, which pylint cannot infer.
+# pylint: disable=undefined-all-variable
 __all__ = [
     "Games",
     "TranscriptParser",
     "TranscriptContext",
+    "LazyTranscriptContext",
     "StepType",
+    "StorageFormat",
+    "Compression",
+    "Corpus",
+    "CorpusWriter",
+    "Catalog",
+    "StageCache",
     "full_verification",
     "Game18xx",
     "Game1830",
     "Game1889"
 ]
+# pylint: enable=undefined-all-variable
+
+
+def __getattr__(name: str):
+    # Imports the lazy members on first access.
+    if name not in _LAZY_MEMBERS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    member = getattr(
+        importlib.import_module(_LAZY_MEMBERS[name], __name__), name
+    )
+    globals()[name] = member
+    return member
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_MEMBERS))
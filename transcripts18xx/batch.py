@@ -0,0 +1,565 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Batch parsing
+
+Module implements parsing many transcripts on a pool of worker processes. The
+transcripts are discovered in a directory or by a glob pattern and their game
+is inferred from the file name, e.g. `1830_123.txt`. The workers are started
+once and parse transcripts until the batch is done, such that the package is
+imported once per worker instead of once per transcript. Failures of single
+transcripts are recorded in their result and do not stop the batch. Workers
+which die or exceed the timeout are killed and replaced.
+
+The progress can be recorded in a journal, such that an interrupted batch is
+resumed without parsing the finished transcripts again. Transcripts which
+were interrupted repeatedly, e.g. by running out of memory, are recorded as
+failed after `MAX_ATTEMPTS`.
+
+Transcripts are skipped if their outputs are up-to-date, i.e. the transcript
+hash and the engine fingerprint recorded in their metadata match, see
+`fingerprint`. If only the engine changed, e.g. by a new pattern, the batch can
+be restricted to transcripts with unprocessed lines or failed parse results.
+"""
+import collections
+import dataclasses
+import glob
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+
+from pathlib import Path
+from typing import Iterator
+
+from . import compression, fingerprint, games, stages, storage
+from .transcript import (
+    TranscriptContext, TranscriptParser, ProcessingResult, _is_transcript,
+    _scan_directory, _transcript_name, output_options, read_metadata
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of started attempts of a transcript until it is recorded as failed.
+MAX_ATTEMPTS = 3
+
+# Seconds to wait for a result of the workers before checking them again.
+POLL_INTERVAL = 0.5
+
+
+@dataclasses.dataclass(frozen=True)
+class BatchResult:
+    """BatchResult
+
+    Class describes the result of parsing one transcript of a batch.
+    """
+    transcript: str
+    game_type: str
+    game_id: int
+    parse_result: str
+    verification_result: bool | None
+    valid: bool
+    num_unprocessed_lines: int
+    seconds: float
+    skipped: bool = False
+
+
+def discover(source: Path | str, game: str | None = None) -> list[Path]:
+    """Discovers the raw transcripts in a directory or by a glob pattern.
+
+    Args:
+        source: The directory of the transcripts or a glob pattern, e.g.
+            `transcripts/1830_*.txt`.
+        game: The game type to discover, e.g. `1830`. If None, all games are
+            discovered.
+
+    Returns:
+        The raw transcripts, ordered by their path.
+    """
+    source = Path(source)
+    if source.is_dir():
+        names = _scan_directory(source)
+        files = [source.joinpath(name) for name in names]
+    else:
+        files = [Path(file) for file in glob.glob(str(source))]
+    return sorted(
+        file for file in files if
+        file.is_file() and _is_transcript(file.name, game)
+    )
+
+
+def infer_game(transcript: Path) -> games.Games:
+    """Infers the game from the transcript name, e.g. `1830_123.txt`.
+
+    Args:
+        transcript: The raw transcript path.
+
+    Returns:
+        The game enum member.
+
+    Raises:
+        ValueError: If the game is not implemented.
+    """
+    game_type = _transcript_name(transcript).split('_')[0]
+    try:
+        return games.Games.argparse(f'G{game_type}')
+    except ValueError as e:
+        raise ValueError(f'Unknown game: {game_type}') from e
+
+
+def is_up_to_date(transcript: Path, game: games.Game18xx,
+                  unprocessed_only: bool = False,
+                  options: dict | None = None) -> bool:
+    """Checks if the outputs of a transcript are up-to-date.
+
+    The outputs are up-to-date if they exist in the requested format and the
+    transcript hash, the engine fingerprint and the output options match the
+    ones recorded in the metadata. Outputs with the state changes satisfy a
+    request without them.
+
+    Args:
+        transcript: The raw transcript path.
+        game: The underlying 18xx game.
+        unprocessed_only: Consider outputs of an older engine up-to-date, if
+            the transcript was parsed successfully without unprocessed lines.
+        options: The keyword arguments of `TranscriptParser`, of which the
+            storage format, the export of the changes and the output
+            compression are compared.
+
+    Returns:
+        True if parsing the transcript again is not required.
+    """
+    try:
+        meta = read_metadata(transcript)
+    except FileNotFoundError:
+        return False
+    if meta.get('transcript_hash') != fingerprint.transcript_hash(transcript):
+        return False
+    options = options or {}
+    storage_format = (
+        options.get('storage_format') or storage.default_format()
+    )
+    export_changes = options.get('export_changes', False)
+    requested = output_options(
+        storage_format, export_changes, options.get('output_compression')
+    )
+    recorded = meta.get('outputs') or {}
+    if recorded | {'export_changes': export_changes} != requested:
+        return False
+    if export_changes and not recorded.get('export_changes'):
+        return False
+    cnt = TranscriptContext.from_metadata(transcript, meta)
+    outputs = [cnt.result_path, cnt.summary_path]
+    if export_changes:
+        outputs.append(cnt.changes_path)
+    for file in outputs:
+        suffix = compression.strip(file).suffix
+        if suffix != storage_format.value or not file.exists():
+            return False
+    if meta.get('engine_fingerprint') == fingerprint.engine_fingerprint(game):
+        return True
+    success = cnt.parse_result == ProcessingResult.SUCCESS.name
+    return unprocessed_only and success and not cnt.unprocessed_lines
+
+
+def parse_batch(transcripts: list[Path], max_workers: int | None = None,
+                storage_format: storage.StorageFormat | None = None,
+                export_changes: bool = False,
+                output_compression: compression.Compression | None = None,
+                force: bool = False, unprocessed_only: bool = False,
+                stage_cache: stages.StageCache | None = None,
+                journal: Path | None = None, timeout: float | None = None,
+                retry_failed: bool = False) -> list[BatchResult]:
+    """Parses the transcripts on a pool of worker processes.
+
+    With a journal, the transcripts recorded as completed or failed by a
+    previous run are not parsed again, but their recorded result is returned.
+
+    Args:
+        transcripts: The raw transcripts.
+        max_workers: The number of worker processes. If None, the number of
+            processors is used.
+        storage_format: The storage format of the outputs, see
+            `TranscriptParser`.
+        export_changes: Save the state changes, see `TranscriptParser`.
+        output_compression: The compression of the outputs, see
+            `TranscriptParser`.
+        force: Parse all transcripts, also the ones which are up-to-date.
+        unprocessed_only: Parse outdated transcripts only if they have
+            unprocessed lines or failed, see `is_up_to_date`.
+        stage_cache: The cache of the intermediate outputs, see
+            `TranscriptParser`.
+        journal: The journal to record the progress in and resume from, see
+            `Journal`. If None, no progress is recorded.
+        timeout: The maximum time to parse a transcript in seconds, after
+            which its worker is killed. If None, there is no timeout.
+        retry_failed: Parse the transcripts recorded as failed again.
+
+    Returns:
+        The results of the transcripts, in order of the transcripts.
+    """
+    options = {
+        'storage_format': storage_format,
+        'export_changes': export_changes,
+        'output_compression': output_compression,
+        'stage_cache': stage_cache
+    }
+    jrn = None if journal is None else Journal(journal)
+    states = {} if jrn is None else jrn.states()
+    results, todo = {}, []
+    for transcript in transcripts:
+        state = states.get(str(transcript), None)
+        result = _resume(transcript, state, retry_failed)
+        if result is None:
+            todo.append(transcript)
+            continue
+        if state['event'] == 'started':
+            # Aborted after too many interrupted attempts.
+            jrn.record(event_of(result), transcript, result)
+        results[transcript] = result
+    if len(todo) < len(transcripts):
+        logger.info('Resumed %d transcripts from journal', len(results))
+
+    for num_done, (transcript, result) in enumerate(_run_pool(
+            todo, max_workers, timeout, jrn,
+            (options, force, unprocessed_only)
+    ), start=1):
+        results[transcript] = result
+        logger.info(
+            '[%d/%d] %s: %s', num_done, len(todo), transcript.name,
+            result.parse_result
+        )
+    return [results[transcript] for transcript in transcripts]
+
+
+def parse_one(transcript: Path, options: dict | None = None,
+              force: bool = True,
+              unprocessed_only: bool = False) -> BatchResult:
+    """Parses a transcript, inferring its game from its name.
+
+    Args:
+        transcript: The raw transcript path.
+        options: The keyword arguments of `TranscriptParser`.
+        force: Parse the transcript, also if it is up-to-date.
+        unprocessed_only: See `is_up_to_date`.
+
+    Returns:
+        The result of the transcript, the error as parse result if failed.
+    """
+    start = time.perf_counter()
+    try:
+        game = infer_game(transcript).select()
+        skipped = not force and is_up_to_date(
+            transcript, game, unprocessed_only, options
+        )
+        if skipped:
+            metadata = read_metadata(transcript)
+        else:
+            parser = TranscriptParser(transcript, game, **(options or {}))
+            metadata = parser.parse()
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return _failure(transcript, e, time.perf_counter() - start)
+    cnt = TranscriptContext.from_metadata(transcript, metadata)
+    return BatchResult(
+        transcript=str(transcript),
+        game_type=cnt.game_type,
+        game_id=cnt.game_id,
+        parse_result=str(cnt.parse_result),
+        verification_result=cnt.verification_result,
+        valid=cnt.valid,
+        num_unprocessed_lines=len(cnt.unprocessed_lines),
+        seconds=time.perf_counter() - start,
+        skipped=skipped
+    )
+
+
+def summarize(results: list[BatchResult]) -> dict:
+    """Summarizes the results of a batch.
+
+    Args:
+        results: The results of the transcripts.
+
+    Returns:
+        The number of transcripts, skipped, parsed successfully, failed,
+        verified and valid ones and the total time of the parsing in seconds.
+    """
+    success = ProcessingResult.SUCCESS.name
+    return {
+        'transcripts': len(results),
+        'skipped': sum(r.skipped for r in results),
+        'parsed': sum(r.parse_result == success for r in results),
+        'failed': sum(r.parse_result != success for r in results),
+        'verified': sum(bool(r.verification_result) for r in results),
+        'valid': sum(r.valid for r in results),
+        'seconds': round(sum(r.seconds for r in results), 3)
+    }
+
+
+def write_report(results: list[BatchResult], file: Path) -> None:
+    """Writes the results of a batch as CSV with one row per transcript.
+
+    Args:
+        results: The results of the transcripts.
+        file: The report file.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    df = pd.DataFrame(
+        [dataclasses.asdict(r) for r in results],
+        columns=[f.name for f in dataclasses.fields(BatchResult)]
+    )
+    df.to_csv(file, index=False, sep=',')
+
+
+class Journal:
+    """Journal
+
+    Class to record the progress of a batch run in an append-only file of JSON
+    lines. Each line records an event of a transcript, `started`, `completed`
+    or `failed`, the latter ones with the result. Lines are synced to disk
+    when written, such that the journal survives crashes of the run. A
+    partially written last line of a crashed run is ignored.
+
+    Attributes:
+        path: The journal file.
+
+    Args:
+        path: The journal file, created if it does not exist.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        if path.exists() and path.stat().st_size > 0:
+            with open(path, 'rb+') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    # Terminate the partially written line of a crashed run.
+                    f.write(b'\n')
+
+    def record(self, event: str, transcript: Path,
+               result: BatchResult | None = None) -> None:
+        """Appends an event of a transcript.
+
+        Args:
+            event: The event, `started`, `completed` or `failed`.
+            transcript: The raw transcript path.
+            result: The result of the transcript, if completed or failed.
+        """
+        entry = {'event': event, 'transcript': str(transcript)}
+        if result is not None:
+            entry['result'] = dataclasses.asdict(result)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def states(self) -> dict[str, dict]:
+        """Reads the state of each transcript.
+
+        Returns:
+            The last event, the last result and the number of started
+            attempts by transcript path.
+        """
+        states = {}
+        if not self.path.exists():
+            return states
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                state = states.setdefault(
+                    entry['transcript'],
+                    {'event': None, 'result': None, 'attempts': 0}
+                )
+                state['event'] = entry['event']
+                state['result'] = entry.get('result', None)
+                if entry['event'] == 'started':
+                    state['attempts'] += 1
+        return states
+
+
+class Worker:
+    """Worker
+
+    Class to run a worker process, which parses the transcripts it receives
+    on its connection with `parse_one` until it is closed.
+
+    Attributes:
+        conn: The connection to the worker process.
+        process: The worker process.
+        task: The transcript being parsed, None if idle.
+        started: The start time of the task, see `time.perf_counter`.
+
+    Args:
+        context: The multiprocessing context to start the process with.
+        args: The options, force and unprocessed only of `parse_one`.
+    """
+
+    def __init__(self, context, args: tuple):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_work, args=(child, *args), daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.task = None
+        self.started = 0.0
+
+    def submit(self, transcript: Path) -> None:
+        """Sends a transcript to parse.
+
+        Args:
+            transcript: The raw transcript path.
+        """
+        self.task = transcript
+        self.started = time.perf_counter()
+        self.conn.send(transcript)
+
+    def collect(self, timeout: float | None) -> BatchResult | None:
+        """Receives the result of the task without blocking.
+
+        A worker which exceeded the timeout is killed.
+
+        Args:
+            timeout: The maximum time to parse a transcript in seconds. If
+                None, there is no timeout.
+
+        Returns:
+            The result of the task, a failure if the worker died or timed out,
+            None if the task is not done yet.
+        """
+        seconds = time.perf_counter() - self.started
+        if self.conn.poll():
+            try:
+                result = self.conn.recv()
+                self.task = None
+                return result
+            except (EOFError, OSError):
+                pass
+        if not self.process.is_alive():
+            error = RuntimeError(
+                f'Worker exited with code {self.process.exitcode}'
+            )
+            return _failure(self.task, error, seconds)
+        if timeout is not None and seconds > timeout:
+            self.process.kill()
+            error = TimeoutError(f'Parsing exceeded {timeout} seconds')
+            return _failure(self.task, error, seconds)
+        return None
+
+    def close(self) -> None:
+        """Stops the worker process, kills it if busy.
+        """
+        if self.task is None and self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def _work(conn, options: dict, force: bool, unprocessed_only: bool) -> None:
+    # Parses the received transcripts until None is received.
+    while True:
+        try:
+            transcript = conn.recv()
+        except EOFError:
+            return
+        if transcript is None:
+            return
+        conn.send(parse_one(transcript, options, force, unprocessed_only))
+
+
+def _run_pool(transcripts: list[Path], max_workers: int | None,
+              timeout: float | None, journal: Journal | None,
+              args: tuple) -> Iterator[tuple[Path, BatchResult]]:
+    # Parses the transcripts on the workers, yields the results when done.
+    if not transcripts:
+        return
+    context = multiprocessing.get_context()
+    num_workers = min(max_workers or os.cpu_count() or 1, len(transcripts))
+    workers = [Worker(context, args) for _ in range(num_workers)]
+    pending = collections.deque(transcripts)
+    num_left = len(transcripts)
+    try:
+        while num_left > 0:
+            for worker in workers:
+                if worker.task is None and pending:
+                    transcript = pending.popleft()
+                    if journal is not None:
+                        journal.record('started', transcript)
+                    worker.submit(transcript)
+            busy = [w for w in workers if w.task is not None]
+            multiprocessing.connection.wait(
+                [w.conn for w in busy] + [w.process.sentinel for w in busy],
+                timeout=POLL_INTERVAL
+            )
+            for i, worker in enumerate(workers):
+                if worker.task is None:
+                    continue
+                transcript = worker.task
+                result = worker.collect(timeout)
+                if result is None:
+                    continue
+                if worker.task is not None:
+                    # The worker died or timed out, replace it.
+                    worker.close()
+                    workers[i] = Worker(context, args)
+                if journal is not None:
+                    journal.record(event_of(result), transcript, result)
+                num_left -= 1
+                yield transcript, result
+    finally:
+        for worker in workers:
+            worker.close()
+
+
+def _resume(transcript: Path, state: dict | None,
+            retry_failed: bool) -> BatchResult | None:
+    # Retrieves the result recorded in the journal, None to parse again.
+    if state is None:
+        return None
+    if state['event'] == 'completed':
+        return BatchResult(**state['result'])
+    if state['event'] == 'failed':
+        return None if retry_failed else BatchResult(**state['result'])
+    if state['attempts'] >= MAX_ATTEMPTS:
+        error = RuntimeError(f'Interrupted {state["attempts"]} times')
+        return _failure(transcript, error, 0.0)
+    return None
+
+
+def event_of(result: BatchResult) -> str:
+    """Maps the result of a transcript to its journal event.
+
+    Args:
+        result: The result of the transcript.
+
+    Returns:
+        The event, `completed` if parsed successfully, else `failed`.
+    """
+    if result.parse_result == ProcessingResult.SUCCESS.name:
+        return 'completed'
+    return 'failed'
+
+
+def _failure(transcript: Path, error: Exception,
+             seconds: float) -> BatchResult:
+    # Creates the result of a transcript which failed to parse.
+    parts = _transcript_name(transcript).split('_')
+    return BatchResult(
+        transcript=str(transcript),
+        game_type=parts[0],
+        game_id=int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0,
+        parse_result=f'{type(error).__name__}: {error}',
+        verification_result=None,
+        valid=False,
+        num_unprocessed_lines=0,
+        seconds=seconds
+    )
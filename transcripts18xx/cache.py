@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""File cache
+
+Module implements a process-wide LRU cache of values loaded from files, e.g.
+the metadata and the parsed results of transcripts. The cache is bounded by
+the size of its values in bytes, the least recently used values are evicted
+first. Each value records the modification time and size of its file and is
+loaded again once these changed, e.g. after a transcript was parsed again.
+"""
+import os
+import sys
+import threading
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class FileCache:
+    """FileCache
+
+    Class to cache values loaded from files. The cache is thread-safe, values
+    are loaded outside the lock such that files are read concurrently.
+
+    The size of dataframes is their memory usage, the size of other values is
+    approximated by the size of their file.
+
+    Attributes:
+        max_bytes: The maximum size of all cached values.
+        _entries: The cached entries by file and key, in order of their use.
+        _nbytes: The size of all cached values.
+        _lock: The lock of the entries.
+
+    Args:
+        max_bytes: The maximum size of all cached values.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """The size of all cached values in bytes."""
+        return self._nbytes
+
+    def load(self, file: Path, loader: Callable[[], Any],
+             key: Hashable = None) -> Any:
+        """Retrieves the value of a file, loads it if not cached or changed.
+
+        The cached value is shared by all callers and must not be modified.
+
+        Args:
+            file: The file the value is loaded from.
+            loader: The function to load the value.
+            key: The key to distinguish values of the same file, e.g. the
+                columns read.
+
+        Returns:
+            The value of the file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        entry_key = (str(file), key)
+        try:
+            stamp = _stamp(file)
+        except FileNotFoundError:
+            with self._lock:
+                self._discard(entry_key)
+            raise
+        with self._lock:
+            entry = self._entries.get(entry_key, None)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(entry_key)
+                return entry[1]
+        value = loader()
+        nbytes = _sizeof(value, stamp[1])
+        with self._lock:
+            self._discard(entry_key)
+            if nbytes <= self.max_bytes:
+                self._entries[entry_key] = (stamp, value, nbytes)
+                self._nbytes += nbytes
+                self._evict()
+        return value
+
+    def resize(self, max_bytes: int) -> None:
+        """Sets the maximum size, evicts values exceeding it.
+
+        Args:
+            max_bytes: The maximum size of all cached values.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """Removes all cached values.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _discard(self, entry_key: tuple) -> None:
+        # Removes an entry if cached, requires the lock.
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self._nbytes -= entry[2]
+
+    def _evict(self) -> None:
+        # Removes the least recently used entries exceeding the size.
+        while self._nbytes > self.max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self._nbytes -= entry[2]
+
+
+_default_cache = FileCache()
+
+
+def default_cache() -> FileCache:
+    """Retrieves the process-wide file cache.
+
+    Returns:
+        The file cache used by the cached transcript contexts.
+    """
+    return _default_cache
+
+
+def _stamp(file: Path) -> tuple[int, int]:
+    # The modification time and size to detect changes of the file.
+    stat = os.stat(file)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _sizeof(value: Any, file_size: int) -> int:
+    # The memory usage of dataframes, else approximated by the file size.
+    # Values cannot be dataframes unless pandas was imported.
+    pd = sys.modules.get('pandas', None)
+    if pd is not None and isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return file_size
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Metadata catalog
+
+Module implements a catalog of parsed transcripts in a SQLite database. The
+catalog indexes the metadata fields of the transcript context, such that
+transcripts can be filtered without loading their metadata files. The
+transcript parser updates the catalog when given one, existing metadata files
+can be added with `Catalog.add` and `Catalog.add_directory`.
+
+The names of the existing output files are indexed as well, such that the
+contexts of a query resolve their paths without checking the file system.
+"""
+import json
+import sqlite3
+
+from contextlib import closing
+from pathlib import Path
+
+from . import compression
+from .transcript import TranscriptContext, ProcessingResult
+
+_COLUMNS = [
+    'raw', 'game_type', 'game_id', 'parse_result', 'verification_result',
+    'valid', 'num_players', 'game_ending', 'winner', 'num_unprocessed_lines',
+    'unprocessed_lines', 'row_index', 'schema_version', 'files'
+]
+
+_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS transcripts (
+        raw TEXT PRIMARY KEY,
+        game_type TEXT NOT NULL,
+        game_id INTEGER NOT NULL,
+        parse_result TEXT,
+        verification_result INTEGER,
+        valid INTEGER NOT NULL,
+        num_players INTEGER,
+        game_ending TEXT,
+        winner TEXT,
+        num_unprocessed_lines INTEGER NOT NULL,
+        unprocessed_lines TEXT NOT NULL,
+        row_index TEXT NOT NULL,
+        schema_version INTEGER,
+        files TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS transcripts_filter ON transcripts (
+        game_type, valid, num_players, game_ending
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS transcripts_game_id ON transcripts (game_id)
+    '''
+]
+
+
+class Catalog:
+    """Catalog
+
+    Class to index and query the metadata of parsed transcripts in a SQLite
+    database. Each transcript is identified by the path of its raw transcript.
+
+    Attributes:
+        path: The path of the database.
+
+    Args:
+        path: The path of the database, created if it does not exist.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with closing(self._connect()) as con, con:
+            for statement in _SCHEMA:
+                con.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opens a connection, which commits on exit of a with block.
+        return sqlite3.connect(self.path)
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as con:
+            cursor = con.execute('SELECT COUNT(*) FROM transcripts')
+            return cursor.fetchone()[0]
+
+    def update(self, transcript: Path, metadata: dict) -> None:
+        """Inserts or replaces the metadata of a transcript.
+
+        Args:
+            transcript: The raw transcript path.
+            metadata: The metadata of the parsed transcript.
+        """
+        cnt = TranscriptContext.from_metadata(transcript, metadata)
+        verification = cnt.verification_result
+        paths = [
+            cnt.meta_path, cnt.result_path, cnt.summary_path,
+            cnt.changes_path, cnt.truth_path
+        ]
+        record = [
+            str(transcript.resolve()),
+            cnt.game_type,
+            cnt.game_id,
+            cnt.parse_result,
+            None if verification is None else int(verification),
+            int(cnt.valid),
+            cnt.num_players,
+            cnt.game_ending,
+            cnt.winner,
+            len(cnt.unprocessed_lines),
+            json.dumps(cnt.unprocessed_lines),
+            json.dumps(cnt.index),
+            cnt.schema_version,
+            json.dumps(sorted(path.name for path in paths if path.exists()))
+        ]
+        with closing(self._connect()) as con, con:
+            con.execute(
+                f'INSERT OR REPLACE INTO transcripts ({", ".join(_COLUMNS)}) '
+                f'VALUES ({", ".join("?" * len(_COLUMNS))})',
+                record
+            )
+
+    def add(self, transcript: Path) -> None:
+        """Adds a parsed transcript by its metadata file.
+
+        Args:
+            transcript: The raw transcript path.
+
+        Raises:
+            FileNotFoundError: If the metadata does not exist.
+        """
+        cnt = TranscriptContext.from_raw(transcript)
+        if not cnt.meta_path.exists():
+            raise FileNotFoundError(f'Metadata not found: {cnt.meta_path}')
+        self.update(transcript, cnt.metadata())
+
+    def add_directory(self, directory: Path) -> int:
+        """Adds all parsed transcripts of a directory by their metadata files.
+
+        The raw transcripts are assumed to be text files next to their
+        metadata, compressed or not.
+
+        Args:
+            directory: The directory of the transcripts.
+
+        Returns:
+            The number of transcripts added.
+        """
+        num_added = 0
+        names = {
+            compression.strip(meta_path).name[:-len('_metadata.json')] for
+            meta_path in directory.glob('*_metadata.json*')
+        }
+        for name in sorted(names):
+            self.add(compression.resolve(directory.joinpath(name + '.txt')))
+            num_added += 1
+        return num_added
+
+    def remove(self, transcript: Path) -> None:
+        """Removes a transcript from the catalog.
+
+        Args:
+            transcript: The raw transcript path.
+        """
+        with closing(self._connect()) as con, con:
+            con.execute(
+                'DELETE FROM transcripts WHERE raw = ?',
+                [str(transcript.resolve())]
+            )
+
+    def query(self, game_type: str | None = None,
+              valid: bool | None = None,
+              num_players: int | None = None,
+              game_ending: str | None = None,
+              winner: str | None = None,
+              parse_success: bool | None = None,
+              verified: bool | None = None,
+              max_unprocessed_lines: int | None = None
+              ) -> list[TranscriptContext]:
+        """Queries the transcripts matching all given filters.
+
+        Args:
+            game_type: The game type, e.g. `1889`.
+            valid: The transcript was parsed and verified successfully.
+            num_players: The number of players.
+            game_ending: The game ending, e.g. `BankBroke`.
+            winner: The winner, e.g. `player1`.
+            parse_success: The transcript was parsed successfully.
+            verified: The final values were verified successfully.
+            max_unprocessed_lines: The maximum number of unprocessed lines.
+
+        Returns:
+            The contexts of the matching transcripts, ordered by game id.
+        """
+        filters = {
+            'game_type = ?': game_type,
+            'valid = ?': None if valid is None else int(valid),
+            'num_players = ?': num_players,
+            'game_ending = ?': game_ending,
+            'winner = ?': winner,
+            'verification_result = ?':
+                None if verified is None else int(verified),
+            'num_unprocessed_lines <= ?': max_unprocessed_lines
+        }
+        if parse_success is not None:
+            operator = '=' if parse_success else '!='
+            filters[f'parse_result {operator} ?'] = (
+                ProcessingResult.SUCCESS.name
+            )
+        clauses = [k for k, v in filters.items() if v is not None]
+        params = [v for v in filters.values() if v is not None]
+        where = f' WHERE {" AND ".join(clauses)}' if clauses else ''
+        with closing(self._connect()) as con:
+            rows = con.execute(
+                f'SELECT {", ".join(_COLUMNS)} FROM transcripts{where} '
+                f'ORDER BY game_id',
+                params
+            ).fetchall()
+        return [_context(dict(zip(_COLUMNS, row))) for row in rows]
+
+
+def _context(record: dict) -> TranscriptContext:
+    # Creates the context from a record, with the metadata and the files it
+    # was indexed from.
+    verification = record['verification_result']
+    metadata = {
+        'parse_result': record['parse_result'],
+        'num_players': record['num_players'],
+        'finished': record['game_ending'],
+        'winner': record['winner'],
+        'unprocessed_lines': json.loads(record['unprocessed_lines']),
+        'index': json.loads(record['row_index']),
+        'schema_version': record['schema_version']
+    }
+    if verification is not None:
+        metadata['verification'] = {'success': bool(verification)}
+    return TranscriptContext.from_metadata(
+        Path(record['raw']), metadata, set(json.loads(record['files']))
+    )
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""File compression
+
+Module implements the handling of compressed raw transcripts and outputs.
+Compressed files are recognized by their suffix, e.g. `1830_123.txt.gz`, and
+are read and written as stream without decompressing to temporary files.
+Gzip and xz use the standard library, zstd requires the standard library
+module `compression.zstd` (Python 3.14) or the optional dependency
+`zstandard`.
+"""
+import enum
+import gzip
+import lzma
+
+from pathlib import Path
+from typing import IO
+
+
+class Compression(enum.Enum):
+    """Compression
+
+    Enum class to describe the available compressions. The values are the
+    file suffixes of the compressions.
+    """
+    GZIP = '.gz'
+    XZ = '.xz'
+    ZSTD = '.zst'
+
+
+def detect(file: Path) -> Compression | None:
+    """Detects the compression of a file by its suffix.
+
+    Args:
+        file: The file.
+
+    Returns:
+        The compression, None if the file is not compressed.
+    """
+    try:
+        return Compression(file.suffix)
+    except ValueError:
+        return None
+
+
+def strip(file: Path) -> Path:
+    """Removes the compression suffix from a file.
+
+    Args:
+        file: The file, e.g. `1830_123.txt.gz`.
+
+    Returns:
+        The file without compression suffix, e.g. `1830_123.txt`.
+    """
+    if detect(file) is None:
+        return file
+    return file.with_suffix('')
+
+
+def compress(file: Path, compression: Compression | None) -> Path:
+    """Appends the compression suffix to a file.
+
+    Args:
+        file: The file, e.g. `1830_123_final.csv`.
+        compression: The compression. If None, the file is returned.
+
+    Returns:
+        The compressed file, e.g. `1830_123_final.csv.gz`.
+    """
+    if compression is None:
+        return file
+    return file.with_name(file.name + compression.value)
+
+
+def resolve(file: Path, files: set[str] | None = None) -> Path:
+    """Resolves the existing file, compressed or not.
+
+    If several exist, the most recently modified one is used, such that
+    outputs written with another compression are not shadowed by older ones.
+
+    Args:
+        file: The file without compression suffix.
+        files: The names of the files in the directory of the file. If None,
+            the file system is checked.
+
+    Returns:
+        The existing file, or the file itself if none exists.
+    """
+    candidates = [file] + [compress(file, c) for c in Compression]
+    if files is None:
+        existing = [c for c in candidates if c.exists()]
+    else:
+        existing = [c for c in candidates if c.name in files]
+    if not existing:
+        return file
+    if len(existing) == 1:
+        return existing[0]
+    return max(existing, key=lambda c: c.stat().st_mtime_ns)
+
+
+def open_file(file: Path, mode: str = 'r') -> IO:
+    """Opens a text file, compressed by its suffix or not.
+
+    Args:
+        file: The file.
+        mode: The mode, `r` to read or `w` to write.
+
+    Returns:
+        The text stream of the file, encoded as UTF-8.
+
+    Raises:
+        ImportError: If zstd is required but not available.
+    """
+    compression = detect(file)
+    if compression is None:
+        return open(file, mode, encoding='utf-8')
+    if compression == Compression.GZIP:
+        return gzip.open(file, mode + 't', encoding='utf-8')
+    if compression == Compression.XZ:
+        return lzma.open(file, mode + 't', encoding='utf-8')
+    return _import_zstd().open(file, mode + 't', encoding='utf-8')
+
+
+def _import_zstd():
+    # Imports zstd from the standard library or the optional dependency.
+    try:
+        from compression import zstd  # pylint: disable=import-outside-toplevel
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise ImportError(
+            'Compression requires the optional dependency `zstandard`'
+        ) from e
+    return zstandard
@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Columnar corpus store
+
+Module implements a store to collect the parsed results of many transcripts
+in one directory. Each column is stored as one binary file, to which the rows
+of each game are appended. String columns are dictionary encoded, i.e. stored
+as integer codes with a dictionary of their values. The metadata of the
+corpus, i.e. the columns, their types and dictionaries and the row range of
+each game, is stored in `corpus.json`, written atomically on close.
+
+The column files are memory-mapped when read, such that opening the corpus
+only reads the metadata and single games or columns are read as views without
+copying the data.
+
+The columns of the games can differ, e.g. with the number of players. Rows of
+games without a column are filled with NaN for floats, 0 for integers, False
+for booleans and the code -1 for strings. The distinct column lists are stored
+once in the metadata, each game refers to the one of its columns.
+"""
+import json
+import logging
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import storage
+from .transcript import TranscriptContext
+
+logger = logging.getLogger(__name__)
+
+META_FILE = 'corpus.json'
+
+FILL_VALUES = {
+    'float64': np.nan,
+    'int64': 0,
+    'bool': False,
+    'int32': -1
+}
+
+
+class CorpusWriter:
+    """CorpusWriter
+
+    Class to append parsed transcripts to a corpus. If the corpus exists, the
+    games are appended to it. The metadata is written on `close`, the writer
+    can be used as context manager.
+
+    Attributes:
+        path: The corpus directory.
+        _meta: The metadata of the corpus.
+        _game_ids: The ids of the games in the corpus.
+        _column_sets: The index of each column list in the metadata.
+
+    Args:
+        path: The corpus directory, created if it does not exist.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._meta = _read_meta(path)
+        self._game_ids = {game['id'] for game in self._meta['games']}
+        self._column_sets = {
+            tuple(columns): i for i, columns in
+            enumerate(self._meta['column_sets'])
+        }
+        self._truncate()
+
+    def __enter__(self) -> "CorpusWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _truncate(self) -> None:
+        # Removes rows and columns of an interrupted append not recorded in
+        # the metadata.
+        files = {column['file'] for column in self._meta['columns'].values()}
+        for file in self.path.glob('*.bin'):
+            if file.name not in files:
+                file.unlink()
+        for column in self._meta['columns'].values():
+            file = self.path.joinpath(column['file'])
+            size = self._meta['num_rows'] * np.dtype(column['dtype']).itemsize
+            if file.exists() and file.stat().st_size > size:
+                with open(file, 'r+b') as f:
+                    f.truncate(size)
+
+    def _add_column(self, name: str, dtype: str) -> dict:
+        # Adds a column filled for the rows of the previous games.
+        column = {
+            'file': f'{len(self._meta["columns"]):04d}.bin',
+            'dtype': dtype,
+            'dictionary': [] if dtype == 'int32' else None
+        }
+        self._meta['columns'][name] = column
+        self._append(column, np.full(
+            self._meta['num_rows'], FILL_VALUES[dtype], dtype=dtype
+        ), mode='wb')
+        return column
+
+    def _append(self, column: dict, values: np.ndarray,
+                mode: str = 'ab') -> None:
+        # Appends the values to the column file, or creates it.
+        with open(self.path.joinpath(column['file']), mode) as f:
+            values.tofile(f)
+
+    @staticmethod
+    def _encode(column: dict, values: pd.Series) -> np.ndarray:
+        # Encodes strings as codes of the dictionary, missing as -1.
+        lookup = {v: i for i, v in enumerate(column['dictionary'])}
+        codes = np.full(len(values), -1, dtype='int32')
+        for i, value in enumerate(values):
+            if pd.isna(value):
+                continue
+            value = str(value)
+            if value not in lookup:
+                lookup[value] = len(column['dictionary'])
+                column['dictionary'].append(value)
+            codes[i] = lookup[value]
+        return codes
+
+    def append(self, game_id: int, game_type: str, df: pd.DataFrame) -> None:
+        """Appends the parsed result of a game to the corpus.
+
+        Args:
+            game_id: The id of the game.
+            game_type: The type of the game, e.g. `1830`.
+            df: The parsed result of the game.
+
+        Raises:
+            ValueError: If the game is already in the corpus or the type of a
+                column differs from the corpus.
+        """
+        if game_id in self._game_ids:
+            raise ValueError(f'Game already in corpus: {game_id}')
+        for name in df.columns:
+            dtype = _storage_dtype(df[name].dtype)
+            column = self._meta['columns'].get(name, None)
+            if column is not None and column['dtype'] != dtype:
+                raise ValueError(
+                    f'Column type differs from corpus: {name} ({dtype}, '
+                    f'{column["dtype"]})'
+                )
+
+        start = self._meta['num_rows']
+        for name in df.columns:
+            dtype = _storage_dtype(df[name].dtype)
+            column = self._meta['columns'].get(name, None)
+            if column is None:
+                column = self._add_column(name, dtype)
+            if dtype == 'int32':
+                values = self._encode(column, df[name])
+            else:
+                values = df[name].to_numpy(dtype=dtype)
+            self._append(column, values)
+        for name, column in self._meta['columns'].items():
+            if name not in df.columns:
+                self._append(column, np.full(
+                    len(df), FILL_VALUES[column['dtype']],
+                    dtype=column['dtype']
+                ))
+        self._meta['num_rows'] = start + len(df)
+        self._meta['games'].append({
+            'id': game_id,
+            'game': game_type,
+            'start': start,
+            'end': start + len(df),
+            'column_set': self._column_set(list(df.columns))
+        })
+        self._game_ids.add(game_id)
+
+    def _column_set(self, columns: list[str]) -> int:
+        # Retrieves the index of the column list, added if new.
+        key = tuple(columns)
+        if key not in self._column_sets:
+            self._column_sets[key] = len(self._meta['column_sets'])
+            self._meta['column_sets'].append(columns)
+        return self._column_sets[key]
+
+    def append_context(self, context: TranscriptContext) -> None:
+        """Appends the parsed result of a transcript to the corpus.
+
+        Args:
+            context: The context of the parsed transcript.
+
+        Raises:
+            ValueError: If the game is already in the corpus or the type of a
+                column differs from the corpus.
+        """
+        df = context.result()
+        if df.empty:
+            logger.warning('Parsed transcript is empty: %s', context.raw)
+            return
+        self.append(context.game_id, context.game_type, df)
+
+    def close(self) -> None:
+        """Writes the metadata of the corpus.
+        """
+        _write_meta(self.path, self._meta)
+
+
+class Corpus:
+    """Corpus
+
+    Class to read a corpus. Opening the corpus reads its metadata only, the
+    column files are memory-mapped on first access.
+
+    Attributes:
+        path: The corpus directory.
+        _meta: The metadata of the corpus.
+        _games: The metadata of each game by its id.
+        _columns: The memory-mapped columns.
+
+    Args:
+        path: The corpus directory.
+
+    Raises:
+        FileNotFoundError: If the corpus does not exist.
+    """
+
+    def __init__(self, path: Path):
+        if not path.joinpath(META_FILE).exists():
+            raise FileNotFoundError(f'Corpus does not exist: {path}')
+        self.path = path
+        self._meta = _read_meta(path)
+        self._games = {game['id']: game for game in self._meta['games']}
+        self._columns = {}
+
+    def __len__(self) -> int:
+        return self._meta['num_rows']
+
+    def games(self) -> pd.DataFrame:
+        """Retrieves the offsets table of the games.
+
+        Returns:
+            The id, game type and row range `[start, end)` of each game.
+        """
+        return pd.DataFrame(
+            self._meta['games'], columns=['id', 'game', 'start', 'end']
+        )
+
+    def columns(self) -> list[str]:
+        """Retrieves the columns of the corpus.
+
+        Returns:
+            The names of all columns of all games.
+        """
+        return list(self._meta['columns'].keys())
+
+    def dictionary(self, name: str) -> list[str] | None:
+        """Retrieves the dictionary of a string column.
+
+        Args:
+            name: The column name.
+
+        Returns:
+            The values of the codes, None if the column is not a string
+            column.
+        """
+        return self._meta['columns'][name]['dictionary']
+
+    def column(self, name: str, game_id: int | None = None) -> np.ndarray:
+        """Retrieves a column as memory-mapped view.
+
+        String columns are retrieved as codes, see `dictionary`.
+
+        Args:
+            name: The column name.
+            game_id: The id of the game to slice. If None, the column of all
+                games is retrieved.
+
+        Returns:
+            The read-only view of the column.
+
+        Raises:
+            KeyError: If the column or game is not in the corpus.
+        """
+        if name not in self._columns:
+            column = self._meta['columns'][name]
+            file = self.path.joinpath(column['file'])
+            if len(self) == 0:
+                self._columns[name] = np.empty(0, dtype=column['dtype'])
+            else:
+                self._columns[name] = np.memmap(
+                    file, dtype=column['dtype'], mode='r', shape=(len(self),)
+                )
+        if game_id is None:
+            return self._columns[name]
+        game = self._game(game_id)
+        return self._columns[name][game['start']:game['end']]
+
+    def game(self, game_id: int,
+             columns: list[str] | None = None) -> pd.DataFrame:
+        """Retrieves the parsed result of a game.
+
+        String columns are decoded with their dictionary.
+
+        Args:
+            game_id: The id of the game.
+            columns: The columns to retrieve. If None, all columns of the game
+                are retrieved.
+
+        Returns:
+            The parsed result of the game.
+
+        Raises:
+            KeyError: If the game or a column is not in the corpus.
+        """
+        game = self._game(game_id)
+        data = {}
+        columns = columns or self._meta['column_sets'][game['column_set']]
+        for name in columns:
+            values = self.column(name, game_id)
+            dictionary = self.dictionary(name)
+            if dictionary is not None:
+                # The missing code -1 maps to the appended NaN.
+                lookup = np.array(dictionary + [np.nan], dtype=object)
+                values = lookup[values]
+            data[name] = values
+        return pd.DataFrame(data)
+
+    def _game(self, game_id: int) -> dict:
+        # Retrieves the metadata of a game.
+        try:
+            return self._games[game_id]
+        except KeyError as e:
+            raise KeyError(f'Game not in corpus: {game_id}') from e
+
+
+def _storage_dtype(dtype) -> str:
+    # Maps the column type to the type stored, strings are stored as codes.
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'int64'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float64'
+    return 'int32'
+
+
+def _read_meta(path: Path) -> dict:
+    # Reads the metadata of the corpus, empty if it does not exist.
+    file = path.joinpath(META_FILE)
+    if not file.exists():
+        return {'num_rows': 0, 'columns': {}, 'column_sets': [], 'games': []}
+    with open(file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_meta(path: Path, meta: dict) -> None:
+    # Writes the metadata of the corpus atomically.
+    with storage.atomic_file(path.joinpath(META_FILE)) as tmp:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(meta))
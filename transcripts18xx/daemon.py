@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Parsing daemon
+
+Module implements a long-running daemon which parses transcripts on request,
+such that callers parsing one transcript at a time do not pay the interpreter
+startup, the imports and building the engine steps and fingerprints on each
+call. The daemon listens on a Unix socket and parses on a pool of worker
+processes, which are warmed up once when started.
+
+The protocol exchanges one JSON object per line. A parse request names the
+transcript, its game and optionally the keyword arguments of
+`TranscriptParser`:
+
+    {"transcript": "/data/1830_123.txt", "game": "G1830",
+     "options": {"export_changes": true, "output_compression": "gzip"}}
+
+The response holds the metadata returned by `TranscriptParser.parse`, or the
+error if parsing failed:
+
+    {"ok": true, "metadata": {...}}
+    {"ok": false, "error": "FileNotFoundError: ..."}
+
+The requests `{"command": "ping"}` and `{"command": "shutdown"}` check and
+stop the daemon. Relative paths are resolved in the working directory of the
+daemon, the client sends absolute paths. The socket is only accessible by its
+owner.
+"""
+import enum
+import json
+import logging
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from . import compression, fingerprint, games, stages, storage
+from .transcript import TranscriptParser
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = Path(tempfile.gettempdir()).joinpath(
+    f'trx-{os.getuid()}.sock'
+)
+
+
+class ParseServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ParseServer
+
+    Class to serve parse requests on a Unix socket. Each connection is handled
+    in a thread, which submits its requests to the worker pool.
+
+    Attributes:
+        max_workers: The number of worker processes.
+
+    Args:
+        path: The socket path, replaced if it exists and no daemon listens on
+            it anymore.
+        max_workers: The number of worker processes. If None, the number of
+            processors is used.
+
+    Raises:
+        FileExistsError: If another daemon listens on the socket.
+    """
+    daemon_threads = True
+
+    def __init__(self, path: Path, max_workers: int | None = None):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        if path.is_socket():
+            if _is_listening(path):
+                raise FileExistsError(f'Daemon already running: {path}')
+            path.unlink()
+        _warm()
+        self._executor = self._start()
+        # Create the socket accessible by its owner only from the start.
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(path), _Handler)
+        except BaseException:
+            self._executor.shutdown(cancel_futures=True)
+            raise
+        finally:
+            os.umask(umask)
+
+    def _start(self) -> ProcessPoolExecutor:
+        # Starts the workers, warmed up by the initializer.
+        return ProcessPoolExecutor(self.max_workers, initializer=_warm)
+
+    def parse(self, request: dict) -> dict:
+        """Parses a transcript on the worker pool.
+
+        Args:
+            request: The parse request, see module documentation.
+
+        Returns:
+            The metadata of the parsed transcript.
+
+        Raises:
+            ValueError: If the request is invalid.
+        """
+        transcript = Path(request['transcript'])
+        try:
+            game = games.Games.argparse(request['game'])
+        except ValueError as e:
+            raise ValueError(f'Unknown game: {request["game"]}') from e
+        options = _options(request.get('options', {}))
+        with self._lock:
+            executor = self._executor
+        try:
+            return executor.submit(
+                _parse, transcript, game, options
+            ).result()
+        except BrokenProcessPool:
+            # A worker died, e.g. out of memory, replace the pool.
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = self._start()
+            raise
+
+    def server_close(self) -> None:
+        path = Path(self.server_address)
+        super().server_close()
+        self._executor.shutdown(cancel_futures=True)
+        if path.is_socket():
+            path.unlink()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # Handles the requests of a connection, one JSON object per line.
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            response = self._respond(line)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            if response.get('shutdown', False):
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+    def _respond(self, line: bytes) -> dict:
+        # Processes a request and builds its response.
+        try:
+            request = json.loads(line)
+            command = request.get('command', 'parse')
+            if command == 'ping':
+                return {'ok': True, 'version': fingerprint.package_version()}
+            if command == 'shutdown':
+                return {'ok': True, 'shutdown': True}
+            if command != 'parse':
+                raise ValueError(f'Unknown command: {command}')
+            return {'ok': True, 'metadata': self.server.parse(request)}
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning('Request failed: %s: %s', type(e).__name__, e)
+            return {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+
+
+class Client:
+    """Client
+
+    Class to send requests to the daemon over one connection.
+
+    Args:
+        path: The socket path of the daemon.
+        timeout: The timeout of the requests in seconds. If None, waits until
+            the transcript is parsed.
+    """
+
+    def __init__(self, path: Path = DEFAULT_SOCKET,
+                 timeout: float | None = None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(str(path))
+        self._file = self._socket.makefile('rwb')
+
+    def __enter__(self) -> 'Client':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the connection."""
+        self._file.close()
+        self._socket.close()
+
+    def _request(self, request: dict) -> dict:
+        # Sends a request and receives its response.
+        self._file.write(json.dumps(request).encode('utf-8') + b'\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError('Daemon closed the connection')
+        response = json.loads(line)
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+        return response
+
+    def parse(self, transcript: Path, game: games.Games | str,
+              **options) -> dict:
+        """Parses a transcript by the daemon.
+
+        Args:
+            transcript: The raw transcript path, resolved to an absolute path.
+            game: The game, e.g. `G1830`.
+            **options: The keyword arguments of `TranscriptParser`, the
+                stage cache by its path.
+
+        Returns:
+            The metadata of the parsed transcript.
+
+        Raises:
+            RuntimeError: If parsing failed.
+        """
+        return self._request({
+            'transcript': str(Path(transcript).resolve()),
+            'game': str(game),
+            'options': {k: _encode(v) for k, v in options.items()}
+        })['metadata']
+
+    def ping(self) -> str:
+        """Checks if the daemon is running.
+
+        Returns:
+            The package version of the daemon.
+        """
+        return self._request({'command': 'ping'})['version']
+
+    def shutdown(self) -> None:
+        """Stops the daemon."""
+        self._request({'command': 'shutdown'})
+
+
+def serve(path: Path = DEFAULT_SOCKET, max_workers: int | None = None) -> None:
+    """Runs the daemon until shut down or interrupted.
+
+    Args:
+        path: The socket path.
+        max_workers: The number of worker processes. If None, the number of
+            processors is used.
+    """
+    with ParseServer(path, max_workers) as server:
+        logger.info('Listening on %s', path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def _is_listening(path: Path) -> bool:
+    # Checks if a daemon accepts connections on the socket.
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+    return True
+
+
+def _warm() -> None:
+    # Builds the engine steps and the fingerprints of all games once, which
+    # are kept by the caches of their modules for all parsers of the worker.
+    from .engine import engine  # pylint: disable=import-outside-toplevel
+    engine.LineParser()
+    engine.StepMapper()
+    for game in games.Games:
+        fingerprint.engine_fingerprint(game.select())
+        for stage in stages.STAGES:
+            fingerprint.stage_fingerprint(stage, game.select())
+
+
+def _encode(value):
+    # Encodes an option of a request, enum members by name.
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, Path):
+        return str(value.resolve())
+    return value
+
+
+def _options(options: dict) -> dict:
+    # Converts the options of a request to the arguments of the parser.
+    converters = {
+        'export_changes': bool,
+        'storage_format': lambda x: storage.StorageFormat[x.upper()],
+        'output_compression': lambda x: compression.Compression[x.upper()],
+        'stage_cache': lambda x: stages.StageCache(Path(x)),
+        'pipelined': bool
+    }
+    unknown = set(options) - set(converters)
+    if unknown:
+        raise ValueError(f'Unknown options: {sorted(unknown)}')
+    return {
+        k: None if v is None else converters[k](v) for k, v in options.items()
+    }
+
+
+def _parse(transcript: Path, game: games.Games, options: dict) -> dict:
+    # Parses a transcript in a worker.
+    return TranscriptParser(transcript, game.select(), **options).parse()
@@ -4,7 +4,14 @@
 
 Module implements caller classes to run all step handlers on a specific
 function or retrieve the members.
+
+The engine steps are built once and shared by all line parsers and step
+mappers. Steps are not modified after being built, matching a line and
+updating the game state only read them, such that one parser or mapper can be
+used by several threads at once.
 """
+import functools
+
 from itertools import chain
 from typing import Type
 
@@ -48,21 +55,28 @@ class EngineSteps:
         return [cls for cls in self._patterns() if not self._is_abstract(cls)]
 
 
+@functools.cache
+def _engine_steps() -> tuple[step.EngineStep, ...]:
+    # Builds the engine steps once, shared by all parsers and mappers.
+    return tuple(cls() for cls in EngineSteps().patterns())
+
+
 class LineParser:
     """LineParser
 
-    Class to retrieve and match a line to all engine steps.
+    Class to retrieve and match a line to all engine steps. The parser holds
+    no state of a run and is safe to use from several threads.
 
     Attributes:
-        _steps: Engine steps to match.
+        _steps: Engine steps to match, shared and not modified.
     """
 
     def __init__(self):
-        self._steps = EngineSteps().patterns()
+        self._steps = _engine_steps()
 
     def _search(self, line: str) -> list:
         # Invokes the pattern matching.
-        return [cls().match(line) for cls in self._steps]
+        return [st.match(line) for st in self._steps]
 
     @staticmethod
     def _select(result: list, line: str) -> dict | None:
@@ -100,21 +114,28 @@ class LineParser:
 class StepMapper:
     """StepMapper
 
-    Class to match a step name to its engine.
+    Class to match a step name to its engine. The mapping is built once, such
+    that the mapper is safe to use from several threads.
 
     Attributes:
-        _steps: Engine steps.
+        _steps: Engine steps, shared and not modified.
+        _engines: The engine step of each step type name.
     """
 
     def __init__(self):
-        self._steps = EngineSteps().patterns()
+        self._steps = _engine_steps()
+        self._engines = {
+            st.type.name: st for st in self._steps
+            if isinstance(st.type, step.StepType)
+            and self._select(self._search(st.type)) is type(st)
+        }
 
     def _search(self, step_type: step.StepType) -> list:
         # Invokes the step type name of the subclasses if StepType is available.
         return [
-            cls for cls in self._steps if
-            isinstance(cls().type, step.StepType) and
-            cls().type.name == step_type.name
+            type(st) for st in self._steps if
+            isinstance(st.type, step.StepType) and
+            st.type.name == step_type.name
         ]
 
     @staticmethod
@@ -125,6 +146,23 @@ class StepMapper:
         # Return the parent class which is in the first position.
         return result[0]
 
+    def engine(self, step_type: step.StepType) -> step.EngineStep:
+        """Maps the shared engine instance to its step name.
+
+        Args:
+            step_type: Step to match.
+
+        Returns:
+            The engine for the step, which must not be modified.
+
+        Raises:
+            AttributeError: If no engine has the step type.
+        """
+        try:
+            return self._engines[step_type.name]
+        except KeyError as e:
+            raise AttributeError(f'Could not match step: {step_type}') from e
+
     def run(self, step_type: step.StepType) -> Type[step.EngineStep]:
         """Maps an engine to its step name.
 
@@ -133,12 +171,11 @@ class StepMapper:
 
         Returns:
             The engine for the step.
+
+        Raises:
+            AttributeError: If no engine has the step type.
         """
-        result = self._search(step_type)
-        if not result:
-            raise AttributeError(f'Could not match step: {step_type}')
-        engine = self._select(result)
-        return engine
+        return type(self.engine(step_type))
 
     @staticmethod
     def map_type(step_name: str) -> step.StepType:
@@ -189,16 +226,23 @@ class GameState:
         """
         engine.state_update(row, self.players, self.companies, self.privates)
 
-    def view(self) -> pd.Series:
+    def view(self, entities: set[str] | None = None) -> pd.Series:
         """Generates a series of the expanded game state.
 
+        The privates of players and companies are encoded as bitmask in the
+        order of the game privates, see `Game18xx.private_table`.
+
+        Args:
+            entities: The names of the players and companies to include. If
+                None, all players and companies are included.
+
         Returns:
             The game state with names of players and companies as keys and
             their representation as values.
         """
+        privates = list(self.privates)
         ret = pd.Series()
-        for p in self.players.states:
-            ret = pd.concat([ret, p.flatten()])
-        for c in self.companies.states:
-            ret = pd.concat([ret, c.flatten()])
+        for st in self.players.states + self.companies.states:
+            if entities is None or st.name in entities:
+                ret = pd.concat([ret, st.flatten(privates)])
         return ret
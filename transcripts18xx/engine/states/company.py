@@ -4,7 +4,6 @@
 
 Module implements the company state and its maintainer.
 """
-import json
 import pandas as pd
 
 from .state import State, States
@@ -55,11 +54,15 @@ class CompanyState(State):
                 self.share_price == other.share_price
         )
 
-    def flatten(self) -> pd.Series:
+    def flatten(self, privates: list[str]) -> pd.Series:
         """Creates a series from the state representation.
 
         The trains dictionary is expanded to single indexes with the train type
-        appended, e.g. `company1_trains_2`.
+        appended, e.g. `company1_trains_2`. The privates are encoded as bitmask,
+        see `privates_mask`.
+
+        Args:
+            privates: The privates of the game in bit order.
 
         Returns:
             A pandas Series with the members of the state and their values.
@@ -67,7 +70,7 @@ class CompanyState(State):
         key = f'{self.name}_%s'
         data = {
             key % 'cash': self.cash,
-            key % 'privates': json.dumps(self.privates),
+            key % 'privates': self.privates_mask(privates),
             key % 'ipo': self.ipo,
             key % 'market': self.market,
             key % 'president': self.president,
@@ -75,7 +78,7 @@ class CompanyState(State):
         }
         for k, v in self.trains.items():
             data[key % 'trains_' + k] = v
-        return pd.Series(data)
+        return pd.Series(data, dtype=object)
 
     @staticmethod
     def _proc_train(train):
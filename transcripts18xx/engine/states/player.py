@@ -4,7 +4,6 @@
 
 Module implements a player state and maintainer class.
 """
-import json
 import pandas as pd
 
 from .state import State, States
@@ -54,11 +53,15 @@ class PlayerState(State):
                 self.priority_deal == other.priority_deal
         )
 
-    def flatten(self) -> pd.Series:
+    def flatten(self, privates: list[str]) -> pd.Series:
         """Creates a series from the state representation.
 
         The shares dictionary is expanded to single indexes with the company
-        name appended, e.g. `player1_shares_company1`.
+        name appended, e.g. `player1_shares_company1`. The privates are encoded
+        as bitmask, see `privates_mask`.
+
+        Args:
+            privates: The privates of the game in bit order.
 
         Returns:
             A pandas Series with the members of the state and their values.
@@ -66,13 +69,13 @@ class PlayerState(State):
         key = f'{self.name}_%s'
         data = {
             key % 'cash': self.cash,
-            key % 'privates': json.dumps(self.privates),
+            key % 'privates': self.privates_mask(privates),
             key % 'value': self.value,
             key % 'priority_deal': self.priority_deal
         }
         for k, v in self.shares.items():
             data[key % 'shares_' + k] = v
-        return pd.Series(data)
+        return pd.Series(data, dtype=object)
 
     def update(self, share_prices: dict) -> None:
         """Update the player value.
@@ -6,7 +6,6 @@ Module implements an abstract base class to process and maintain states of the
 game.
 """
 import ast
-import json
 
 import pandas as pd
 
@@ -59,18 +58,35 @@ class State:
         obj.__dict__.update(rep)
         return obj
 
-    def flatten(self) -> pd.Series:
+    def privates_mask(self, privates: list[str]) -> int:
+        """Encodes the held privates as integer bitmask.
+
+        Args:
+            privates: The privates of the game, where the position in the list
+                denotes the bit of the private.
+
+        Returns:
+            The bitmask with the bits of the held privates set.
+        """
+        return sum(1 << i for i, p in enumerate(privates) if p in self.privates)
+
+    def flatten(self, privates: list[str]) -> pd.Series:
         """Creates a series from the state representation.
 
+        The privates are encoded as bitmask, see `privates_mask`.
+
+        Args:
+            privates: The privates of the game in bit order.
+
         Returns:
             A pandas Series with the members of the state and their values.
         """
         key = f'{self.name}_%s'
         data = {
             key % 'cash': self.cash,
-            key % 'privates': json.dumps(self.privates)
+            key % 'privates': self.privates_mask(privates)
         }
-        return pd.Series(data)
+        return pd.Series(data, dtype=object)
 
     def update(self, *args, **kwargs) -> None:
         """Update the current state.
@@ -31,6 +31,8 @@ class PayOut(ActionStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) pays out \$(\d+) = \$(\d+) per share')
         self.type = StepType.PayOut
+        self.fields = ['cash']
+        self.broadcast = True
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -60,6 +62,7 @@ class Withhold(ActionStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) withholds \$(\d+)')
         self.type = StepType.Withhold
+        self.fields = ['cash']
 
     def _process_match(self, line: str, match) -> dict:
         return {'company': match.group(1), 'amount': match.group(2)}
@@ -81,6 +84,7 @@ class BuyShare(ActionStep):
             r'(.*?) buys a (\d+)% share of (.*?) from the (.*?) for \$(\d+)'
         )
         self.type = StepType.BuyShare
+        self.fields = ['cash', 'shares', 'ipo', 'market']
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -117,6 +121,7 @@ class SellShare(ActionStep, abc.ABC):
     def __init__(self):
         super().__init__()
         self.type = StepType.SellShares
+        self.fields = ['cash', 'shares', 'market']
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -341,6 +346,7 @@ class ParCompany(ActionStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) pars (.*?) at \$(\d+)')
         self.type = StepType.Par
+        self.fields = ['share_price']
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -383,6 +389,7 @@ class Collect(ActionStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) collects \$(\d+) from (.*)')
         self.type = StepType.Collect
+        self.fields = ['cash']
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -407,6 +414,7 @@ class BuyPrivate(ActionStep, abc.ABC):
     def __init__(self):
         super().__init__()
         self.type = StepType.BuyPrivate
+        self.fields = ['cash', 'privates']
 
     def _process_match(self, line: str, match) -> dict:
         raise NotImplementedError
@@ -515,6 +523,7 @@ class LayTile(ActionStep, abc.ABC):
     def __init__(self):
         super().__init__()
         self.type = StepType.LayTile
+        self.fields = ['cash']
 
     def _process_match(self, line: str, match) -> dict:
         raise NotImplementedError
@@ -576,6 +585,7 @@ class PlaceToken(ActionStep, abc.ABC):
     def __init__(self):
         super().__init__()
         self.type = StepType.PlaceToken
+        self.fields = ['cash']
 
     def _process_match(self, line: str, match) -> dict:
         raise NotImplementedError
@@ -631,6 +641,7 @@ class BuyTrain(ActionStep):
             r'(.*?) buys a (\w+) train for \$(\d+) from (.*)'
         )
         self.type = StepType.BuyTrain
+        self.fields = ['cash', 'trains']
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -674,6 +685,7 @@ class DiscardTrain(ActionStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) discards (\w+)')
         self.type = StepType.DiscardTrain
+        self.fields = ['trains']
 
     def _process_match(self, line: str, match) -> dict:
         return {'company': match.group(1), 'train': match.group(2)}
@@ -695,6 +707,7 @@ class ExchangeTrain(ActionStep):
             r'(.*?) exchanges a (\d+) for a (\D) train for \$(\d+) from (.*)'
         )
         self.type = StepType.ExchangeTrain
+        self.fields = ['cash', 'trains']
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -726,6 +739,7 @@ class Contribute(ActionStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) contributes \$(\d+)')
         self.type = StepType.Contribute
+        self.fields = ['cash']
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -753,6 +767,7 @@ class ExchangePrivate(ActionStep):
             r'(.*?) exchanges (.*?) from the (\w+) for a (\d+)0% share of (.*)'
         )
         self.type = StepType.ExchangePrivate
+        self.fields = ['privates', 'shares', 'ipo', 'market']
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -31,6 +31,7 @@ class ReceiveShare(EventStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) receives a (\d+)% share of (.*)')
         self.type = StepType.ReceiveShare
+        self.fields = ['shares', 'ipo']
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -62,6 +63,7 @@ class ReceiveFunds(EventStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) receives \$(\d+)')
         self.type = StepType.ReceiveFunds
+        self.fields = ['cash']
 
         self._dismiss = ['sells']
 
@@ -126,6 +128,7 @@ class SharePriceMove(EventStep):
             r"(.*?)'s share price moves (.*?) from \$(\d+) to \$(\d+)"
         )
         self.type = StepType.SharePriceMoves
+        self.fields = ['share_price']
 
     def _process_match(self, line: str, match) -> dict:
         return {
@@ -220,6 +223,7 @@ class PresidentNomination(EventStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) becomes the president of (.*)')
         self.type = StepType.PresidentNomination
+        self.fields = ['president']
 
     def _process_match(self, line: str, match) -> dict:
         return {'player': match.group(1), 'company': match.group(2)}
@@ -242,6 +246,8 @@ class PriorityDeal(EventStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) has priority deal')
         self.type = StepType.PriorityDeal
+        self.fields = ['priority_deal']
+        self.broadcast = True
 
     def _process_match(self, line: str, match) -> dict:
         return {'player': match.group(1)}
@@ -280,6 +286,8 @@ class AllPrivatesClose(EventStep):
         super().__init__()
         self.pattern = re.compile(r'Event: Private companies close')
         self.type = StepType.AllPrivatesClose
+        self.fields = ['privates']
+        self.broadcast = True
 
     def _process_match(self, line: str, match) -> dict:
         return {}
@@ -299,6 +307,8 @@ class PrivateCloses(EventStep):
         super().__init__()
         self.pattern = re.compile(r'(.*?) closes')
         self.type = StepType.PrivateCloses
+        self.fields = ['privates']
+        self.broadcast = True
 
     def _process_match(self, line: str, match) -> dict:
         return {'private': match.group(1)}
@@ -332,6 +342,8 @@ class TrainsRust(EventStep):
         super().__init__()
         self.pattern = re.compile(r'Event: (\d+) trains rust')
         self.type = StepType.TrainsRust
+        self.fields = ['trains']
+        self.broadcast = True
 
     def _process_match(self, line: str, match) -> dict:
         return {'train': match.group(1)}
@@ -352,6 +364,7 @@ class PlayerGoesBankrupt(EventStep):
             r'(.*?) goes bankrupt and sells remaining shares --'
         )
         self.type = StepType.PlayerGoesBankrupt
+        self.fields = ['cash']
 
     def _process_match(self, line: str, match) -> dict:
         return {'player': match.group(1)}
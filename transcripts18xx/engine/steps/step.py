@@ -91,6 +91,9 @@ class EngineStep(abc.ABC):
         pattern: The expression that shall be matched to the line.
         type: The type of the pattern, see `StepType`.
         parent: The pattern group the pattern is part of, see `StepParent`.
+        fields: The state fields the step may update, e.g. `cash`.
+        broadcast: Whether the step updates all players or companies instead
+            of the ones involved in the line only.
         _dismiss: Keywords that result in the line being ignored if they exist
             in the line.
         _required: Keywords that need to be found in the line. Otherwise, the
@@ -102,6 +105,8 @@ class EngineStep(abc.ABC):
         self.pattern = None
         self.type = Type[StepType]
         self.parent = Type[StepParent]
+        self.fields = []
+        self.broadcast = False
 
         self._dismiss = []
         self._required = []
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Input and engine fingerprints
+
+Module implements the hashes recorded in the metadata of a parsed transcript
+to detect whether parsing it again could change its outputs. The transcript
+hash covers the raw transcript file. The engine fingerprint covers the
+patterns and attributes of all engine steps, the source code of the engine,
+the pipeline stages and the schema, the definition of the game and the package
+version.
+
+The stage fingerprints cover the source code producing the intermediate
+outputs of the pipeline stages, see `stages`, such that changes of the game
+state updates do not invalidate the parsed and processed transcripts.
+"""
+import functools
+import hashlib
+import inspect
+import json
+
+from pathlib import Path
+
+from .games import Game18xx
+
+# Methods of the engine steps used to match and process the lines.
+_MATCH_METHODS = [
+    '__init__', '_invoke_search', '_process_match', '_contains_dismiss_key',
+    '_contains_required_key', '_search', '_process', 'match'
+]
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def transcript_hash(transcript: Path) -> str:
+    """Hashes the raw transcript file.
+
+    Args:
+        transcript: The raw transcript path, plain or compressed.
+
+    Returns:
+        The SHA-256 hex digest of the file.
+    """
+    digest = hashlib.sha256()
+    with open(transcript, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def engine_fingerprint(game: Game18xx) -> str:
+    """Fingerprints the engine parsing transcripts of a game.
+
+    Args:
+        game: The underlying 18xx game.
+
+    Returns:
+        The SHA-256 hex digest of the engine steps, the source code, the game
+        and the package version.
+    """
+    content = {
+        'version': package_version(),
+        'steps': _steps(),
+        'sources': _engine_sources(),
+        'game': _game(game)
+    }
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+def stage_fingerprint(stage: str, game: Game18xx) -> str:
+    """Fingerprints the code producing the output of a pipeline stage.
+
+    The stage `parsed` covers the transcript processor and the matching of the
+    engine steps, the stage `processed` additionally covers the post-processor.
+
+    Args:
+        stage: The stage, `parsed` or `processed`.
+        game: The underlying 18xx game.
+
+    Returns:
+        The SHA-256 hex digest of the code, the game and the pandas version.
+
+    Raises:
+        ValueError: If the stage is unknown.
+    """
+    if stage not in ['parsed', 'processed']:
+        raise ValueError(f'Unknown stage: {stage}')
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    content = {
+        'pandas': pd.__version__,
+        'game': _game(game),
+        'parsed': _parsed_sources()
+    }
+    if stage == 'processed':
+        content['processed'] = _processed_sources()
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+def package_version() -> str:
+    """Retrieves the installed package version.
+
+    Returns:
+        The version, `unknown` if the package is not installed.
+    """
+    from importlib import metadata  # pylint: disable=import-outside-toplevel
+    try:
+        return metadata.version('transcripts18xx')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+@functools.lru_cache(maxsize=None)
+def _steps() -> list:
+    # Describes the engine steps by their pattern and attributes, once.
+    from .engine import engine  # pylint: disable=import-outside-toplevel
+    steps = []
+    for cls in engine.EngineSteps().patterns():
+        step = cls()
+        pattern = step.pattern
+        steps.append([
+            f'{cls.__module__}.{cls.__qualname__}',
+            None if pattern is None else [pattern.pattern, pattern.flags],
+            step.type.name,
+            step.parent.name,
+            sorted(step.fields),
+            step.broadcast,
+            sorted(step._dismiss),  # pylint: disable=protected-access
+            sorted(step._required)  # pylint: disable=protected-access
+        ])
+    return sorted(steps)
+
+
+@functools.lru_cache(maxsize=None)
+def _parsed_sources() -> list:
+    # Collects the source code matching the lines of the transcript, once.
+    # pylint: disable=import-outside-toplevel
+    from .engine import engine
+    from .engine.steps import step as engine_step
+    from .pipe import parsing
+    sources = [
+        _source(parsing.GameTranscriptProcessor),
+        _source(engine.LineParser),
+        _source(engine.EngineSteps)
+    ]
+    for cls in [engine_step.EngineStep] + engine.EngineSteps().patterns():
+        sources.append(f'{cls.__module__}.{cls.__qualname__}')
+        sources.extend(
+            _source(getattr(cls, name)) for name in _MATCH_METHODS
+        )
+    return sources
+
+
+@functools.lru_cache(maxsize=None)
+def _processed_sources() -> list:
+    # Collects the source code post-processing the transcript, once.
+    from .pipe import parsing  # pylint: disable=import-outside-toplevel
+    return [
+        _source(parsing.TranscriptPostProcessor),
+        _source(parsing._row_ranges)  # pylint: disable=protected-access
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def _engine_sources() -> list:
+    # Collects the source code producing the outputs, once.
+    # pylint: disable=import-outside-toplevel
+    from . import schema
+    from .engine import engine
+    from .engine.states import company, player, state
+    from .engine.steps import actions, events, step
+    from .pipe import parsing
+    modules = [
+        engine, state, player, company, step, actions, events, parsing, schema
+    ]
+    return [_source(module) for module in modules]
+
+
+def _source(obj) -> str:
+    # Retrieves the source code, the package version if not available.
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return package_version()
+
+
+def _game(game: Game18xx) -> dict:
+    # Describes the game by its class and attributes, sets in sorted order.
+    definition = {'class': type(game).__name__}
+    for name, value in vars(game).items():
+        if isinstance(value, set):
+            value = sorted(value)
+        elif isinstance(value, dict):
+            value = [[str(k), v] for k, v in value.items()]
+        definition[name] = value
+    return definition
@@ -35,6 +35,20 @@ class Game18xx(abc.ABC):
         self.start_capital = {}
         self.currency = str()
 
+    def private_table(self) -> dict:
+        """Creates the lookup table of the privates.
+
+        The privates are stored as integer bitmask per player and company in
+        the parsed result. The bit of a private is its position in `privates`.
+
+        Returns:
+            The privates with their bit and value.
+        """
+        return {
+            name: {'bit': i, 'value': value} for i, (name, value) in
+            enumerate(self.privates.items())
+        }
+
 
 class Game1830(Game18xx):
     """Game1830
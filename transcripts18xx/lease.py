@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Lease queue
+
+Module implements distributing a batch over several hosts which mount the
+same transcript archive, without a broker. The workers share a queue
+directory, in which they claim transcripts by lease files and mark them done
+by result files:
+
+    queue/
+    ├── leases/1830_123.txt.lease   claimed, renewed by its worker
+    ├── done/1830_123.txt.json      parsed, the result of the transcript
+    └── workers/host-1234.jsonl     journal of each worker, see `Journal`
+
+A lease is created exclusively and renewed by a heartbeat while the
+transcript is parsed. A lease which has not been renewed for the lease
+duration, e.g. of a crashed worker or host, expires and is claimed by another
+worker. The hosts should have synchronized clocks, as the expiry compares the
+modification time of the lease with the local time.
+
+With a timeout, each transcript is parsed in a child process of the worker,
+which is killed if it exceeds the timeout. The transcript is then completed
+as failed, such that a hanging parse does not hold its lease forever.
+
+Transcripts are identified by their file name, such that the archive may be
+mounted at different paths. Claiming is at-least-once: a worker stalled for
+longer than the lease duration may see its transcript parsed twice, which is
+harmless as the outputs are deterministic and replaced atomically. Use a new
+queue directory for each batch, as done transcripts are not parsed again.
+"""
+import contextlib
+import dataclasses
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import socket
+import threading
+import time
+
+from pathlib import Path
+from typing import Iterator
+
+from . import batch, storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 60.0
+
+_MAX_POLL_INTERVAL = 5.0
+
+
+class LeaseQueue:
+    """LeaseQueue
+
+    Class to claim, renew and complete transcripts in a queue directory shared
+    by the workers.
+
+    Attributes:
+        path: The queue directory.
+        worker: The identifier of the worker.
+        lease_seconds: The duration after which a lease expires if not
+            renewed.
+
+    Args:
+        path: The queue directory, created if it does not exist.
+        worker: The identifier of the worker, unique among all workers. If
+            None, the host name and the process identifier are used.
+        lease_seconds: The duration after which a lease expires if not
+            renewed.
+    """
+
+    def __init__(self, path: Path, worker: str | None = None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.path = path
+        self.worker = worker or f'{socket.gethostname()}-{os.getpid()}'
+        self.lease_seconds = lease_seconds
+        for name in ['leases', 'done', 'workers']:
+            self.path.joinpath(name).mkdir(parents=True, exist_ok=True)
+
+    @property
+    def interval(self) -> float:
+        """The interval of renewing the leases."""
+        return self.lease_seconds / 3
+
+    @property
+    def journal(self) -> Path:
+        """The journal file of the worker."""
+        return self.path.joinpath('workers', f'{self.worker}.jsonl')
+
+    def _lease(self, transcript: Path) -> Path:
+        # Builds the lease file of a transcript.
+        return self.path.joinpath('leases', f'{transcript.name}.lease')
+
+    def _done(self, transcript: Path) -> Path:
+        # Builds the result file of a transcript.
+        return self.path.joinpath('done', f'{transcript.name}.json')
+
+    def _expired(self, lease: Path) -> bool:
+        # Checks if the lease was not renewed within the lease duration.
+        return time.time() - lease.stat().st_mtime > self.lease_seconds
+
+    def is_done(self, transcript: Path) -> bool:
+        """Checks if a transcript was completed by any worker.
+
+        Args:
+            transcript: The raw transcript path.
+
+        Returns:
+            True if completed, False otherwise.
+        """
+        return self._done(transcript).exists()
+
+    def claim(self, transcript: Path) -> bool:
+        """Claims a transcript by creating its lease.
+
+        An expired lease is removed first. Renaming it is atomic, such that
+        only one of the workers racing for it removes it.
+
+        Args:
+            transcript: The raw transcript path.
+
+        Returns:
+            True if claimed, False if leased by another worker.
+        """
+        lease = self._lease(transcript)
+        try:
+            fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if not self._expired(lease):
+                    return False
+                stale = lease.with_name(f'{lease.name}.{self.worker}')
+                os.rename(lease, stale)
+            except FileNotFoundError:
+                # Released or removed by another worker meanwhile.
+                return self.claim(transcript)
+            if not self._expired(stale):
+                # Another worker claimed it meanwhile, restore its lease.
+                with contextlib.suppress(FileExistsError):
+                    os.link(stale, lease)
+                stale.unlink()
+                return False
+            stale.unlink()
+            logger.info('Lease expired: %s', transcript.name)
+            return self.claim(transcript)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(self.worker)
+        return True
+
+    def owns(self, transcript: Path) -> bool:
+        """Checks if the lease of a transcript is held by the worker.
+
+        Args:
+            transcript: The raw transcript path.
+
+        Returns:
+            True if held by the worker, False otherwise.
+        """
+        try:
+            return self._lease(transcript).read_text('utf-8') == self.worker
+        except FileNotFoundError:
+            return False
+
+    def renew(self, transcript: Path) -> None:
+        """Renews the lease of a transcript.
+
+        Args:
+            transcript: The raw transcript path.
+        """
+        if not self.owns(transcript):
+            logger.warning('Lease lost: %s', transcript.name)
+            return
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(self._lease(transcript))
+
+    def release(self, transcript: Path) -> None:
+        """Releases the lease of a transcript, if held by the worker.
+
+        Args:
+            transcript: The raw transcript path.
+        """
+        if self.owns(transcript):
+            with contextlib.suppress(FileNotFoundError):
+                self._lease(transcript).unlink()
+
+    def complete(self, transcript: Path, result: batch.BatchResult) -> None:
+        """Marks a transcript as done with its result and releases it.
+
+        Args:
+            transcript: The raw transcript path.
+            result: The result of the transcript.
+        """
+        with storage.atomic_file(self._done(transcript)) as tmp:
+            tmp.write_text(
+                json.dumps(dataclasses.asdict(result)), encoding='utf-8'
+            )
+        self.release(transcript)
+
+    @contextlib.contextmanager
+    def heartbeat(self, transcript: Path) -> Iterator[None]:
+        """Renews the lease of a transcript in the background.
+
+        Args:
+            transcript: The raw transcript path.
+        """
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.interval):
+                self.renew(transcript)
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def run_worker(transcripts: list[Path], path: Path, worker: str | None = None,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS,
+               options: dict | None = None, force: bool = False,
+               unprocessed_only: bool = False, wait: bool = True,
+               timeout: float | None = None) -> list[batch.BatchResult]:
+    """Parses the transcripts of a queue until all are done.
+
+    The worker claims and parses one transcript after the other. If all
+    remaining transcripts are leased by other workers, it waits for them to
+    be done or their leases to expire.
+
+    Args:
+        transcripts: The raw transcripts.
+        path: The queue directory.
+        worker: The identifier of the worker, see `LeaseQueue`.
+        lease_seconds: The duration after which a lease expires.
+        options: The keyword arguments of `TranscriptParser`.
+        force: Parse all transcripts, also the ones which are up-to-date.
+        unprocessed_only: See `batch.is_up_to_date`.
+        wait: Wait for the transcripts leased by other workers. If False,
+            returns when no transcript can be claimed.
+        timeout: The maximum seconds to parse a transcript, after which its
+            child process is killed and it fails. If None, the transcripts
+            are parsed in the worker process without timeout.
+
+    Returns:
+        The results of the transcripts parsed by the worker.
+    """
+    queue = LeaseQueue(path, worker, lease_seconds)
+    journal = batch.Journal(queue.journal)
+    args = (options, force, unprocessed_only)
+    context = multiprocessing.get_context()
+    child = None
+    results = []
+    pending = list(transcripts)
+    try:
+        while pending:
+            leased = []
+            for transcript in pending:
+                if queue.is_done(transcript):
+                    continue
+                if not queue.claim(transcript):
+                    leased.append(transcript)
+                    continue
+                if queue.is_done(transcript):
+                    # Completed by another worker before claimed.
+                    queue.release(transcript)
+                    continue
+                journal.record('started', transcript)
+                with queue.heartbeat(transcript):
+                    if timeout is None:
+                        result = batch.parse_one(transcript, *args)
+                    else:
+                        child = child or batch.Worker(context, args)
+                        result = _parse_child(child, transcript, timeout)
+                        if child.task is not None:
+                            # The child died or timed out, replace it.
+                            child.close()
+                            child = None
+                journal.record(batch.event_of(result), transcript, result)
+                queue.complete(transcript, result)
+                results.append(result)
+                logger.info(
+                    '[%s] %s: %s', queue.worker, transcript.name,
+                    result.parse_result
+                )
+            pending = leased
+            if pending and not wait:
+                break
+            if pending:
+                time.sleep(min(queue.interval, _MAX_POLL_INTERVAL))
+    finally:
+        if child is not None:
+            child.close()
+    return results
+
+
+def _parse_child(child: batch.Worker, transcript: Path,
+                 timeout: float) -> batch.BatchResult:
+    # Parses the transcript in the child process, fails if timed out.
+    child.submit(transcript)
+    while True:
+        multiprocessing.connection.wait(
+            [child.conn, child.process.sentinel],
+            timeout=batch.POLL_INTERVAL
+        )
+        result = child.collect(timeout)
+        if result is not None:
+            return result
+
+
+def run_workers(transcripts: list[Path], path: Path, num_workers: int = 1,
+                worker: str | None = None,
+                lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                options: dict | None = None, force: bool = False,
+                unprocessed_only: bool = False,
+                timeout: float | None = None) -> list[batch.BatchResult]:
+    """Runs several workers of a queue as local processes.
+
+    Each host of a distributed batch runs this with the same transcripts and
+    queue directory. It returns when all transcripts are done, also the ones
+    parsed by the workers of other hosts.
+
+    Args:
+        transcripts: The raw transcripts.
+        path: The queue directory.
+        num_workers: The number of worker processes.
+        worker: The prefix of the worker identifiers, numbered per process.
+            If None, the host name and the process identifier are used.
+        lease_seconds: The duration after which a lease expires.
+        options: The keyword arguments of `TranscriptParser`.
+        force: Parse all transcripts, also the ones which are up-to-date.
+        unprocessed_only: See `batch.is_up_to_date`.
+        timeout: The maximum seconds to parse a transcript, see `run_worker`.
+
+    Returns:
+        The merged results of all transcripts, see `merge`.
+
+    Raises:
+        RuntimeError: If a worker process exited with an error.
+    """
+    prefix = worker or f'{socket.gethostname()}-{os.getpid()}'
+    context = multiprocessing.get_context()
+    processes = [
+        context.Process(
+            target=run_worker,
+            args=(transcripts, path, f'{prefix}-{i}', lease_seconds,
+                  options, force, unprocessed_only, True, timeout)
+        ) for i in range(num_workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    failed = [
+        f'{prefix}-{i} ({process.exitcode})'
+        for i, process in enumerate(processes) if process.exitcode != 0
+    ]
+    if failed:
+        raise RuntimeError(f'Workers exited with an error: {", ".join(failed)}')
+    return merge(path, transcripts)
+
+
+def merge(path: Path,
+          transcripts: list[Path] | None = None) -> list[batch.BatchResult]:
+    """Merges the results of all workers of a queue.
+
+    Args:
+        path: The queue directory.
+        transcripts: The raw transcripts to collect the results of. If None,
+            the results of all done transcripts are collected.
+
+    Returns:
+        The results of the done transcripts, in order of the transcripts or
+        sorted by name.
+    """
+    if transcripts is None:
+        files = sorted(path.joinpath('done').glob('*.json'))
+    else:
+        files = [path.joinpath('done', f'{t.name}.json') for t in transcripts]
+        files = [file for file in files if file.exists()]
+    return [
+        batch.BatchResult(**json.loads(file.read_text('utf-8')))
+        for file in files
+    ]
+
+
+def summarize_workers(path: Path) -> dict[str, dict]:
+    """Summarizes the transcripts parsed by each worker of a queue.
+
+    Args:
+        path: The queue directory.
+
+    Returns:
+        The summary of each worker, see `batch.summarize`, by identifier.
+    """
+    summaries = {}
+    for file in sorted(path.joinpath('workers').glob('*.jsonl')):
+        results = [
+            batch.BatchResult(**state['result'])
+            for state in batch.Journal(file).states().values()
+            if state['result'] is not None
+        ]
+        summaries[file.stem] = batch.summarize(results)
+    return summaries
@@ -7,20 +7,35 @@ Module implements classes that build the algorithm to parse a transcript from
 of a parser to handle the raw transcript, a processor that cleans and
 post-processes the transcript and a mapper for the game state.
 """
+import dataclasses
 import re
 import logging
+import threading
 
 from pathlib import Path
+from typing import Iterator
 
 import numpy as np
 import pandas as pd
 
+from .. import compression
 from ..games import Game18xx
 from ..engine import engine
+from ..engine.steps import step
 from ..engine.steps.step import StepType
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_COLUMNS = ['id', 'sequence', 'major_round', 'phase', 'type']
+CHANGES_COLUMNS = ['id', 'entity', 'field', 'value']
+
+
+@dataclasses.dataclass
+class _ParseRun:
+    # The lines of a parsing run which were not parsed.
+    unprocessed_lines: list[str] = dataclasses.field(default_factory=list)
+    skipped_lines: list[str] = dataclasses.field(default_factory=list)
+
 
 class GameTranscriptProcessor:
     """GameTranscriptProcessor
@@ -30,10 +45,14 @@ class GameTranscriptProcessor:
     unique match. Lines that were not matched are printed to the console. The
     parsed lines are combined in a pandas Dataframe.
 
+    Each parsing run collects its unprocessed and skipped lines separately,
+    which are available from the thread which ran it. Thus, one processor can
+    parse several transcripts at once on a thread pool.
+
     Attributes:
         _engine: The line parser engine.
-        _unprocessed_lines: The lines that could not be matched.
-        _skipped_lines: The lines that were skipped by rules.
+        _runs: The last parsing run of each thread, with the lines that could
+            not be matched and the lines that were skipped by rules.
         _default_currency: The currency on which the parsing is set up with.
             If the currency differs, the currency sign will be replaced in the
             transcript lines.
@@ -45,13 +64,13 @@ class GameTranscriptProcessor:
 
     def __init__(self, game: Game18xx):
         self._engine = engine.LineParser()
-        self._unprocessed_lines = []
-        self._skipped_lines = []
+        self._runs = threading.local()
 
         self._default_currency = '$'
         self._game_currency = game.currency
 
-    def _process_line(self, idx: int, line: str, data: list) -> None:
+    def _process_line(self, idx: int, line: str, data: list,
+                      run: _ParseRun) -> None:
         # Process the line with the engine.
         line = self._preprocess_line(line)
         parsed_data = self._engine.run(line)
@@ -60,10 +79,10 @@ class GameTranscriptProcessor:
                 data.append(parsed_data)
             else:
                 logger.debug('Skipped by rule: %s', line.strip())
-                self._skipped_lines.append(line.strip())
+                run.skipped_lines.append(line.strip())
         else:
             logger.debug('Unprocessed: %s', line.strip())
-            self._unprocessed_lines.append(line.strip())
+            run.unprocessed_lines.append(line.strip())
 
     @staticmethod
     def _process_match(idx: int, line: str, match: dict) -> bool:
@@ -96,42 +115,69 @@ class GameTranscriptProcessor:
         return line
 
     @staticmethod
-    def _read_transcript(transcript: Path) -> list[str]:
-        # Read the raw game transcript.
-        with open(transcript, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-        return lines
+    def _read_transcript(transcript: Path | str) -> Iterator[str]:
+        # Stream the lines of the raw game transcript, compressed or not.
+        with compression.open_file(Path(transcript)) as file:
+            yield from file
 
-    def parse_transcript(self, transcript: Path) -> pd.DataFrame:
+    def parse_transcript(self, transcript: Path | str) -> pd.DataFrame:
         """Reads and extracts actions and events from the game transcript.
 
         Args:
-            transcript: The filepath to the transcript.
+            transcript: The filepath to the transcript, which can be
+                compressed, see `compression.Compression`.
 
         Returns:
             The parsed transcript as pandas Dataframe.
         """
+        return pd.DataFrame([
+            record for records in self.parse_chunks(transcript)
+            for record in records
+        ])
+
+    def parse_chunks(self, transcript: Path | str,
+                     size: int | None = None) -> Iterator[list[dict]]:
+        """Reads and extracts the actions and events in chunks.
+
+        Args:
+            transcript: The filepath to the transcript, which can be
+                compressed, see `compression.Compression`.
+            size: The number of parsed records per chunk. If None, all
+                records are yielded as one chunk.
+
+        Returns:
+            The chunks of parsed records, in order of the transcript.
+        """
         data = []
-        self._unprocessed_lines = []
+        run = _ParseRun()
+        self._runs.last = run
         for i, line in enumerate(self._read_transcript(transcript)):
-            self._process_line(i, line, data)
-        return pd.DataFrame(data)
+            self._process_line(i, line, data, run)
+            if size is not None and len(data) >= size:
+                yield data
+                data = []
+        if data or size is None:
+            yield data
+
+    def _last_run(self) -> _ParseRun:
+        # Retrieves the last parsing run of the calling thread.
+        return getattr(self._runs, 'last', None) or _ParseRun()
 
     def unprocessed_lines(self) -> list[str]:
-        """Makes the unprocessed lines available.
+        """Makes the unprocessed lines of the last run available.
 
         Returns:
             The lines that could not be matched as list.
         """
-        return self._unprocessed_lines
+        return self._last_run().unprocessed_lines
 
     def skipped_lines(self) -> list[str]:
-        """Makes the skipped lines available.
+        """Makes the skipped lines of the last run available.
 
         Returns:
             The lines that were skipped by rules.
         """
-        return self._skipped_lines
+        return self._last_run().skipped_lines
 
 
 class TranscriptPostProcessor:
@@ -142,10 +188,14 @@ class TranscriptPostProcessor:
     further maps and renders columns which require the game context, given by
     the type of game and the whole parsed transcript.
 
+    While mapping the rounds and phases, an index of their row ranges is
+    built, see `index`.
+
     Attributes:
         _df: The parsed transcript.
         _game: The underlying 18xx game.
         _required_columns: Required columns for post-processing.
+        _index: The row ranges of each sequence, major round and phase.
 
     Args:
         df: The parsed transcript.
@@ -162,17 +212,22 @@ class TranscriptPostProcessor:
             'sequence', 'location', 'tile', 'rotation', 'direction', 'train',
             'route', 'per_share', 'old_train', 'new_train'
         ]
+        self._index = {}
 
-    def _add_missing_columns(self):
+    def _with_required_columns(self) -> pd.Index:
+        # Adds the missing required columns to the columns of the transcript.
         missing_columns = set(self._required_columns) - (set(self._df.columns))
+        return self._df.columns.union(missing_columns)
+
+    def _add_missing_columns(self):
         self._df = self._df.reindex(
-            columns=self._df.columns.union(missing_columns),
-            fill_value=np.nan
+            columns=self._with_required_columns(), fill_value=np.nan
         )
 
     def _map_phase(self):
         # Populates phase with forward propagation.
         self._df.phase = self._df.phase.ffill()
+        self._index['phase'] = _row_ranges(self._df.phase)
 
     def _map_rounds(self):
         # Populates rounds with forward propagation.
@@ -181,12 +236,14 @@ class TranscriptPostProcessor:
             self._df.sequence = self._df.sequence.astype(object)
             self._df.loc[0, 'sequence'] = self._game.initial_round
         self._df.sequence = self._df.sequence.ffill()
+        self._index['sequence'] = _row_ranges(self._df.sequence)
 
     def _map_major_round(self):
         # Map major round, e.g., OR 3.1 --> 3.
         self._df['major_round'] = self._df.sequence.apply(
             lambda x: x.split('.')[0]
         )
+        self._index['major_round'] = _row_ranges(self._df.major_round)
 
     def _remove_transcript_lines(self):
         # Removes the lines from the transcript.
@@ -258,6 +315,32 @@ class TranscriptPostProcessor:
         self._set_contribute_target()
         return self._df
 
+    def columns(self) -> list[str]:
+        """Derives the columns of the processed transcript.
+
+        Must be called before `process`, as the columns are derived from the
+        ones of the parsed transcript.
+
+        Returns:
+            The columns in the order of the processed transcript.
+        """
+        removed = ['line', 'entity']
+        return [
+            col for col in self._with_required_columns() if col not in removed
+        ] + ['major_round']
+
+    def index(self) -> dict:
+        """Retrieves the row ranges of the rounds and phases.
+
+        The index is built during `process` and maps each `sequence`,
+        `major_round` and `phase` to its row range `[start, end)` in the
+        processed transcript, e.g. `{'sequence': {'OR 3.1': [210, 300]}}`.
+
+        Returns:
+            The row ranges of the sequences, major rounds and phases.
+        """
+        return self._index
+
     @staticmethod
     def clean_brackets(bracket_string: str) -> str:
         """Removes the additional information from a string.
@@ -288,22 +371,46 @@ class GameStateProcessor:
     transcript. Some columns in the processed transcript could become obsolete,
     but for completeness, these will not be removed.
 
+    During the replay, the game state at the end of each round and at each
+    new phase is collected as a compact summary. Optionally, the state cells
+    that changed at each step are collected as long table, see `changes`.
+
+    Besides the full replay, a partial replay can be generated for a subset
+    of players, companies and state fields. Only the rows with steps that can
+    affect the requested state, or the state it depends on, are replayed.
+
+    A processor replays one transcript at a time. The step engines are shared
+    and only read during the replay, such that the processors of several
+    transcripts can replay at once on a thread pool.
+
     Attributes:
         _df: The cleaned and processed transcript.
         _game: The underlying 18xx game.
+        _collect_changes: Collect the changed state cells of each step.
+        _summary: The game state at the end of each round and at each new
+            phase, keyed by the summary columns.
+        _last: The summary columns of the last replayed row and its game
+            state.
+        _changes: The changed state cells as id, entity, field and value.
+        _previous: The game state of the last replayed row.
+        _keys: The entity and field of each state column.
 
     Args:
         df: The cleaned and processed transcript.
         game: The underlying 18xx game.
+        collect_changes: Collect the changed state cells of each step if True,
+            see `changes`.
 
     Raises:
         AttributeError: If there are no players to initiate the game state or
             the start capital for found players is not set.
     """
 
-    def __init__(self, df: pd.DataFrame, game: Game18xx):
+    def __init__(self, df: pd.DataFrame, game: Game18xx,
+                 collect_changes: bool = False):
         self._df = df
         self._game = game
+        self._collect_changes = collect_changes
 
         players = list(df.player.dropna().unique())
         if not players:
@@ -315,25 +422,236 @@ class GameStateProcessor:
             )
         logger.debug('Found players: %s', players)
 
-        self._game_state = engine.GameState(players, game)
+        self._players = players
         self._steps = engine.StepMapper()
+        self._keys = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        # Starts a replay from the initial game state.
+        self._game_state = engine.GameState(self._players, self._game)
+        self._summary = []
+        self._last = None
+        self._changes = []
+        self._previous = None
 
     def _update(self, row: pd.Series) -> pd.Series:
         # Update a row with its step engine and return the game state.
-        step_type = self._steps.map_type(row.type)
-        step_engine = self._steps.run(step_type)
-        self._game_state.update(row, step_engine())
-        return self._game_state.view()
+        step_engine = self._steps.engine(self._steps.map_type(row.type))
+        if self._last is not None and self._last[0].sequence != row.sequence:
+            self._add_summary(*self._last)
+        self._game_state.update(row, step_engine)
+        view = self._game_state.view()
+        # Copy the keys, the row is reused by pandas during apply.
+        self._last = (row[SUMMARY_COLUMNS], view)
+        if row.type == StepType.NewPhase.name:
+            self._add_summary(*self._last)
+        if self._collect_changes:
+            self._add_changes(row.id, view)
+        return view
+
+    def _add_summary(self, keys: pd.Series, view: pd.Series) -> None:
+        # Adds the game state of the row to the summary, once per row.
+        if self._summary and self._summary[-1]['id'] == keys.id:
+            return
+        self._summary.append(pd.concat([keys, view]))
+
+    def _add_changes(self, line_id: int, view: pd.Series) -> None:
+        # Adds the state cells changed by the row, all cells for the first.
+        values = view.to_numpy()
+        if self._previous is None:
+            changed = range(len(values))
+        else:
+            changed = np.flatnonzero(values != self._previous)
+        for i in changed:
+            entity, field = self._key(view.index[i])
+            self._changes.append(
+                (line_id, entity, field, _change_value(values[i]))
+            )
+        self._previous = values
+
+    def _key(self, column: str) -> tuple[str, str]:
+        # Splits a state column into its entity and field.
+        if column not in self._keys:
+            entities = self._players + sorted(self._game.companies)
+            entity = max(
+                (e for e in entities if column.startswith(f'{e}_')), key=len
+            )
+            self._keys[column] = (entity, column[len(entity) + 1:])
+        return self._keys[column]
 
     def generate(self) -> pd.DataFrame:
         """Generate and add the game state for each step.
 
+        The replay starts from the initial game state, such that generating
+        again results in the same.
+
         Returns:
             Final transcript with game state added.
         """
+        self._reset()
         state = self._df.apply(self._update, axis=1, result_type='expand')
-        self._df = pd.concat([self._df, state], axis=1)
-        return self._df
+        return self._complete(state)
+
+    def replay(self, df: pd.DataFrame) -> list[pd.Series]:
+        """Replays a part of the transcript, for a generation in parts.
+
+        The parts are replayed in order and completed by `generate_from`,
+        which results in the same as `generate`.
+
+        Args:
+            df: The consecutive rows of the cleaned and processed transcript.
+
+        Returns:
+            The game state of each row.
+        """
+        return [self._update(row) for _, row in df.iterrows()]
+
+    def generate_from(self, df: pd.DataFrame,
+                      views: list[pd.Series]) -> pd.DataFrame:
+        """Completes the generation from the game states replayed in parts.
+
+        Args:
+            df: The cleaned and processed transcript, replacing the one given
+                when created.
+            views: The game state of each row, see `replay`.
+
+        Returns:
+            Final transcript with game state added.
+        """
+        self._df = df
+        # Same as the expanded results of `DataFrame.apply`.
+        state = pd.DataFrame(dict(enumerate(views))).T
+        state.index = df.index
+        return self._complete(state.infer_objects())
+
+    def _complete(self, state: pd.DataFrame) -> pd.DataFrame:
+        # Adds the game state and completes the summary.
+        df = pd.concat([self._df, state], axis=1)
+        if self._last is not None:
+            self._add_summary(*self._last)
+        return df
+
+    def summary(self) -> pd.DataFrame:
+        """Retrieves the game state at the end of each round and new phase.
+
+        The summary is collected during `generate` and contains one row for
+        the last step of each stock and operating round, and one row for
+        each new phase, with the columns `id`, `sequence`, `major_round`,
+        `phase` and `type` of the step followed by the game state.
+
+        Returns:
+            The summary of the game state.
+        """
+        return pd.DataFrame(self._summary).reset_index(drop=True)
+
+    def changes(self) -> pd.DataFrame:
+        """Retrieves the state cells that changed at each step.
+
+        The changes are collected during `generate` if enabled, otherwise
+        there are none. The first step contains all cells of the initial state.
+        Fields with expanded columns are named with the key appended, e.g.
+        `shares_PRR` or `trains_D`. Numbers without fraction are integers,
+        such that they are formatted alike, e.g. `600` instead of `600.0`.
+
+        Returns:
+            The changes with the columns `id`, `entity`, `field` and `value`,
+            ordered by the step id.
+        """
+        df = pd.DataFrame(self._changes, columns=CHANGES_COLUMNS)
+        return df.sort_values('id', kind='stable', ignore_index=True)
+
+    def _dependencies(self, entities: set[str], fields: set[str]) -> dict:
+        # Maps entities to the state fields required to replay the request.
+        companies = sorted(self._game.companies)
+        needs = {}
+        for entity in entities:
+            needs[entity] = set(fields)
+            if entity in self._players:
+                if 'value' in needs[entity]:
+                    needs[entity] |= {'cash', 'shares', 'privates'}
+                if 'cash' in needs[entity]:
+                    # Dividends depend on the shares held.
+                    needs[entity].add('shares')
+            elif 'cash' in needs[entity]:
+                # Dividends depend on the shares on the market.
+                needs[entity].add('market')
+        if any('value' in needs[p] for p in entities if p in self._players):
+            # Player values depend on the share prices of all companies.
+            for c in companies:
+                needs.setdefault(c, set()).add('share_price')
+        return needs
+
+    @staticmethod
+    def _row_entities(row: pd.Series) -> set:
+        # Retrieves the players and companies involved in a row.
+        involved = [row.player, row.company, row.source]
+        return {e for e in involved if not pd.isna(e)}
+
+    def _is_relevant(self, row: pd.Series, step_engine: step.EngineStep,
+                     needs: dict) -> bool:
+        # Checks if the step of the row can affect the required state.
+        if not step_engine.fields:
+            return False
+        if 'privates' in step_engine.fields:
+            # Private ownership is always replayed to keep transfers valid.
+            return True
+        entities = needs.keys()
+        if not step_engine.broadcast:
+            entities = self._row_entities(row) & needs.keys()
+        return any(set(step_engine.fields) & needs[e] for e in entities)
+
+    def generate_partial(self, entities: set[str] | None = None,
+                         fields: set[str] | None = None) -> pd.DataFrame:
+        """Generate the game state of selected players and companies.
+
+        Replays only the rows that can affect the requested state and the
+        state it depends on, e.g. the shares held for dividends. The state of
+        rows that are not replayed is the one of the previous row.
+
+        Args:
+            entities: The names of the players and companies. If None, all
+                players and companies are selected.
+            fields: The state fields, e.g. `cash`, `value` or `trains`. If
+                None, all fields are selected.
+
+        Returns:
+            The requested state columns for each step of the transcript.
+
+        Raises:
+            ValueError: If an entity is not a player or company of the game.
+        """
+        known = set(self._players) | self._game.companies
+        if entities is None:
+            entities = known
+        unknown = set(entities) - known
+        if unknown:
+            raise ValueError(f'Unknown entities: {sorted(unknown)}')
+        if fields is None:
+            fields = {
+                'cash', 'privates', 'value', 'priority_deal', 'shares', 'ipo',
+                'market', 'president', 'share_price', 'trains'
+            }
+        needs = self._dependencies(set(entities), set(fields))
+
+        game_state = engine.GameState(self._players, self._game)
+        engines = {}
+        view = game_state.view(entities)
+        views = []
+        for _, row in self._df.iterrows():
+            if row.type not in engines:
+                step_type = self._steps.map_type(row.type)
+                engines[row.type] = self._steps.engine(step_type)
+            if self._is_relevant(row, engines[row.type], needs):
+                game_state.update(row, engines[row.type])
+                view = game_state.view(entities)
+            views.append(view)
+
+        columns = [
+            col for col in view.index if
+            any(_is_field(col, e, f) for e in entities for f in fields)
+        ]
+        return pd.DataFrame(views, index=self._df.index)[columns]
 
     def final_state(self) -> dict:
         """Extracts the final state of players and companies.
@@ -345,3 +663,42 @@ class GameStateProcessor:
             'players': self._game_state.players.as_dict(),
             'companies': self._game_state.companies.as_dict()
         }
+
+
+def row_index(df: pd.DataFrame) -> dict:
+    """Builds the row ranges of the rounds and phases of a transcript.
+
+    Args:
+        df: The processed transcript.
+
+    Returns:
+        The row ranges of the phases, sequences and major rounds, as the index
+        of `TranscriptPostProcessor`.
+    """
+    return {
+        key: _row_ranges(df[key]) for key in
+        ['phase', 'sequence', 'major_round']
+    }
+
+
+def _is_field(column: str, entity: str, field: str) -> bool:
+    # Checks if the state column belongs to the entity and field.
+    key = f'{entity}_{field}'
+    return column == key or column.startswith(key + '_')
+
+
+def _row_ranges(values: pd.Series) -> dict:
+    # Maps the consecutive values to their row range [start, end).
+    starts = np.flatnonzero(values.ne(values.shift()).to_numpy())
+    ends = np.append(starts[1:], len(values))
+    return {
+        str(values.iloc[start]): [int(start), int(end)] for start, end in
+        zip(starts, ends)
+    }
+
+
+def _change_value(value):
+    # Converts numbers without fraction to integers, e.g. `600.0` to `600`.
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return int(value)
+    return value
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Pipelined processing
+
+Module implements running the stages of the processing pipeline concurrently
+on a single transcript. The transcript processor parses the lines in chunks
+in a worker process, which feeds a second worker post-processing the chunks
+incrementally, which feeds the game state replay in the calling process. The
+stages are connected by bounded queues, such that a slow stage blocks the
+previous ones instead of buffering the transcript in memory.
+
+The replay starts once the players are known, i.e. the first round ended. The
+chunks are post-processed with the first record of the next chunk and the
+phase and round of the previous one, such that the joined chunks are the same
+as the transcript post-processed as a whole. If a player appears after the
+first round or the replay fails, the game state is replayed again
+sequentially.
+"""
+import logging
+import multiprocessing
+import queue
+
+from pathlib import Path
+
+import pandas as pd
+
+from ..games import Game18xx
+from .parsing import (
+    GameStateProcessor, GameTranscriptProcessor, TranscriptPostProcessor,
+    row_index
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of parsed records per chunk.
+CHUNK_SIZE = 256
+
+# Number of chunks buffered between two stages.
+QUEUE_SIZE = 4
+
+_POLL_INTERVAL = 1.0
+
+
+class PipelinedProcessor:
+    """PipelinedProcessor
+
+    Class to parse, post-process and replay a transcript with the stages
+    running concurrently. After `generate`, the outputs of the stages are
+    available as from the sequential pipeline.
+
+    Attributes:
+        _transcript: The raw transcript.
+        _game: The underlying 18xx game.
+        _chunk_size: The number of parsed records per chunk.
+        _queue_size: The number of chunks buffered between two stages.
+        _parsed: The parsed transcript and its unprocessed lines.
+        _processed: The processed transcript, its index and unprocessed lines.
+        _gsp: The game state processor of the replay.
+        _collect_changes: Collect the changed state cells of each step.
+
+    Args:
+        transcript: The raw transcript, plain or compressed.
+        game: The underlying 18xx game.
+        chunk_size: The number of parsed records per chunk.
+        queue_size: The number of chunks buffered between two stages.
+        collect_changes: Collect the changed state cells of each step, see
+            `GameStateProcessor`.
+    """
+
+    def __init__(self, transcript: Path, game: Game18xx,
+                 chunk_size: int = CHUNK_SIZE, queue_size: int = QUEUE_SIZE,
+                 collect_changes: bool = False):
+        self._transcript = transcript
+        self._game = game
+        self._chunk_size = chunk_size
+        self._queue_size = queue_size
+        self._collect_changes = collect_changes
+        self._parsed = {}
+        self._processed = {}
+        self._gsp = None
+
+    def generate(self) -> pd.DataFrame:
+        """Parses, post-processes and replays the transcript.
+
+        Returns:
+            Final transcript with game state added.
+
+        Raises:
+            RuntimeError: If a worker of the pipeline died.
+        """
+        context = multiprocessing.get_context()
+        parsed_queue = context.Queue(self._queue_size)
+        processed_queue = context.Queue(self._queue_size)
+        workers = [
+            context.Process(
+                target=_parse_worker, daemon=True,
+                args=(self._transcript, self._game, self._chunk_size,
+                      parsed_queue)
+            ),
+            context.Process(
+                target=_post_process_worker, daemon=True,
+                args=(self._game, parsed_queue, processed_queue)
+            )
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            records, chunks, views = self._replay(processed_queue, workers)
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.kill()
+                worker.join()
+        return self._complete(records, chunks, views)
+
+    def _replay(self, processed: multiprocessing.Queue,
+                workers: list) -> tuple[list, list, list | None]:
+        # Replays the post-processed chunks as they arrive.
+        records, chunks, views = [], [], []
+        sequences = set()
+        while True:
+            kind, payload = _get(processed, workers)
+            if kind == 'error':
+                raise payload
+            if kind == 'done':
+                self._parsed['unprocessed_lines'] = payload
+                return records, chunks, views
+            records.extend(payload[0])
+            chunks.append(payload[1])
+            if views is None:
+                continue
+            try:
+                if self._gsp is not None:
+                    views.extend(self._gsp.replay(payload[1]))
+                    continue
+                sequences.update(payload[1].sequence.unique())
+                if len(sequences) > 1:
+                    # The first round ended, all players are known.
+                    views = self._start(chunks)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.debug('Pipelined replay failed: %s', e)
+                views = None
+
+    def _start(self, chunks: list[pd.DataFrame]) -> list[pd.Series]:
+        # Starts the replay with the players of the chunks received so far.
+        self._gsp = self._state_processor(pd.concat(chunks))
+        return [view for c in chunks for view in self._gsp.replay(c)]
+
+    def _complete(self, records: list[dict], chunks: list[pd.DataFrame],
+                  views: list | None) -> pd.DataFrame:
+        # Joins the post-processed chunks and completes the replay.
+        self._parsed['df'] = pd.DataFrame(records)
+        tpp = TranscriptPostProcessor(self._parsed['df'], self._game)
+        df = pd.concat(chunks).reindex(columns=tpp.columns())
+        self._processed = {
+            'df': df,
+            'index': row_index(df),
+            'unprocessed_lines': self._parsed['unprocessed_lines']
+        }
+        if views is not None and self._gsp is None:
+            # The transcript ended within the first round.
+            try:
+                views = self._start(chunks)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.debug('Pipelined replay failed: %s', e)
+                views = None
+        if views is not None and self._players_match(df):
+            return self._gsp.generate_from(df, views)
+        logger.info('Pipelined replay discarded, replaying sequentially')
+        self._gsp = self._state_processor(df)
+        return self._gsp.generate()
+
+    def _players_match(self, df: pd.DataFrame) -> bool:
+        # Checks if the players of the replay are the ones of the transcript.
+        players = self._gsp._players  # pylint: disable=protected-access
+        return list(df.player.dropna().unique()) == players
+
+    def _state_processor(self, df: pd.DataFrame) -> GameStateProcessor:
+        # Creates the game state processor of the replay.
+        return GameStateProcessor(
+            df, self._game, collect_changes=self._collect_changes
+        )
+
+    def parsed(self) -> dict:
+        """Retrieves the output of the transcript processor.
+
+        Returns:
+            The parsed transcript and its unprocessed lines, as the stage
+            `parsed` of the stage cache.
+        """
+        return self._parsed
+
+    def processed(self) -> dict:
+        """Retrieves the output of the post-processor.
+
+        Returns:
+            The processed transcript, its index and its unprocessed lines, as
+            the stage `processed` of the stage cache.
+        """
+        return self._processed
+
+    def state_processor(self) -> GameStateProcessor:
+        """Retrieves the game state processor of the replay.
+
+        Returns:
+            The processor with the summary, changes and final state.
+        """
+        return self._gsp
+
+
+class _ChunkPostProcessor(TranscriptPostProcessor):
+    # Post-processes a chunk, continuing the phase and round of the previous.
+
+    def __init__(self, df: pd.DataFrame, game: Game18xx,
+                 phase: str | None, sequence: str | None):
+        super().__init__(df, game)
+        self._carry = {'phase': phase, 'sequence': sequence}
+
+    def _continue(self, column: str) -> None:
+        # Sets the first value to the last one of the previous chunk.
+        value = self._carry[column]
+        if value is not None and pd.isna(self._df[column][0]):
+            self._df[column] = self._df[column].astype(object)
+            self._df.loc[0, column] = value
+
+    def _map_phase(self):
+        self._continue('phase')
+        super()._map_phase()
+
+    def _map_rounds(self):
+        self._continue('sequence')
+        super()._map_rounds()
+
+
+def _parse_worker(transcript: Path, game: Game18xx, chunk_size: int,
+                  parsed: multiprocessing.Queue) -> None:
+    # Parses the transcript in chunks.
+    try:
+        gtp = GameTranscriptProcessor(game)
+        for records in gtp.parse_chunks(transcript, chunk_size):
+            parsed.put(('chunk', records))
+        parsed.put(('done', gtp.unprocessed_lines()))
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        parsed.put(('error', e))
+
+
+def _post_process_worker(game: Game18xx, parsed: multiprocessing.Queue,
+                         processed: multiprocessing.Queue) -> None:
+    # Post-processes the chunks, each with the first record of the next one.
+    pending, offset = None, 0
+    carry = {'phase': None, 'sequence': None}
+    try:
+        while True:
+            kind, payload = parsed.get()
+            if kind == 'error':
+                processed.put((kind, payload))
+                return
+            if pending:
+                lookahead = payload[:1] if kind == 'chunk' else []
+                df = _post_process(game, pending + lookahead, carry)
+                df = df.iloc[:len(pending)]
+                df.index = pd.RangeIndex(offset, offset + len(df))
+                offset += len(df)
+                carry = {'phase': df.phase.iloc[-1],
+                         'sequence': df.sequence.iloc[-1]}
+                processed.put(('chunk', (pending, df)))
+            if kind == 'done':
+                processed.put((kind, payload))
+                return
+            pending = payload
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        processed.put(('error', e))
+
+
+def _post_process(game: Game18xx, records: list[dict],
+                  carry: dict) -> pd.DataFrame:
+    # Post-processes the records of a chunk.
+    phase, sequence = carry['phase'], carry['sequence']
+    return _ChunkPostProcessor(
+        pd.DataFrame(records), game,
+        None if pd.isna(phase) else phase, sequence
+    ).process()
+
+
+def _get(source: multiprocessing.Queue, workers: list) -> tuple:
+    # Receives the next item, raises if a worker died meanwhile.
+    while True:
+        try:
+            return source.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            for worker in workers:
+                if worker.exitcode not in [None, 0]:
+                    raise RuntimeError(
+                        f'Pipeline worker exited with code {worker.exitcode}'
+                    ) from None
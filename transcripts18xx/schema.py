@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Result schema
+
+Module implements the schema of the parsed results. The columns and their
+types are derived from the game and the number of players, such that the
+results are written and read with the same types for every game. This avoids
+the type inference when reading and keeps the types consistent across games,
+e.g. a phase column containing only numbers is still read as string.
+
+The version of the schema is saved in the metadata, see `SCHEMA_VERSION`.
+Results written without it, i.e. before the schema was introduced, are read
+with inferred types.
+"""
+import logging
+
+import pandas as pd
+
+from .games import Game18xx
+from .pipe.parsing import CHANGES_COLUMNS, SUMMARY_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+STEP_COLUMNS = {
+    'phase': 'object',
+    'type': 'object',
+    'parent': 'object',
+    'id': 'int64',
+    'player': 'object',
+    'amount': 'float64',
+    'private': 'object',
+    'source': 'object',
+    'percentage': 'float64',
+    'company': 'object',
+    'share_price': 'float64',
+    'sequence': 'object',
+    'location': 'object',
+    'tile': 'object',
+    'rotation': 'float64',
+    'direction': 'object',
+    'train': 'object',
+    'route': 'object',
+    'per_share': 'float64',
+    'old_train': 'object',
+    'new_train': 'object',
+    'major_round': 'object'
+}
+
+PLAYER_FIELDS = {
+    'cash': 'float64',
+    'privates': 'int64',
+    'value': 'float64',
+    'priority_deal': 'bool'
+}
+
+COMPANY_FIELDS = {
+    'cash': 'float64',
+    'privates': 'int64',
+    'ipo': 'int64',
+    'market': 'int64',
+    'president': 'object',
+    'share_price': 'float64'
+}
+
+
+def state_schema(game: Game18xx, num_players: int) -> dict[str, str]:
+    """Derives the state columns and their types.
+
+    The players are named by their anonymized name, e.g. `player1`. The order
+    is the same as in the game state view.
+
+    Args:
+        game: The underlying 18xx game.
+        num_players: The number of players.
+
+    Returns:
+        The state columns and their types.
+    """
+    companies = sorted(game.companies)
+    trains = sorted(game.trains)
+    schema = {}
+    for i in range(num_players):
+        key = f'player{i + 1}_%s'
+        schema.update({key % k: v for k, v in PLAYER_FIELDS.items()})
+        schema.update({key % f'shares_{c}': 'int64' for c in companies})
+    for company in companies:
+        key = f'{company}_%s'
+        schema.update({key % k: v for k, v in COMPANY_FIELDS.items()})
+        schema.update({key % f'trains_{t}': 'int64' for t in trains})
+    return schema
+
+
+def final_schema(game: Game18xx, num_players: int) -> dict[str, str]:
+    """Derives the columns and their types of the parsed transcript.
+
+    Args:
+        game: The underlying 18xx game.
+        num_players: The number of players.
+
+    Returns:
+        The step columns followed by the state columns and their types.
+    """
+    return STEP_COLUMNS | state_schema(game, num_players)
+
+
+def summary_schema(game: Game18xx, num_players: int) -> dict[str, str]:
+    """Derives the columns and their types of the round summary.
+
+    Args:
+        game: The underlying 18xx game.
+        num_players: The number of players.
+
+    Returns:
+        The summary columns followed by the state columns and their types.
+    """
+    keys = {k: STEP_COLUMNS[k] for k in SUMMARY_COLUMNS}
+    return keys | state_schema(game, num_players)
+
+
+def changes_schema() -> dict[str, str]:
+    """Derives the columns and their types of the state changes.
+
+    The values of all fields are stored as string, as the fields have
+    different types.
+
+    Returns:
+        The change columns and their types.
+    """
+    return dict(zip(CHANGES_COLUMNS, ['int64', 'object', 'object', 'object']))
+
+
+def conform(df: pd.DataFrame, schema: dict[str, str]) -> pd.DataFrame:
+    """Casts the columns of a dataframe to the schema.
+
+    The columns keep the order of the dataframe. String columns keep missing
+    values and convert all other values to string. Columns which are not part
+    of the schema are kept as they are.
+
+    Args:
+        df: The dataframe.
+        schema: The columns and their types.
+
+    Returns:
+        The dataframe with the columns of the schema cast to their type.
+
+    Raises:
+        ValueError: If columns of the schema are missing in the dataframe.
+    """
+    missing = [col for col in schema if col not in df.columns]
+    if missing:
+        raise ValueError(f'Columns of the schema missing: {missing}')
+    unknown = [col for col in df.columns if col not in schema]
+    if unknown:
+        logger.warning('Columns not in the schema: %s', unknown)
+    data = {}
+    for col in df.columns:
+        dtype = schema.get(col, None)
+        if dtype is None:
+            data[col] = df[col]
+        elif dtype == 'object':
+            data[col] = df[col].map(
+                lambda x: x if pd.isna(x) else str(x)
+            ).astype(object)
+        else:
+            data[col] = df[col].astype(dtype)
+    return pd.DataFrame(data, index=df.index)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Stage cache
+
+Module implements a cache of the intermediate outputs of the parsing
+pipeline, i.e. the parsed transcript of `GameTranscriptProcessor` and the
+processed transcript of `TranscriptPostProcessor`. The outputs are stored as
+pickle files in a cache directory and keyed by the transcript hash and the
+fingerprint of the code producing them, see `fingerprint.stage_fingerprint`.
+If only the game state updates changed, parsing resumes from the processed
+transcript and only replays the game state.
+
+The cache files are trusted input, as they are unpickled. Do not share a cache
+directory with untrusted parties.
+"""
+import logging
+import pickle
+
+from pathlib import Path
+
+from . import fingerprint, storage
+from .games import Game18xx
+
+logger = logging.getLogger(__name__)
+
+STAGES = ['parsed', 'processed']
+
+
+class StageCache:
+    """StageCache
+
+    Class to save and load the intermediate outputs of the parsing pipeline
+    in a directory. Each transcript and stage is stored in one file, e.g.
+    `1830_123_processed.pkl`, which is replaced when the stage is saved again.
+
+    Attributes:
+        path: The cache directory.
+
+    Args:
+        path: The cache directory, created if it does not exist.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, name: str, stage: str) -> Path:
+        # Builds the file of a transcript stage.
+        return self.path.joinpath(f'{name}_{stage}.pkl')
+
+    def load(self, name: str, stage: str, key: str) -> dict | None:
+        """Loads the output of a stage if its key matches.
+
+        Args:
+            name: The transcript name, e.g. `1830_123`.
+            stage: The stage, see `STAGES`.
+            key: The key of the output, see `stage_key`.
+
+        Returns:
+            The output of the stage, None if not cached, outdated or
+            unreadable.
+        """
+        file = self._file(name, stage)
+        if not file.exists():
+            return None
+        try:
+            with open(file, 'rb') as f:
+                content = pickle.load(f)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning('Stage cache unreadable: %s (%s)', file, e)
+            return None
+        if content.get('key') != key:
+            return None
+        logger.debug('Stage cache hit: %s', file)
+        return content['data']
+
+    def save(self, name: str, stage: str, key: str, data: dict) -> None:
+        """Saves the output of a stage, replacing the previous one.
+
+        The file is replaced atomically, such that readers never load a
+        partially written file.
+
+        Args:
+            name: The transcript name, e.g. `1830_123`.
+            stage: The stage, see `STAGES`.
+            key: The key of the output, see `stage_key`.
+            data: The output of the stage.
+        """
+        with storage.atomic_file(self._file(name, stage)) as tmp:
+            with open(tmp, 'wb') as f:
+                pickle.dump(
+                    {'key': key, 'data': data}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL
+                )
+
+
+def stage_key(stage: str, game: Game18xx, transcript_hash: str) -> str:
+    """Builds the key of a stage output.
+
+    Args:
+        stage: The stage, see `STAGES`.
+        game: The underlying 18xx game.
+        transcript_hash: The hash of the raw transcript, see
+            `fingerprint.transcript_hash`.
+
+    Returns:
+        The key combining the transcript hash and the stage fingerprint.
+    """
+    return f'{transcript_hash}:{fingerprint.stage_fingerprint(stage, game)}'
@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Result storage backends
+
+Module implements the storage backends to write and read the parsed results.
+CSV is the default format. Parquet and Feather are columnar formats which
+require the optional dependency `pyarrow`. The Parquet backend cuts the row
+groups at the round boundaries, such that readers can push down predicates on
+the rounds and read single rounds only.
+
+Files are written atomically with `atomic_file`, such that readers and
+interrupted runs never leave partially written files behind.
+"""
+import abc
+import contextlib
+import enum
+import os
+import stat
+import tempfile
+import typing
+
+from pathlib import Path
+from typing import Iterator
+
+from . import compression
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+
+class StorageFormat(enum.Enum):
+    """StorageFormat
+
+    Enum class to describe the available storage formats of the parsed results.
+    The values are the file suffixes of the formats.
+    """
+    CSV = '.csv'
+    PARQUET = '.parquet'
+    FEATHER = '.feather'
+
+    def backend(self) -> "StorageBackend":
+        """Matches the format to its storage backend.
+
+        Returns:
+            The storage backend.
+
+        Raises:
+            ValueError: If the format is not implemented.
+        """
+        if self == StorageFormat.CSV:
+            return CsvBackend()
+        if self == StorageFormat.PARQUET:
+            return ParquetBackend()
+        if self == StorageFormat.FEATHER:
+            return FeatherBackend()
+        raise ValueError(f'Unknown storage format: {self.name}')
+
+
+class StorageBackend(abc.ABC):
+    """StorageBackend
+
+    Base class to write and read dataframes in a specific file format.
+
+    Attributes:
+        format: The storage format of the backend.
+    """
+
+    def __init__(self):
+        self.format = StorageFormat.CSV
+
+    @abc.abstractmethod
+    def read(self, file: Path, columns: list[str] | None = None,
+             dtypes: dict[str, str] | None = None) -> "pd.DataFrame":
+        """Reads the dataframe.
+
+        Args:
+            file: The file to read.
+            columns: The columns to read. If None, all columns are read.
+            dtypes: The types of the columns, used by formats which do not
+                store types. If None, the types are inferred.
+
+        Returns:
+            The dataframe.
+        """
+
+    @abc.abstractmethod
+    def columns(self, file: Path) -> list[str]:
+        """Reads the column names without reading the data.
+
+        Args:
+            file: The file to read.
+
+        Returns:
+            The column names in order.
+        """
+
+    def read_rows(self, file: Path, start: int, end: int,
+                  dtypes: dict[str, str] | None = None) -> "pd.DataFrame":
+        """Reads the rows [start, end) of the dataframe.
+
+        By default, reads the full dataframe and slices it.
+
+        Args:
+            file: The file to read.
+            start: The first row to read.
+            end: The row to stop reading at, exclusive.
+            dtypes: The types of the columns, used by formats which do not
+                store types. If None, the types are inferred.
+
+        Returns:
+            The rows, indexed by their row in the dataframe.
+        """
+        return self.read(file, dtypes=dtypes).iloc[start:end]
+
+    @abc.abstractmethod
+    def write(self, file: Path, df: "pd.DataFrame",
+              row_groups: list[list[int]] | None = None) -> None:
+        """Writes the dataframe.
+
+        Args:
+            file: The file to write.
+            df: The dataframe.
+            row_groups: The row ranges [start, end) to group rows by, if the
+                format supports it.
+        """
+
+
+class CsvBackend(StorageBackend):
+    """CsvBackend
+
+    Class to write and read dataframes as CSV with comma separator. Files are
+    compressed by their suffix, e.g. `.csv.gz`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.format = StorageFormat.CSV
+
+    def read(self, file: Path, columns: list[str] | None = None,
+             dtypes: dict[str, str] | None = None) -> "pd.DataFrame":
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        df = pd.read_csv(
+            file, header=0, sep=',', usecols=columns, dtype=dtypes
+        )
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        return df
+
+    def columns(self, file: Path) -> list[str]:
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        return list(pd.read_csv(file, header=0, sep=',', nrows=0).columns)
+
+    def read_rows(self, file: Path, start: int, end: int,
+                  dtypes: dict[str, str] | None = None) -> "pd.DataFrame":
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        df = pd.read_csv(
+            file, header=0, sep=',', skiprows=range(1, start + 1),
+            nrows=end - start, dtype=dtypes
+        )
+        df.index = pd.RangeIndex(start, start + len(df))
+        return df
+
+    def write(self, file: Path, df: "pd.DataFrame",
+              row_groups: list[list[int]] | None = None) -> None:
+        df.to_csv(file, index=False, sep=',')
+
+
+class ParquetBackend(StorageBackend):
+    """ParquetBackend
+
+    Class to write and read dataframes as Parquet. Each row range is written
+    as a separate row group, such that single ranges can be read.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.format = StorageFormat.PARQUET
+
+    def read(self, file: Path, columns: list[str] | None = None,
+             dtypes: dict[str, str] | None = None) -> "pd.DataFrame":
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        return pd.read_parquet(file, columns=columns)
+
+    def columns(self, file: Path) -> list[str]:
+        return _import_parquet().read_schema(file).names
+
+    def read_rows(self, file: Path, start: int, end: int,
+                  dtypes: dict[str, str] | None = None) -> "pd.DataFrame":
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        pq = _import_parquet()
+        parquet_file = pq.ParquetFile(file)
+        groups, offset, first = [], 0, None
+        for i in range(parquet_file.num_row_groups):
+            num_rows = parquet_file.metadata.row_group(i).num_rows
+            if offset < end and offset + num_rows > start:
+                groups.append(i)
+                first = offset if first is None else first
+            offset += num_rows
+        if not groups:
+            return self.read(file).iloc[0:0]
+        df = parquet_file.read_row_groups(groups).to_pandas()
+        df = df.iloc[start - first:end - first]
+        df.index = pd.RangeIndex(start, start + len(df))
+        return df
+
+    def write(self, file: Path, df: "pd.DataFrame",
+              row_groups: list[list[int]] | None = None) -> None:
+        pq = _import_parquet()
+        table = _import_arrow().Table.from_pandas(df, preserve_index=False)
+        if not row_groups:
+            row_groups = [[0, len(df)]]
+        with pq.ParquetWriter(file, table.schema) as writer:
+            for start, end in row_groups:
+                writer.write_table(table.slice(start, end - start))
+
+
+class FeatherBackend(StorageBackend):
+    """FeatherBackend
+
+    Class to write and read dataframes as Feather, which is memory-mapped when
+    read.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.format = StorageFormat.FEATHER
+
+    def read(self, file: Path, columns: list[str] | None = None,
+             dtypes: dict[str, str] | None = None) -> "pd.DataFrame":
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        return pd.read_feather(file, columns=columns)
+
+    def columns(self, file: Path) -> list[str]:
+        _import_arrow()
+        import pyarrow.ipc  # pylint: disable=import-outside-toplevel
+        with pyarrow.ipc.open_file(file) as reader:
+            return reader.schema.names
+
+    def write(self, file: Path, df: "pd.DataFrame",
+              row_groups: list[list[int]] | None = None) -> None:
+        _import_arrow()
+        df.reset_index(drop=True).to_feather(file)
+
+
+_default_format = StorageFormat.CSV
+
+
+def default_format() -> StorageFormat:
+    """Retrieves the global default storage format.
+
+    Returns:
+        The storage format used if none is specified.
+    """
+    return _default_format
+
+
+def set_default_format(storage_format: StorageFormat) -> None:
+    """Sets the global default storage format.
+
+    Args:
+        storage_format: The storage format used if none is specified.
+    """
+    global _default_format  # pylint: disable=global-statement
+    _default_format = storage_format
+
+
+def backend(file: Path) -> StorageBackend:
+    """Retrieves the storage backend of a file by its suffix.
+
+    Args:
+        file: The file to read or write.
+
+    Returns:
+        The storage backend.
+
+    Raises:
+        ValueError: If no storage format matches the file suffix.
+    """
+    suffix = compression.strip(file).suffix
+    try:
+        return StorageFormat(suffix).backend()
+    except ValueError as e:
+        raise ValueError(f'Unknown storage format: {suffix}') from e
+
+
+def resolve(file: Path, files: set[str] | None = None) -> Path:
+    """Resolves the file of any storage format that exists.
+
+    If several exist, the most recently modified one is used, such that
+    outputs written in another format are not shadowed by older ones. On
+    equal modification times, the default format is preferred. The file can
+    be compressed, see `compression.resolve`.
+
+    Args:
+        file: The file with any storage format suffix.
+        files: The names of the files in the directory of the file. If None,
+            the file system is checked.
+
+    Returns:
+        The most recent existing file, or the file with the default format
+        suffix if none exists.
+    """
+    formats = dict.fromkeys([default_format()] + list(StorageFormat))
+    candidates = [
+        compression.resolve(file.with_suffix(f.value), files) for f in formats
+    ]
+    existing = [c for c in candidates if _exists(c, files)]
+    if not existing:
+        return file.with_suffix(default_format().value)
+    if len(existing) == 1:
+        return existing[0]
+    return max(existing, key=lambda c: c.stat().st_mtime_ns)
+
+
+@contextlib.contextmanager
+def atomic_file(file: Path) -> Iterator[Path]:
+    """Provides a temporary file which replaces the file when written.
+
+    The temporary file is created in the directory of the file and ends with
+    the file name, such that the format and compression are detected from
+    its suffixes. It is synced to disk before it replaces the file. If
+    writing fails, the temporary file is removed and the file is kept.
+
+    The file keeps its permissions if it exists, otherwise it gets the
+    permissions of a newly created file, i.e. restricted by the umask only.
+
+    Args:
+        file: The file to write.
+
+    Yields:
+        The temporary file to write to.
+    """
+    fd, name = tempfile.mkstemp(prefix='.', suffix=f'.{file.name}',
+                                dir=file.parent)
+    os.close(fd)
+    tmp = Path(name)
+    try:
+        yield tmp
+        with open(tmp, 'rb') as f:
+            os.fsync(f.fileno())
+        os.chmod(tmp, _file_mode(file))
+        os.replace(tmp, file)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _file_mode(file: Path) -> int:
+    # Retrieves the permissions of the file, or of a new one if not existing.
+    try:
+        return stat.S_IMODE(file.stat().st_mode)
+    except FileNotFoundError:
+        umask = _read_umask()
+        return 0o666 & ~(_UMASK if umask is None else umask)
+
+
+def _read_umask() -> int | None:
+    # Reads the umask from the process status without setting it, Linux only.
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except OSError:
+        pass
+    return None
+
+
+def _import_umask() -> int:
+    # Reads the umask on import, setting it only if the status is unavailable.
+    umask = _read_umask()
+    if umask is None:
+        umask = os.umask(0)
+        os.umask(umask)
+    return umask
+
+
+_UMASK = _import_umask()
+
+
+def _exists(file: Path, files: set[str] | None) -> bool:
+    # Checks if the file exists, by the file names if given.
+    if files is None:
+        return file.exists()
+    return file.name in files
+
+
+def _import_arrow():
+    # Imports the optional dependency pyarrow.
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise ImportError(
+            'Storage format requires the optional dependency `pyarrow`'
+        ) from e
+    return pyarrow
+
+
+def _import_parquet():
+    # Imports the parquet module of the optional dependency pyarrow.
+    _import_arrow()
+    import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+    return pyarrow.parquet
@@ -10,19 +10,30 @@ transcript name and run full verification on these.
 import enum
 import json
 import ast
+import copy
+import dataclasses
 import logging
+import os
+import re
+import typing
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from dataclasses import dataclass
+from typing import Iterator
 
-import pandas as pd
+from . import cache, compression, fingerprint, games, stages, storage
+from .pipe import verification
 
-from . import games
-from .pipe import parsing, verification
-from .engine.steps.step import StepType
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+    from .catalog import Catalog
 
 logger = logging.getLogger(__name__)
 
+# Columns of the parsed results which can hold player names.
+_PLAYER_NAME_COLUMNS = ['player', 'source', 'entity', 'value']
+
 
 class ProcessingResult(enum.Enum):
     """ProcessingResult
@@ -37,23 +48,69 @@ class TranscriptParser:
 
     Class to run the parsing pipeline. Verifies the final values of the players
     with the result in the game log in case the game was finished. Parsed
-    transcript and its metadata are saved in the raw transcript folder.
+    transcript, its per round summary and its metadata are saved in the raw
+    transcript folder. Optionally, the state changes of each step are saved
+    as long table and the metadata is indexed in a catalog.
+
+    The transcript can be compressed, e.g. `1830_123.txt.gz`, and is read as
+    stream. The outputs can be compressed as well, which applies to the
+    metadata and CSV outputs, as Parquet and Feather are compressed by their
+    format.
+
+    The metadata records the hash of the transcript, the fingerprint of the
+    engine, see `fingerprint`, and the options of the outputs, see
+    `output_options`, to detect outputs which are up-to-date. With a
+    stage cache, the parsed and processed transcripts are saved and parsing
+    resumes from the latest stage which is up-to-date.
+
+    Optionally, the stages run pipelined, see `pipe.pipeline`, such that the
+    lines are parsed while the game state of the previous lines is replayed.
+    The outputs are the same as of the sequential stages.
 
     Args:
-        transcript: The filepath to the transcript.
+        transcript: The filepath to the transcript, plain or compressed.
         game: The underlying 18xx game, see `games.G18xx`.
+        storage_format: The storage format of the parsed transcript and its
+            summary. If None, the global default format is used, see
+            `storage.default_format`.
+        export_changes: Save the changed state cells of each step as long
+            table with the columns `id`, `entity`, `field` and `value`.
+        catalog: The catalog to update with the metadata, see
+            `catalog.Catalog`. If None, no catalog is updated. Failing to
+            update it is logged and does not fail parsing.
+        output_compression: The compression of the outputs. If None, the
+            outputs are not compressed.
+        stage_cache: The cache of the intermediate outputs, see
+            `stages.StageCache`. If None, all stages are run.
+        pipelined: Run the stages concurrently in worker processes. If the
+            processed transcript is cached, only the replay is run.
     """
 
-    def __init__(self, transcript: Path, game: games.Game18xx):
+    def __init__(self, transcript: Path, game: games.Game18xx,
+                 storage_format: storage.StorageFormat | None = None,
+                 export_changes: bool = False,
+                 catalog: "Catalog | None" = None,
+                 output_compression: compression.Compression | None = None,
+                 stage_cache: stages.StageCache | None = None,
+                 pipelined: bool = False):
+        import pandas as pd  # pylint: disable=import-outside-toplevel
         self._transcript = transcript
         self._game = game
+        self._storage_format = storage_format
+        self._export_changes = export_changes
+        self._catalog = catalog
+        self._output_compression = output_compression
+        self._stage_cache = stage_cache
+        self._pipelined = pipelined
 
         self._metadata = {}
-        game_type, game_id = transcript.stem.split('_')
+        game_type, game_id = _transcript_name(transcript).split('_')
         self._metadata['game'] = game_type
         self._metadata['id'] = game_id
 
         self._df = pd.DataFrame()
+        self._summary = pd.DataFrame()
+        self._changes = pd.DataFrame()
 
     def _anonymize_players(self) -> dict:
         # Map the player names to general format `playerx`.
@@ -63,12 +120,87 @@ class TranscriptParser:
 
     def _anonymize(self, obj):
         # Anonymize a data container with the general mapping format.
-        for old, new in self._metadata['mapping'].items():
-            obj = _replace(obj, old, new)
-        return obj
+        return _replace(obj, self._metadata['mapping'])
+
+    def _stage_key(self, stage: str) -> str:
+        # Builds the key of the stage output in the stage cache.
+        return stages.stage_key(
+            stage, self._game, self._metadata['transcript_hash']
+        )
+
+    def _load_stage(self, stage: str) -> dict | None:
+        # Loads the stage output from the stage cache, None if not cached.
+        if self._stage_cache is None:
+            return None
+        return self._stage_cache.load(
+            _transcript_name(self._transcript), stage, self._stage_key(stage)
+        )
+
+    def _save_stage(self, stage: str, data: dict) -> None:
+        # Saves the stage output in the stage cache, if any.
+        if self._stage_cache is not None:
+            self._stage_cache.save(
+                _transcript_name(self._transcript), stage,
+                self._stage_key(stage), data
+            )
+
+    def _run_stage(self, stage: str, run) -> dict:
+        # Runs the stage, or loads its output from the stage cache.
+        data = self._load_stage(stage)
+        if data is None:
+            data = run()
+            self._save_stage(stage, data)
+        return data
+
+    def _parse_stage(self) -> dict:
+        # Parses the lines of the transcript.
+        from .pipe import parsing  # pylint: disable=import-outside-toplevel
+        gtp = parsing.GameTranscriptProcessor(self._game)
+        df_parsed = gtp.parse_transcript(self._transcript)
+        logger.debug('Game transcript parsed')
+        return {'df': df_parsed, 'unprocessed_lines': gtp.unprocessed_lines()}
+
+    def _process_stage(self) -> dict:
+        # Post-processes the parsed transcript, resumes from the parsed stage.
+        from .pipe import parsing  # pylint: disable=import-outside-toplevel
+        parsed = self._run_stage('parsed', self._parse_stage)
+        tpp = parsing.TranscriptPostProcessor(parsed['df'], self._game)
+        df_processed = tpp.process()
+        logger.debug('Game transcript post-processed')
+        return {
+            'df': df_processed,
+            'index': tpp.index(),
+            'unprocessed_lines': parsed['unprocessed_lines']
+        }
+
+    def _replay_stage(self) -> tuple:
+        # Replays the game state, runs the stages pipelined if not cached.
+        # pylint: disable=import-outside-toplevel
+        from .pipe import parsing, pipeline
+        processed = None
+        if self._pipelined:
+            processed = self._load_stage('processed')
+        if self._pipelined and processed is None:
+            pp = pipeline.PipelinedProcessor(
+                self._transcript, self._game,
+                collect_changes=self._export_changes
+            )
+            df = pp.generate()
+            logger.debug('Game transcript parsed, post-processed and mapped')
+            self._save_stage('parsed', pp.parsed())
+            self._save_stage('processed', pp.processed())
+            return pp.processed(), pp.state_processor(), df
+        if processed is None:
+            processed = self._run_stage('processed', self._process_stage)
+        gsp = parsing.GameStateProcessor(
+            processed['df'], self._game, collect_changes=self._export_changes
+        )
+        return processed, gsp, gsp.generate()
 
     def _evaluate_last_state(self) -> dict:
         # Evaluate the last state if finished and the results.
+        # pylint: disable=import-outside-toplevel
+        from .engine.steps.step import StepType
         last_state = {'finished': str(), 'result': {}, 'winner': str()}
         if StepType.GameOver.name not in self._df.type.tolist():
             last_state['finished'] = 'NotFinished'
@@ -126,51 +258,109 @@ class TranscriptParser:
         Raises:
             FileNotFoundError: If transcript does not exist.
         """
+        # pylint: disable=import-outside-toplevel
+        from . import schema
         if not self._transcript:
             raise FileNotFoundError(
                 f'Transcript does not exist: {self._transcript}'
             )
 
         try:
-            gtp = parsing.GameTranscriptProcessor(self._game)
-            df_parsed = gtp.parse_transcript(self._transcript)
-            logger.debug('Game transcript parsed')
-
-            tpp = parsing.TranscriptPostProcessor(df_parsed, self._game)
-            df_processed = tpp.process()
-            logger.debug('Game transcript post-processed')
-
-            gsp = parsing.GameStateProcessor(df_processed, self._game)
-            self._df = gsp.generate()
+            self._metadata['transcript_hash'] = fingerprint.transcript_hash(
+                self._transcript
+            )
+            self._metadata['engine_fingerprint'] = (
+                fingerprint.engine_fingerprint(self._game)
+            )
+            self._metadata['schema_version'] = schema.SCHEMA_VERSION
+            processed, gsp, self._df = self._replay_stage()
+            self._metadata['index'] = processed['index']
+            self._summary = gsp.summary()
+            if self._export_changes:
+                self._changes = gsp.changes()
             logger.debug('Game state mapped')
 
             mapping = self._anonymize_players()
             self._metadata['num_players'] = len(mapping.keys())
             self._metadata['mapping'] = mapping
-            self._anonymize(self._df)
+            self._metadata['privates'] = self._game.private_table()
+            _anonymize_dataframe(self._df, mapping)
+            _anonymize_dataframe(self._summary, mapping)
+            if self._export_changes:
+                _anonymize_dataframe(self._changes, mapping)
             self._metadata.update(self._anonymize(self._evaluate_last_state()))
             self._metadata['final_state'] = self._anonymize(gsp.final_state())
             self._metadata['verification'] = self._run_minimal_verification()
-            self._metadata['unprocessed_lines'] = gtp.unprocessed_lines()
+            self._metadata['unprocessed_lines'] = (
+                processed['unprocessed_lines']
+            )
             self._metadata['parse_result'] = ProcessingResult.SUCCESS.name
-            _write_dataframe(_dataframe_path(self._transcript), self._df)
+            num_players = self._metadata['num_players']
+            storage_format = self._storage_format or storage.default_format()
+            self._metadata['outputs'] = output_options(
+                storage_format, self._export_changes, self._output_compression
+            )
+            output = self._output_compression
+            if storage_format != storage.StorageFormat.CSV:
+                # Columnar formats are compressed by the format itself.
+                output = None
+            _write_dataframe(
+                _dataframe_path(self._transcript, storage_format, output),
+                schema.conform(
+                    self._df, schema.final_schema(self._game, num_players)
+                ),
+                list(self._metadata['index']['sequence'].values())
+            )
+            _write_dataframe(
+                _summary_path(self._transcript, storage_format, output),
+                schema.conform(
+                    self._summary,
+                    schema.summary_schema(self._game, num_players)
+                )
+            )
+            if self._export_changes:
+                _write_dataframe(
+                    _changes_path(self._transcript, storage_format, output),
+                    schema.conform(self._changes, schema.changes_schema())
+                )
         except Exception as e:
             self._metadata['parse_result'] = e.args[0]
         finally:
-            _write_json(_metadata_path(self._transcript), self._metadata)
+            _write_json(
+                _metadata_path(self._transcript, self._output_compression),
+                self._metadata
+            )
 
+        if self._catalog is not None:
+            try:
+                self._catalog.update(self._transcript, self._metadata)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.warning(
+                    'Catalog update failed: %s: %s', type(e).__name__, e
+                )
         return self._metadata
 
 
-@dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True)
 class TranscriptContext:
     """TranscriptsContext
 
     Class implements a context to access relevant data from a parsed transcript.
+    The row ranges of the rounds and phases are used to read only the rows of
+    a specific round or phase from the parsed result. The results are read with
+    the column types of their schema, see `schema.final_schema`, if written
+    with the current schema version. Otherwise, the types are inferred.
+
+    If cached, the metadata and the results are read through the process-wide
+    file cache, see `cache.default_cache`, and copies of the cached values are
+    returned.
     """
     raw: Path
     meta_path: Path
     result_path: Path
+    summary_path: Path
+    changes_path: Path
+    truth_path: Path
     game_id: int
     game_type: str
     valid: bool
@@ -180,6 +370,9 @@ class TranscriptContext:
     game_ending: str | None
     winner: str | None
     unprocessed_lines: list[str]
+    index: dict
+    schema_version: int | None = None
+    cached: bool = dataclasses.field(default=False, compare=False, repr=False)
 
     @staticmethod
     def from_raw(transcript: Path) -> "TranscriptContext":
@@ -191,38 +384,288 @@ class TranscriptContext:
         Returns:
             Its context with relevant data.
         """
-        meta = _metadata(transcript)
+        return TranscriptContext.from_metadata(
+            transcript, _metadata(transcript)
+        )
+
+    @staticmethod
+    def from_metadata(transcript: Path, meta: dict,
+                      files: set[str] | None = None,
+                      cached: bool = False) -> "TranscriptContext":
+        """Create a context from the raw transcript path and its metadata.
+
+        Args:
+            transcript: The raw transcript path.
+            meta: The metadata of the parsed transcript.
+            files: The names of the files in the transcript directory, to
+                resolve the paths without checking the file system. If None,
+                the file system is checked.
+            cached: Read the metadata and the results through the file cache.
+
+        Returns:
+            Its context with relevant data.
+        """
         cnt = TranscriptContext(
             raw=transcript,
-            meta_path=_metadata_path(transcript),
-            result_path=_dataframe_path(transcript),
-            game_id=_transcript_id(transcript.stem),
-            game_type=_transcript_game(transcript.stem),
+            meta_path=_metadata_path(transcript, files=files),
+            result_path=_dataframe_path(transcript, files=files),
+            summary_path=_summary_path(transcript, files=files),
+            changes_path=_changes_path(transcript, files=files),
+            truth_path=_truth_path(transcript, files=files),
+            game_id=_transcript_id(_transcript_name(transcript)),
+            game_type=_transcript_game(_transcript_name(transcript)),
             valid=_valid_record(meta),
             parse_result=_parse_result(meta),
             verification_result=_verification_result(meta),
             num_players=_num_players(meta),
             game_ending=_game_ending(meta),
             winner=_winner(meta),
-            unprocessed_lines=_unprocessed_lines(meta)
+            unprocessed_lines=_unprocessed_lines(meta),
+            index=_index(meta),
+            schema_version=_schema_version(meta),
+            cached=cached
         )
         return cnt
 
+    @staticmethod
+    def load_directory(directory: Path, game: str | None = None,
+                       valid_only: bool = False, lazy: bool = False,
+                       max_workers: int | None = None
+                       ) -> list["TranscriptContext"] | Iterator[
+                           "TranscriptContext"]:
+        """Create the contexts of all raw transcripts in a directory.
+
+        The directory is scanned once and the files are grouped by their
+        transcript, i.e. the raw transcript, the metadata, the outputs and the
+        ground truth. The paths of each transcript are resolved from the names
+        of its group without checking the file system. The metadata files are
+        read concurrently on a thread pool.
+
+        Args:
+            directory: The directory of the raw transcripts.
+            game: The game type to load, e.g. `1830`. If None, all games are
+                loaded.
+            valid_only: Load only the valid records, see `valid`.
+            lazy: Return an iterator which yields the contexts as their
+                metadata is read, instead of a list.
+            max_workers: The number of threads to read the metadata with. If
+                None, the default of `ThreadPoolExecutor` is used.
+
+        Returns:
+            The contexts of the raw transcripts, ordered by their name.
+        """
+        groups = _group_files(_scan_directory(directory))
+        transcripts = [
+            directory.joinpath(name) for files in groups.values()
+            for name in files if _is_transcript(name, game)
+        ]
+        contexts = _load_contexts(sorted(transcripts), groups, max_workers)
+        if valid_only:
+            contexts = (cnt for cnt in contexts if cnt.valid)
+        if lazy:
+            return contexts
+        return list(contexts)
+
     def metadata(self) -> dict:
         """Load metadata of the transcript.
 
         Returns:
             The metadata of the transcript.
         """
-        return _metadata(self.raw)
+        return _metadata(self.raw, self.cached)
 
-    def result(self) -> pd.DataFrame:
+    def result(self, columns: list[str] | None = None,
+               players: list[str] | None = None,
+               companies: list[str] | None = None,
+               fields: list[str] | None = None) -> "pd.DataFrame":
         """Load parsed result of the transcript.
 
+        If any selection is given, only the selected columns are read from
+        disk. The explicit columns are combined with the state columns of the
+        selected players and companies, filtered by the fields. If only fields
+        are given, the fields of all players and companies are selected.
+
+        Args:
+            columns: The names of the columns to load, e.g. `sequence`.
+            players: The players to load the state columns for, e.g.
+                `player1`.
+            companies: The companies to load the state columns for, e.g. `PRR`.
+            fields: The state fields to load, e.g. `cash` or `trains`, which
+                also selects expanded columns such as `PRR_trains_D`.
+
         Returns:
             The parsed result of the transcript.
         """
-        return _dataframe(self.raw)
+        # pylint: disable=import-outside-toplevel
+        import pandas as pd
+        from . import schema
+        dtypes = self._schema(schema.final_schema)
+        if all(x is None for x in [columns, players, companies, fields]):
+            return _dataframe(self.raw, dtypes=dtypes, cached=self.cached)
+        try:
+            available = storage.backend(self.result_path).columns(
+                self.result_path
+            )
+        except FileNotFoundError:
+            logger.error('Parsed transcript not found: %s', self.result_path)
+            return pd.DataFrame()
+        selected = _select_columns(
+            available, columns or [], players, companies, fields
+        )
+        return _dataframe(self.raw, selected, dtypes, self.cached)
+
+    def rows_for_round(self, sequence: str) -> "pd.DataFrame":
+        """Load the rows of a round from the parsed result.
+
+        Args:
+            sequence: The round identifier, e.g. `OR 3.2`.
+
+        Returns:
+            The rows of the round, indexed by their row in the parsed result.
+        """
+        return self._rows('sequence', sequence)
+
+    def rows_for_major_round(self, major_round: str) -> "pd.DataFrame":
+        """Load the rows of a major round from the parsed result.
+
+        Args:
+            major_round: The major round identifier, e.g. `OR 3`.
+
+        Returns:
+            The rows of the major round, indexed by their row in the parsed
+            result.
+        """
+        return self._rows('major_round', major_round)
+
+    def rows_for_phase(self, phase: str) -> "pd.DataFrame":
+        """Load the rows of a phase from the parsed result.
+
+        Args:
+            phase: The phase identifier, e.g. `3` or `D`.
+
+        Returns:
+            The rows of the phase, indexed by their row in the parsed result.
+        """
+        return self._rows('phase', phase)
+
+    def _rows(self, key: str, value: str) -> "pd.DataFrame":
+        # Load the rows of a round or phase, using the index if available.
+        # pylint: disable=import-outside-toplevel
+        import pandas as pd
+        from . import schema
+        dtypes = self._schema(schema.final_schema)
+        row_range = self.index.get(key, {}).get(value, None)
+        if row_range is None:
+            df = _dataframe(self.raw, dtypes=dtypes, cached=self.cached)
+            if df.empty:
+                return df
+            return df[df[key].astype(str) == value]
+        try:
+            return _read_dataframe_rows(
+                self.result_path, *row_range, dtypes, self.cached
+            )
+        except FileNotFoundError:
+            logger.error('Parsed transcript not found: %s', self.result_path)
+            return pd.DataFrame()
+
+    def summary(self) -> "pd.DataFrame":
+        """Load the per round summary of the transcript.
+
+        Returns:
+            The game state at the end of each round and at each new phase.
+        """
+        from . import schema  # pylint: disable=import-outside-toplevel
+        return _summary(
+            self.raw, self._schema(schema.summary_schema), self.cached
+        )
+
+    def changes(self) -> "pd.DataFrame":
+        """Load the state changes of the transcript.
+
+        The state changes are only saved if exported by the parser.
+
+        Returns:
+            The changed state cells of each step with the columns `id`,
+            `entity`, `field` and `value`, where the value is a string.
+        """
+        return _changes(self.raw, self.cached)
+
+    def _schema(self, builder) -> dict[str, str] | None:
+        # Build the schema of the game, None if game or players are unknown or
+        # if the results were written with another schema version.
+        # pylint: disable=import-outside-toplevel
+        from .schema import SCHEMA_VERSION
+        if self.schema_version != SCHEMA_VERSION:
+            return None
+        game = _game(self.game_type)
+        if game is None or self.num_players is None:
+            return None
+        return builder(game, self.num_players)
+
+
+class LazyTranscriptContext:
+    """LazyTranscriptContext
+
+    Class implements a transcript context which reads its metadata on first
+    access of a field. The metadata and the results are read through the
+    process-wide file cache, see `cache.default_cache`, such that repeated
+    access of the same transcripts does not read them from disk again. The
+    fields and methods are the ones of `TranscriptContext`, which is created
+    again once the metadata file changed.
+
+    The metadata file is resolved once it exists. Reading fields does not
+    check the file again, `context` does and creates the context again if the
+    metadata changed.
+
+    Attributes:
+        raw: The raw transcript path.
+        _meta_path: The metadata file, None until it exists.
+        _meta: The cached metadata of the current context.
+        _cnt: The current context, None before the first access.
+
+    Args:
+        transcript: The raw transcript path.
+    """
+
+    def __init__(self, transcript: Path):
+        self.raw = transcript
+        self._meta_path = None
+        self._meta = None
+        self._cnt = None
+
+    def __getattr__(self, name: str):
+        # Delegates the fields and methods to the current context.
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._cnt or self.context(), name)
+
+    def _load_metadata(self) -> dict | None:
+        # Loads the metadata, resolves its file until it exists.
+        if self._meta_path is not None:
+            meta = _cached_metadata(self._meta_path)
+            if meta is not None:
+                return meta
+        file = _metadata_path(self.raw)
+        meta = _cached_metadata(file)
+        self._meta_path = None if meta is None else file
+        return meta
+
+    def context(self) -> TranscriptContext:
+        """Retrieves the context of the current metadata.
+
+        Checks the metadata file for changes, which the fields read through
+        the lazy context do not.
+
+        Returns:
+            The cached context, created again if the metadata changed.
+        """
+        meta = self._load_metadata()
+        if self._cnt is None or meta is not self._meta:
+            self._cnt = TranscriptContext.from_metadata(
+                self.raw, copy.deepcopy(meta or {}), cached=True
+            )
+            self._meta = meta
+        return self._cnt
 
 
 def full_verification(transcript: Path) -> bool:
@@ -245,7 +688,7 @@ def full_verification(transcript: Path) -> bool:
     Raises:
         FileNotFoundError: If ground truth file was not found.
     """
-    ground_truth = transcript.parent.joinpath(transcript.stem + '_truth.json')
+    ground_truth = _truth_path(transcript)
     if not ground_truth.exists():
         raise FileNotFoundError(
             f'Verification file not found: {ground_truth}'
@@ -254,8 +697,10 @@ def full_verification(transcript: Path) -> bool:
     transcript_metadata = _metadata(transcript)
     final_state = transcript_metadata['final_state']
     mapping = transcript_metadata['mapping']
-    for name, abbrev in mapping.items():
-        final_state = _replace(final_state, abbrev, name)
+    final_state = _replace(
+        final_state, {abbrev: name for name, abbrev in mapping.items()}
+    )
+    for name in mapping:
         final_state.get('players')[name].pop('is_bankrupt')
 
     checker = verification.StateVerification()
@@ -263,41 +708,162 @@ def full_verification(transcript: Path) -> bool:
     return ret
 
 
-def _dataframe_path(transcript: Path) -> Path:
-    # Build the path to the parsed transcript.
-    return _build_path(transcript, '_final.csv')
+def read_metadata(transcript: Path) -> dict:
+    """Reads the metadata of a parsed transcript.
+
+    Other than `TranscriptContext.metadata`, missing metadata is not logged
+    but raised, e.g. to check whether a transcript was parsed.
+
+    Args:
+        transcript: The raw transcript path.
+
+    Returns:
+        The metadata of the parsed transcript.
+
+    Raises:
+        FileNotFoundError: If the metadata does not exist.
+    """
+    return _read_json(_metadata_path(transcript))
 
 
-def _metadata_path(transcript: Path) -> Path:
-    # Build the path to the metadata.
-    return _build_path(transcript, '_metadata.json')
+def output_options(storage_format: storage.StorageFormat | None = None,
+                   export_changes: bool = False,
+                   output_compression: compression.Compression | None = None
+                   ) -> dict:
+    """Describes the options of the outputs as recorded in the metadata.
 
+    Args:
+        storage_format: The storage format of the outputs. If None, the global
+            default format is used, see `storage.default_format`.
+        export_changes: The state changes are saved.
+        output_compression: The compression of the outputs.
 
-def _dataframe(transcript: Path) -> pd.DataFrame:
-    # Load the processed result.
+    Returns:
+        The names of the storage format and compression and whether the state
+        changes are saved.
+    """
+    storage_format = storage_format or storage.default_format()
+    return {
+        'storage_format': storage_format.name,
+        'export_changes': export_changes,
+        'output_compression':
+            None if output_compression is None else output_compression.name
+    }
+
+
+def _dataframe_path(transcript: Path,
+                    storage_format: storage.StorageFormat | None = None,
+                    output: compression.Compression | None = None,
+                    files: set[str] | None = None) -> Path:
+    # Build the path to the parsed transcript, resolve existing if no format.
+    return _build_result_path(
+        transcript, '_final', storage_format, output, files
+    )
+
+
+def _summary_path(transcript: Path,
+                  storage_format: storage.StorageFormat | None = None,
+                  output: compression.Compression | None = None,
+                  files: set[str] | None = None) -> Path:
+    # Build the path to the per round summary, resolve existing if no format.
+    return _build_result_path(
+        transcript, '_summary', storage_format, output, files
+    )
+
+
+def _changes_path(transcript: Path,
+                  storage_format: storage.StorageFormat | None = None,
+                  output: compression.Compression | None = None,
+                  files: set[str] | None = None) -> Path:
+    # Build the path to the state changes, resolve existing if no format.
+    return _build_result_path(
+        transcript, '_changes', storage_format, output, files
+    )
+
+
+def _truth_path(transcript: Path, files: set[str] | None = None) -> Path:
+    # Build the path to the ground truth, resolve existing compression.
+    return compression.resolve(_build_path(transcript, '_truth.json'), files)
+
+
+def _metadata_path(transcript: Path,
+                   output: compression.Compression | None = None,
+                   files: set[str] | None = None) -> Path:
+    # Build the path to the metadata, resolve existing if no compression.
+    file = _build_path(transcript, '_metadata.json')
+    if output is None:
+        return compression.resolve(file, files)
+    return compression.compress(file, output)
+
+
+def _dataframe(transcript: Path, columns: list[str] | None = None,
+               dtypes: dict[str, str] | None = None,
+               cached: bool = False) -> "pd.DataFrame":
+    # Load the processed result, only the columns if given.
+    import pandas as pd  # pylint: disable=import-outside-toplevel
     file = _dataframe_path(transcript)
     try:
-        return _read_dataframe(file)
+        return _read_dataframe(file, columns, dtypes, cached)
     except FileNotFoundError:
         logger.error('Parsed transcript not found: %s', file)
         return pd.DataFrame()
 
 
-def _metadata(transcript: Path) -> dict:
+def _summary(transcript: Path, dtypes: dict[str, str] | None = None,
+             cached: bool = False) -> "pd.DataFrame":
+    # Load the per round summary.
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    file = _summary_path(transcript)
+    try:
+        return _read_dataframe(file, dtypes=dtypes, cached=cached)
+    except FileNotFoundError:
+        logger.error('Summary not found: %s', file)
+        return pd.DataFrame()
+
+
+def _changes(transcript: Path, cached: bool = False) -> "pd.DataFrame":
+    # Load the state changes.
+    # pylint: disable=import-outside-toplevel
+    import pandas as pd
+    from . import schema
+    file = _changes_path(transcript)
+    try:
+        return _read_dataframe(
+            file, dtypes=schema.changes_schema(), cached=cached
+        )
+    except FileNotFoundError:
+        logger.error('State changes not found: %s', file)
+        return pd.DataFrame()
+
+
+def _metadata(transcript: Path, cached: bool = False) -> dict:
     # Loads the metadata of the parsed transcript.
     file = _metadata_path(transcript)
     try:
-        return _read_json(file)
+        return _read_json(file, cached)
     except FileNotFoundError:
         logger.error('Metadata not found: %s', file)
         return {}
 
 
+def _cached_metadata(file: Path) -> dict | None:
+    # Loads the metadata file shared by the file cache, None if not found.
+    try:
+        return cache.default_cache().load(file, lambda: _read_json(file))
+    except FileNotFoundError:
+        return None
+
+
 def _num_players(data: dict) -> int | None:
     # Extract number of players.
     return data.get('num_players', None)
 
 
+def _schema_version(data: dict) -> int | None:
+    # Extract schema version of the results.
+    return data.get('schema_version', None)
+
+
 def _game_ending(data: dict) -> str | None:
     # Extract game ending.
     return data.get('finished', None)
@@ -326,6 +892,11 @@ def _unprocessed_lines(data: dict) -> list[str]:
     return data.get('unprocessed_lines', [])
 
 
+def _index(data: dict) -> dict:
+    # Extract the row ranges of the rounds and phases.
+    return data.get('index', {})
+
+
 def _valid_record(data: dict) -> bool:
     # Verify that record is valid: parsed successfully and verified.
     v_result = _verification_result(data)
@@ -335,6 +906,42 @@ def _valid_record(data: dict) -> bool:
     return v_result and p_result
 
 
+def _select_columns(available: list[str], columns: list[str],
+                    players: list[str] | None, companies: list[str] | None,
+                    fields: list[str] | None) -> list[str]:
+    # Selects the columns by name, entity and field, in order of the file.
+    entities = []
+    if players is None and companies is None:
+        if fields is not None:
+            entities = _players(available) + _companies(available)
+    else:
+        entities = (players or []) + (companies or [])
+    selected = set(columns)
+    for col in available:
+        for entity in entities:
+            if not col.startswith(f'{entity}_'):
+                continue
+            field = col[len(entity) + 1:]
+            if fields is None or any(
+                    field == f or field.startswith(f'{f}_') for f in fields
+            ):
+                selected.add(col)
+    return [col for col in available if col in selected]
+
+
+def _players(columns: list[str]) -> list[str]:
+    # Extracts the players from the state columns, only players have a value.
+    return [col[:-len('_value')] for col in columns if col.endswith('_value')]
+
+
+def _companies(columns: list[str]) -> list[str]:
+    # Extracts the companies from the state columns with a president.
+    return [
+        col[:-len('_president')] for col in columns if
+        col.endswith('_president')
+    ]
+
+
 def _transcript_id(name: str) -> int:
     # Extracts the transcript ID from a filename.
     return int(name.split('_')[1])
@@ -345,51 +952,184 @@ def _transcript_game(name: str) -> str:
     return name.split('_')[0]
 
 
+def _game(game_type: str) -> games.Game18xx | None:
+    # Selects the game from the game type, None if not implemented.
+    try:
+        return games.Games.argparse(f'G{game_type}').select()
+    except ValueError:
+        return None
+
+
+def _transcript_name(transcript: Path) -> str:
+    # Extracts the transcript name without suffixes, e.g. `1830_123`.
+    return compression.strip(transcript).stem
+
+
 def _build_path(transcript: Path, suffix: str) -> Path:
     # Builds the transcript path with its new suffix.
-    return transcript.parent.joinpath(transcript.stem + suffix)
+    return transcript.parent.joinpath(_transcript_name(transcript) + suffix)
 
 
-def _read_json(file: Path) -> dict:
-    # Read a json file as dict.
-    if not file.exists():
+def _build_result_path(transcript: Path, suffix: str,
+                       storage_format: storage.StorageFormat | None,
+                       output: compression.Compression | None = None,
+                       files: set[str] | None = None) -> Path:
+    # Builds the result path in the format, or resolves the existing one.
+    if storage_format is None:
+        return storage.resolve(
+            _build_path(transcript, suffix + '.csv'), files
+        )
+    return compression.compress(
+        _build_path(transcript, suffix + storage_format.value), output
+    )
+
+
+def _scan_directory(directory: Path) -> set[str]:
+    # Scans the names of the files in the directory.
+    with os.scandir(directory) as entries:
+        return {entry.name for entry in entries if entry.is_file()}
+
+
+def _group_files(files: set[str]) -> dict[str, set[str]]:
+    # Groups the file names by their transcript, e.g. `1830_123`.
+    groups = {}
+    for name in files:
+        key = '_'.join(name.split('.')[0].split('_')[:2])
+        groups.setdefault(key, set()).add(name)
+    return groups
+
+
+def _is_transcript(name: str, game: str | None) -> bool:
+    # Checks if the file is a raw transcript `<game>_<id>.txt` of the game.
+    if compression.strip(Path(name)).suffix != '.txt':
+        return False
+    parts = _transcript_name(Path(name)).split('_')
+    if len(parts) != 2 or not parts[1].isdigit():
+        return False
+    return game is None or parts[0] == game
+
+
+def _load_context(transcript: Path, files: set[str]) -> TranscriptContext:
+    # Creates the context with the paths resolved from the file names.
+    try:
+        meta = _read_json(_metadata_path(transcript, files=files), files=files)
+    except FileNotFoundError:
+        meta = {}
+    return TranscriptContext.from_metadata(transcript, meta, files)
+
+
+def _load_contexts(transcripts: list[Path], groups: dict[str, set[str]],
+                   max_workers: int | None) -> Iterator[TranscriptContext]:
+    # Creates the contexts concurrently, yielded in order of the transcripts.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(
+            lambda transcript: _load_context(
+                transcript, groups[_transcript_name(transcript)]
+            ), transcripts
+        )
+
+
+def _read_json(file: Path, cached: bool = False,
+               files: set[str] | None = None) -> dict:
+    # Read a json file as dict, a copy of the cached dict if cached. The
+    # existence is checked by the names of the files in its directory, if
+    # given, instead of the file system.
+    if cached:
+        return copy.deepcopy(
+            cache.default_cache().load(file, lambda: _read_json(file))
+        )
+    if files is not None and file.name not in files:
+        raise FileNotFoundError(file)
+    if files is None and not file.exists():
         raise FileNotFoundError(file)
-    with open(file, 'r', encoding='utf-8') as f:
+    with compression.open_file(file) as f:
         content = json.load(f)
     return content
 
 
-def _read_dataframe(file: Path) -> pd.DataFrame:
-    # Read the dataframe.
+def _read_dataframe(file: Path, columns: list[str] | None = None,
+                    dtypes: dict[str, str] | None = None,
+                    cached: bool = False) -> "pd.DataFrame":
+    # Read the dataframe with the backend of its format and the column types.
+    if cached:
+        key = ('read', None if columns is None else tuple(columns))
+        return cache.default_cache().load(
+            file, lambda: _read_dataframe(file, columns, dtypes), key
+        ).copy()
+    if not file.exists():
+        raise FileNotFoundError(file)
+    return storage.backend(file).read(file, columns, dtypes)
+
+
+def _read_dataframe_rows(file: Path, start: int, end: int,
+                         dtypes: dict[str, str] | None = None,
+                         cached: bool = False) -> "pd.DataFrame":
+    # Read the rows [start, end) of the dataframe with the column types.
+    if cached:
+        return cache.default_cache().load(
+            file, lambda: _read_dataframe_rows(file, start, end, dtypes),
+            ('rows', start, end)
+        ).copy()
     if not file.exists():
         raise FileNotFoundError(file)
-    return pd.read_csv(file, header=0, sep=',')
+    return storage.backend(file).read_rows(file, start, end, dtypes)
 
 
 def _write_json(file: Path, content: dict) -> None:
-    # Write a json file with indent of 2.
-    with open(file, 'w', encoding='utf-8') as f:
-        f.write(json.dumps(content, indent=2))
-
-
-def _write_dataframe(file: Path, df: pd.DataFrame) -> None:
-    # Write dataframe to be opened by Excel (colon separator).
-    df.to_csv(file, index=False, sep=',')
+    # Write a json file with indent of 2, compressed by its suffix.
+    with storage.atomic_file(file) as tmp:
+        with compression.open_file(tmp, 'w') as f:
+            f.write(json.dumps(content, indent=2))
+
+
+def _write_dataframe(file: Path, df: "pd.DataFrame",
+                     row_groups: list[list[int]] | None = None) -> None:
+    # Write dataframe with the backend of its format, CSV with colon separator.
+    with storage.atomic_file(file) as tmp:
+        storage.backend(file).write(tmp, df, row_groups)
+
+
+def _anonymize_dataframe(df: "pd.DataFrame", mapping: dict) -> None:
+    # Replaces the player names in the cells and column labels in place.
+    for col in df.columns:
+        if col not in _PLAYER_NAME_COLUMNS and not col.endswith('_president'):
+            continue
+        values = df[col]
+        mask = values.isin(mapping.keys())
+        if mask.any():
+            df[col] = values.where(~mask, values[mask].map(mapping))
+    names = sorted(mapping.keys(), key=len, reverse=True)
+    df.columns = [_anonymize_label(col, names, mapping) for col in df.columns]
+
+
+def _anonymize_label(label: str, names: list[str], mapping: dict) -> str:
+    # Replaces the player name prefix of a state column, e.g. `name_cash`.
+    for name in names:
+        if label.startswith(f'{name}_'):
+            return mapping[name] + label[len(name):]
+    return label
+
+
+def _replace(obj, mapping: dict):
+    # Replaces the keys of the mapping with their values in one traversal.
+    if not mapping:
+        return obj
+    # Longer keys first, such that keys containing others match as a whole.
+    pattern = re.compile('|'.join(
+        re.escape(old) for old in sorted(mapping, key=len, reverse=True)
+    ))
+    return _substitute(obj, pattern, mapping)
 
 
-def _replace(obj, old, new):
-    # Replaces the old with the new value in object.
+def _substitute(obj, pattern: re.Pattern, mapping: dict):
+    # Substitutes the matches of the pattern in the strings of the object.
     if isinstance(obj, dict):
         return {
-            k.replace(old, new): _replace(v, old, new) for k, v in
-            obj.items()
+            _substitute(k, pattern, mapping): _substitute(v, pattern, mapping)
+            for k, v in obj.items()
         }
     if isinstance(obj, list):
-        return [_replace(item, old, new) for item in obj]
+        return [_substitute(item, pattern, mapping) for item in obj]
     if isinstance(obj, str):
-        return obj.replace(old, new)
-    if isinstance(obj, pd.DataFrame):
-        obj.replace(old, new, regex=False, inplace=True)  # full strings
-        obj.columns = obj.columns.str.replace(old, new, regex=False)
-        return obj
+        return pattern.sub(lambda match: mapping[match.group(0)], obj)
     return obj